@@ -0,0 +1,63 @@
+"""Simulated workload for the adaptive difficulty engine.
+
+Usage: python -m benchmarks.bench_adaptive_difficulty [--users 100000] [--operations 1000000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from benchmarks.common import percentile
+from src.core.services.ai.adaptive_difficulty import AdaptiveDifficultyEngine
+
+TOPICS = [f"topic {i}" for i in range(50)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--operations', type=int, default=1_000_000)
+    parser.add_argument('--capacity', type=int, default=100_000)
+    parser.add_argument('--sample-every', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # Each simulated learner has a hidden ability; results are drawn against it
+    abilities = [rng.gauss(1100, 250) for _ in range(args.users)]
+    flushed = []
+    engine = AdaptiveDifficultyEngine(capacity=args.capacity, flush_interval=1.0,
+                                      saver=lambda dirty: flushed.append(len(dirty)))
+    levels = {'beginner': 800, 'intermediate': 1200, 'advanced': 1600}
+
+    tracemalloc.start()
+    recommend_us, record_us = [], []
+    start = time.perf_counter()
+    for i in range(args.operations):
+        user_id = rng.randrange(args.users)
+        topic = TOPICS[rng.randrange(len(TOPICS))]
+        sample = i % args.sample_every == 0
+
+        t0 = time.perf_counter()
+        difficulty = engine.recommend(user_id, topic)
+        t1 = time.perf_counter()
+        p_success = 1 / (1 + 10 ** ((levels[difficulty] - abilities[user_id]) / 400))
+        score = 100 if rng.random() < p_success else 40
+        t2 = time.perf_counter()
+        engine.record_result(user_id, topic, score, difficulty)
+        t3 = time.perf_counter()
+        if sample:
+            recommend_us.append((t1 - t0) * 1e6)
+            record_us.append((t3 - t2) * 1e6)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    recommend_us.sort()
+    record_us.sort()
+    print(f"{args.operations:,} recommend+record pairs over {args.users:,} users in {elapsed:.1f}s "
+          f"({args.operations / elapsed:,.0f} pairs/s)")
+    print(f"recommend us: p50 {percentile(recommend_us, .5):.1f} p99 {percentile(recommend_us, .99):.1f}")
+    print(f"record us:    p50 {percentile(record_us, .5):.1f} p99 {percentile(record_us, .99):.1f}")
+    print(f"flushes: {len(flushed)}, avg batch {sum(flushed) / max(1, len(flushed)):,.0f} estimates")
+    print(f"peak traced memory: {peak / 1e6:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Replay an answer corpus through /api/ai/get-feedback with and without local grading.
+
+The LLM is a stub that sleeps for a latency drawn from the given
+distribution, so the numbers show the escalation rate and how local
+grading changes the feedback latency distribution.
+
+Usage: python -m benchmarks.bench_grading [--rounds 5] [--latency lognormal:800:0.5]
+           [--corpus benchmarks/data/answer_corpus.jsonl]
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from unittest.mock import MagicMock, patch
+from benchmarks.common import auth_headers, make_app, percentile
+from benchmarks.mock_servers import LatencyModel
+from src.config.settings import GRADING_CONFIG
+from src.core.services.ai.answer_grading import grade_answer
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'answer_corpus.jsonl')
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def fake_client(latency: LatencyModel):
+    """OpenAI client stub that answers after a sampled delay."""
+    def create(**kwargs):
+        time.sleep(latency.sample() / 1000.0)
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "Good effort! Compare your reasoning with the expected answer."
+        return response
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+    return client
+
+def replay(client, headers, corpus, rounds, local_enabled):
+    """Latencies (ms) per grading path."""
+    latencies = {'local': [], 'llm': []}
+    with patch.dict(GRADING_CONFIG, {'LOCAL_ENABLED': local_enabled}):
+        for _ in range(rounds):
+            for item in corpus:
+                start = time.perf_counter()
+                response = client.post('/api/ai/get-feedback', json=item, headers=headers)
+                elapsed = (time.perf_counter() - start) * 1e3
+                latencies[response.json['graded_by']].append(elapsed)
+    return latencies
+
+def describe(values):
+    values = sorted(values)
+    return (f"n={len(values):<4} p50 {percentile(values, 0.50):8.2f} ms  p95 {percentile(values, 0.95):8.2f} ms  "
+            f"p99 {percentile(values, 0.99):8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', default='lognormal:800:0.5', help='stub LLM latency distribution')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    verdicts = Counter()
+    methods = Counter()
+    for item in corpus:
+        grade = grade_answer(item['answer'], item['correct_answer'], item.get('options'))
+        verdicts[grade['verdict']] += 1
+        methods[grade['method']] += 1
+    print(f"corpus: {len(corpus)} answers; verdicts {dict(verdicts)}; methods {dict(methods)}")
+    print(f"escalation rate: {verdicts['ambiguous'] / len(corpus):.1%}")
+
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=fake_client(LatencyModel(args.latency, seed=7))):
+        baseline = replay(client, headers, corpus, args.rounds, local_enabled=False)
+        local = replay(client, headers, corpus, args.rounds, local_enabled=True)
+
+    print(f"\nLLM only      all  {describe(baseline['llm'])}")
+    print(f"local grading all  {describe(local['local'] + local['llm'])}")
+    print(f"              local {describe(local['local'])}")
+    print(f"              llm   {describe(local['llm'])}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Tail latency of lesson calls with and without hedging, over the mock OpenAI server.
+
+The mock's latency distribution should be heavy-tailed (the default is a
+lognormal with a wide sigma) for hedging to matter. Reports p50/p95/p99,
+the share of extra upstream calls and the hedge win rate.
+
+Usage: python -m benchmarks.bench_hedging [--calls 200] [--concurrency 4]
+           [--latency lognormal:100:0.9] [--budget 0.05]
+"""
+import argparse
+import threading
+import time
+from unittest.mock import patch
+from benchmarks.common import make_app, percentile
+from benchmarks.mock_servers import FakeOpenAIServer
+from src.config.settings import HEDGING_CONFIG
+
+MESSAGES = [{"role": "user", "content": "Please create a lesson about tides that is suitable for beginner level students."}]
+
+def run(app, server, calls: int, concurrency: int):
+    """Latencies (ms) of `calls` lesson requests from `concurrency` threads, and upstream requests made."""
+    from src.core.services.ai.model_router import LESSON
+    from src.core.utils.openai_client import get_openai_response
+
+    latencies = []
+    lock = threading.Lock()
+    remaining = iter(range(calls))
+    upstream_start = server.requests
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                get_openai_response(MESSAGES, route=LESSON)
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1e3)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), server.requests - upstream_start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', default='lognormal:100:0.9')
+    parser.add_argument('--budget', type=float, default=0.05, help='extra calls allowed per call')
+    parser.add_argument('--percentile', type=float, default=0.95, help='hedge after this latency percentile')
+    args = parser.parse_args()
+
+    from src.core.services.ai.hedging import Hedger, set_hedger
+
+    with FakeOpenAIServer(latency=args.latency, seed=11) as server:
+        app = make_app(OPENAI_BASE_URL=f"{server.url}/v1")
+        config = {**HEDGING_CONFIG, 'ENABLED': True, 'ROUTES': ['lesson'], 'BUDGET_RATIO': args.budget,
+                  'PERCENTILE': args.percentile, 'MIN_DELAY_MS': 0}
+        hedger = Hedger(config)
+        with patch.dict(HEDGING_CONFIG, {'ENABLED': False}):
+            baseline, baseline_upstream = run(app, server, args.calls, args.concurrency)
+        set_hedger(hedger)
+        try:
+            with patch.dict(HEDGING_CONFIG, config):
+                hedged, hedged_upstream = run(app, server, args.calls, args.concurrency)
+        finally:
+            set_hedger(None)
+
+    print(f"{args.calls} lesson calls x {args.concurrency} threads, mock latency {args.latency}, "
+          f"budget {args.budget:.0%}, hedge after p{args.percentile * 100:.0f}")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'upstream':>9}")
+    for label, values, upstream in (('plain', baseline, baseline_upstream), ('hedged', hedged, hedged_upstream)):
+        print(f"{label:<10} {percentile(values, 0.50):>8.1f} {percentile(values, 0.95):>8.1f} "
+              f"{percentile(values, 0.99):>8.1f} {values[-1]:>8.1f} {upstream:>9}")
+    stats = hedger.snapshot()
+    print(f"hedged {stats['hedged']} of {stats['calls']} calls ({stats['hedge_rate']:.1%}), "
+          f"hedge win rate {stats['hedge_win_rate']:.0%}, skipped for budget {stats['skipped_budget']}, "
+          f"for capacity {stats['skipped_capacity']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Measure bytes on the wire and SQL queries for history page navigations.
+
+Each endpoint is fetched as a first visit, as a gzip-accepting visit and as a
+revalidation with the ETag from the previous response.
+
+Usage: python -m benchmarks.bench_history_caching [--items 200] [--views 200]
+"""
+import argparse
+import os
+import time
+from sqlalchemy import event
+from benchmarks.common import auth_headers, make_app
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+
+class QueryCounter:
+    """Count statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--views', type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    from src.core.models.database import db
+    from src.core.models.search_history import SearchHistory
+    from src.core.models.user import User
+
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        lesson = f.read()
+    with app.app_context():
+        user_id = User.query.filter_by(username='benchuser').first().id
+        db.session.add_all([SearchHistory(
+            user_id=user_id, topic=f"Topic {i}", difficulty='beginner',
+            content_type='lesson', content=lesson
+        ) for i in range(args.items)])
+        db.session.commit()
+        item_id = SearchHistory.query.filter_by(user_id=user_id).first().id
+        counter = QueryCounter(db.engine)
+
+    print(f"{args.items} history rows, {args.views} views per mode")
+    print(f"{'endpoint':<26} {'mode':<12} {'status':>6} {'bytes/view':>11} {'queries/view':>13} {'ms/view':>8}")
+    for url in ['/api/ai/search-history', f'/api/ai/search-history/{item_id}', '/api/learning/history']:
+        etag = client.get(url, headers=headers).headers['ETag']
+        for mode, extra in [
+            ('full', {}),
+            ('gzip', {'Accept-Encoding': 'gzip'}),
+            ('revalidate', {'If-None-Match': etag}),
+        ]:
+            total_bytes = 0
+            counter.count = 0
+            start = time.perf_counter()
+            for _ in range(args.views):
+                response = client.get(url, headers={**headers, **extra})
+                total_bytes += len(response.data)
+            elapsed = time.perf_counter() - start
+            print(f"{url[:26]:<26} {mode:<12} {response.status_code:>6} "
+                  f"{total_bytes / args.views:>11.0f} {counter.count / args.views:>13.1f} "
+                  f"{elapsed / args.views * 1e3:>8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Writer stalls during a large history deletion: one DELETE vs batched deletion.
+
+Fills a throwaway SQLite database with --rows expired history rows, then
+deletes them while a writer thread keeps inserting (and committing) new rows
+on its own connection. Reports deletion time and the writer's commits and
+wait per insert for the old single-statement delete and for the batched
+purge at --batch-size.
+
+Usage: python -m benchmarks.bench_history_deletion [--rows 200000] [--row-bytes 1000]
+           [--batch-size 500] [--pause 0.02]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from benchmarks.common import make_app, percentile
+from src.config.settings import HISTORY_DELETION_CONFIG
+
+def fill(db_path: str, rows: int, row_bytes: int) -> None:
+    old = (datetime.utcnow() - timedelta(days=400)).isoformat(' ')
+    conn = sqlite3.connect(db_path)
+    for start in range(0, rows, 5000):
+        conn.executemany(
+            "INSERT INTO search_history (user_id, topic, content, content_type, created_at) "
+            "VALUES (1, ?, ?, 'lesson', ?)",
+            [(f"Topic {i}", 'x' * row_bytes, old) for i in range(start, min(rows, start + 5000))]
+        )
+        conn.commit()
+    conn.close()
+
+def with_writer(db_path: str, delete):
+    """Run `delete()` while a writer inserts rows; returns (seconds, sorted writer waits in ms)."""
+    waits, stop = [], threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=60)
+        while not stop.is_set():
+            start = time.perf_counter()
+            conn.execute("INSERT INTO search_history (user_id, topic, content_type, created_at) "
+                         "VALUES (2, 'New', 'quiz', ?)", (datetime.utcnow().isoformat(' '),))
+            conn.commit()
+            waits.append((time.perf_counter() - start) * 1e3)
+            time.sleep(0.005)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    delete()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    return elapsed, sorted(waits)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--row-bytes', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=HISTORY_DELETION_CONFIG['BATCH_SIZE'])
+    parser.add_argument('--pause', type=float, default=HISTORY_DELETION_CONFIG['BATCH_PAUSE'])
+    args = parser.parse_args()
+
+    app = make_app()
+    db_path = app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]
+    with app.app_context():
+        from src.core.models.database import db
+        from src.core.models.search_history import SearchHistory
+        from src.core.services.history_deletion import purge_expired_history
+
+        def single_delete():
+            SearchHistory.query.filter(SearchHistory.user_id == 1).delete()
+            db.session.commit()
+
+        def batched_delete():
+            with patch.dict(HISTORY_DELETION_CONFIG, {'BATCH_SIZE': args.batch_size, 'BATCH_PAUSE': args.pause}):
+                purge_expired_history(days=30, archive=False)
+
+        print(f"{args.rows} rows of {args.row_bytes} B; batches of {args.batch_size} with {args.pause * 1e3:.0f} ms pauses")
+        print(f"{'delete':>8} {'seconds':>8} {'writes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for label, delete in (('single', single_delete), ('batched', batched_delete)):
+            fill(db_path, args.rows, args.row_bytes)
+            elapsed, waits = with_writer(db_path, delete)
+            print(f"{label:>8} {elapsed:>8.2f} {len(waits):>7} {percentile(waits, 0.50):>8.2f} "
+                  f"{percentile(waits, 0.99):>8.1f} {waits[-1] if waits else 0:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Memory and throughput of history export/import vs the buffered history list.
+
+Fills a throwaway SQLite database with --size-mb of lesson history for one
+user, then runs each mode in its own process and reports response bytes,
+wall time and peak RSS growth over the idle app:
+
+- list:        GET /api/learning/history (every row loaded, one JSON array)
+- export:      GET /api/learning/history/export (streamed NDJSON)
+- export-gzip: the same with Accept-Encoding: gzip
+- import:      POST the gzip export back to /api/learning/history/import
+
+The list mode holds the whole history in memory several times over; skip it
+with --modes on machines with less RAM than about 5x --size-mb.
+
+Usage: python -m benchmarks.bench_history_export [--size-mb 1024] [--row-kb 20]
+           [--modes list,export,export-gzip,import]
+"""
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.common import auth_headers, make_app
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+MODES = ('list', 'export', 'export-gzip', 'import')
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def fill_history(db_path: str, size_mb: int, row_kb: int) -> int:
+    """Insert about `size_mb` of lesson rows for the benchmark user; returns the row count."""
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        sample = f.read()
+    body = (sample * (row_kb * 1024 // len(sample) + 1))[:row_kb * 1024]
+    rows = size_mb * 1024 // row_kb
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute("SELECT id FROM user WHERE username = 'benchuser'").fetchone()[0]
+    now = datetime.utcnow().isoformat(' ')
+    for start in range(0, rows, 1000):
+        conn.executemany(
+            "INSERT INTO search_history (user_id, topic, difficulty, content, content_type, created_at) "
+            "VALUES (?, ?, 'intermediate', ?, 'lesson', ?)",
+            [(user_id, f"Topic {i}", f"# Lesson {i}\n\n{body}", now) for i in range(start, min(rows, start + 1000))]
+        )
+        conn.commit()
+    conn.close()
+    return rows
+
+def run_mode(mode: str, db_path: str, export_path: str) -> dict:
+    """Run one mode against the filled database (called in a fresh process)."""
+    app = make_app(db_path)
+    client = app.test_client()
+    headers = auth_headers(client)
+    import_headers = auth_headers(client, username='importuser')
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'list':
+        response = client.get('/api/learning/history', headers=headers)
+        size = len(response.data)
+    elif mode.startswith('export'):
+        gzipped = mode == 'export-gzip'
+        response = client.get('/api/learning/history/export', buffered=False,
+                              headers={**headers, 'Accept-Encoding': 'gzip' if gzipped else 'identity'})
+        size = 0
+        with open(export_path, 'wb') if gzipped else open(os.devnull, 'wb') as out:
+            for chunk in response.response:
+                size += len(chunk)
+                out.write(chunk)
+        response.close()
+    else:
+        size = os.path.getsize(export_path)
+        with open(export_path, 'rb') as body:
+            response = client.post('/api/learning/history/import', input_stream=body, content_length=size,
+                                   headers={**import_headers, 'Content-Encoding': 'gzip'})
+        size = response.json['imported']
+    elapsed = time.perf_counter() - start
+    return {'status': response.status_code, 'size': size, 'seconds': elapsed,
+            'rss_growth_mb': peak_rss_mb() - baseline}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--row-kb', type=int, default=20)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--export-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.db, args.export_path)))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='gnosis-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    export_path = os.path.join(workdir, 'history.ndjson.gz')
+    app = make_app(db_path)
+    auth_headers(app.test_client())
+    start = time.perf_counter()
+    rows = fill_history(db_path, args.size_mb, args.row_kb)
+    print(f"history: {rows} rows, {args.size_mb} MB of content ({time.perf_counter() - start:.0f} s to fill)")
+
+    print(f"{'mode':>12} {'status':>6} {'bytes/rows':>12} {'seconds':>8} {'MB/s':>7} {'peak RSS +MB':>13}")
+    for mode in args.modes.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_history_export', '--child', mode,
+             '--db', db_path, '--export-path', export_path],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(f"{mode:>12} failed (exit {output.returncode}): {output.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{mode:>12} {result['status']:>6} {result['size']:>12} {result['seconds']:>8.1f} "
+              f"{args.size_mb / result['seconds']:>7.1f} {result['rss_growth_mb']:>13.0f}")
+
+if __name__ == '__main__':
+    main()
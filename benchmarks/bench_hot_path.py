@@ -0,0 +1,171 @@
+"""Microbenchmarks for the request hot path.
+
+Covers content formatting, subject classification, input validation, JWT
+handling in both token_required decorators, SearchHistory serialization and
+the history queries, using the sample lesson and a 200-row history.
+
+Usage: python -m benchmarks.bench_hot_path [--filter format] [--output results.json] [--rounds 7]
+Compare two runs with: python -m benchmarks.harness compare old.json new.json
+"""
+import argparse
+import itertools
+import json
+import os
+from functools import lru_cache
+import jwt
+from benchmarks.common import make_app
+from benchmarks.harness import case, run_cases
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+HISTORY_ROWS = 200
+TOPICS = [
+    'Quadratic equations', 'Photosynthesis in plants', 'Python decorators', 'The French Revolution',
+    'Supply and demand curves', 'Newton laws of motion', 'Cell division and mitosis', 'Binary search trees',
+    'Linear algebra basics', 'Iambic pentameter', 'Organic chemistry reactions', 'SQL joins explained',
+]
+QUESTION = "Solve for x: 2x^2 + 3x - 2 = 0 using sqrt(b^2 - 4ac) and frac{-b}{2a}, where alpha != beta"
+
+@lru_cache(maxsize=None)
+def sample_lesson():
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        return f.read()
+
+@lru_cache(maxsize=None)
+def bench_app():
+    """App with a user, a token and a populated history, inside a pushed request context."""
+    from src.core.models.database import db
+    from src.core.models.search_history import SearchHistory
+    from src.core.models.user import User
+    from src.core.utils.auth import create_token
+
+    app = make_app()
+    with app.app_context():
+        user = User(username='benchuser', email='benchuser@example.com')
+        user.set_password('benchpass123')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([SearchHistory(
+            user_id=user.id, topic=TOPICS[i % len(TOPICS)], difficulty='beginner',
+            content_type='lesson' if i % 2 else 'quiz', content=sample_lesson()
+        ) for i in range(HISTORY_ROWS)])
+        db.session.commit()
+        user_id = user.id
+
+    token = create_token(user_id)
+    context = app.test_request_context(headers={'Authorization': f"Bearer {token}"})
+    context.push()
+    return app, user_id, token
+
+@case('format.lesson_content')
+def bench_format_lesson_content():
+    from src.api.routes.ai_routes import format_lesson_content
+    lesson = sample_lesson()
+    return lambda: format_lesson_content(lesson)
+
+@case('format.latex_content')
+def bench_format_latex_content():
+    from src.core.services.ai.generation import format_latex_content
+    return lambda: format_latex_content(QUESTION)
+
+@case('subject.get_subject_type')
+def bench_get_subject_type():
+    from src.api.routes.ai_routes import get_subject_type
+    topics = itertools.cycle(TOPICS)
+    return lambda: get_subject_type(next(topics))
+
+@case('subject.classify_uncached')
+def bench_classify_uncached():
+    from src.core.services.ai.subject_classifier import get_classifier
+    classifier = get_classifier()
+    topics = itertools.cycle(TOPICS)
+    return lambda: classifier.classify(next(topics))
+
+@case('validate.input')
+def bench_validate_input():
+    from src.api.routes.ai_routes import validate_input
+    return lambda: validate_input(topic='Quadratic equations', difficulty='intermediate', answer='x = 2')
+
+@case('auth.jwt_decode')
+def bench_jwt_decode():
+    _, _, token = bench_app()
+    secret = os.environ['SECRET_KEY']
+    return lambda: jwt.decode(token, secret, algorithms=['HS256'])
+
+@case('auth.token_required_id')
+def bench_token_required_id():
+    from src.core.utils.auth import token_required
+    bench_app()
+    view = token_required(lambda current_user_id: current_user_id)
+    return view
+
+@case('auth.token_required_user')
+def bench_token_required_user():
+    from src.api.routes.auth_routes import token_required
+    bench_app()
+    view = token_required(lambda current_user: current_user.id)
+    return view
+
+@case('model.search_history_to_dict')
+def bench_search_history_to_dict():
+    from src.core.models.search_history import SearchHistory
+    _, user_id, _ = bench_app()
+    rows = SearchHistory.query.filter_by(user_id=user_id).all()
+    return lambda: [row.to_dict() for row in rows]
+
+@case('query.search_history_list')
+def bench_search_history_list():
+    from src.core.models.database import db
+    from src.core.models.search_history import SearchHistory
+    _, user_id, _ = bench_app()
+    return lambda: db.session.query(
+        SearchHistory.id, SearchHistory.topic, SearchHistory.difficulty,
+        SearchHistory.content_type, SearchHistory.created_at
+    ).filter_by(user_id=user_id).order_by(SearchHistory.created_at.desc()).all()
+
+@case('query.learning_history')
+def bench_learning_history():
+    from src.core.models.database import db
+    from src.core.models.search_history import SearchHistory
+    _, user_id, _ = bench_app()
+
+    def query():
+        rows = SearchHistory.query.filter_by(user_id=user_id).all()
+        db.session.expunge_all()  # measure a cold identity map, as in a fresh request
+        return rows
+    return query
+
+@case('query.history_item')
+def bench_history_item():
+    from src.core.models.database import db
+    from src.core.models.search_history import SearchHistory
+    _, user_id, _ = bench_app()
+    item_id = SearchHistory.query.filter_by(user_id=user_id).first().id
+
+    def query():
+        row = db.session.get(SearchHistory, item_id)
+        db.session.expunge_all()
+        return row
+    return query
+
+@case('query.history_version')
+def bench_history_version():
+    from src.core.services.history_version import get_history_version
+    _, user_id, _ = bench_app()
+    return lambda: get_history_version(user_id)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filter', action='append', help='only run cases whose name contains this (repeatable)')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--min-round-seconds', type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = run_cases(args.filter, args.rounds, args.min_round_seconds)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Serialization microbenchmarks for API payloads.
+
+Compares Flask's stdlib provider with FastJSONProvider on a lesson response,
+a history listing and the quiz pipeline (parse, store, respond).
+
+Usage: python -m benchmarks.bench_json [--iterations 2000] [--items 200]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.core.utils.json_provider import FastJSONProvider, RawJSON, dumps_bytes, loads
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+
+def make_quiz(count=5):
+    """LLM-style quiz JSON text."""
+    return json.dumps({'questions': [{
+        'question': f"Question {i}: solve $x^2 - {i}x + 6 = 0$ for the larger root.",
+        'options': [f"$x = {i + j}$" for j in range(4)],
+        'correct_answer': f"$x = {i}$",
+        'explanation': "Factor the quadratic and compare the two roots. " * 3,
+    } for i in range(count)]})
+
+def timed(func, iterations):
+    """Microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2_000)
+    parser.add_argument('--items', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        lesson = f.read()
+    now = datetime.utcnow().isoformat()
+    payloads = {
+        'lesson': {'lesson': lesson, 'history_id': 42, 'cached': False, 'difficulty': 'beginner'},
+        'history list': [{
+            'id': i, 'user_id': 1, 'topic': f"Topic {i}", 'difficulty': 'beginner',
+            'content': lesson, 'content_type': 'lesson', 'created_at': now
+        } for i in range(args.items)],
+    }
+
+    stdlib_app = Flask('stdlib')
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    providers = [('stdlib', stdlib_app), ('fast', fast_app)]
+    assert isinstance(stdlib_app.json, DefaultJSONProvider)
+
+    print(f"{'payload':<14} {'provider':<8} {'us/response':>12} {'bytes':>9}")
+    for name, payload in payloads.items():
+        for label, app in providers:
+            with app.app_context():
+                size = len(app.json.response(payload).get_data())
+                micros = timed(lambda: app.json.response(payload).get_data(), args.iterations)
+            print(f"{name:<14} {label:<8} {micros:>12.1f} {size:>9}")
+
+    quiz_content = make_quiz()
+
+    def legacy_pipeline():
+        questions = json.loads(quiz_content)['questions']
+        stored = json.dumps({'questions': questions})
+        return stdlib_app.json.response({'questions': questions, 'history_id': 1}).get_data(), stored
+
+    def fast_pipeline():
+        questions_json = dumps_bytes(loads(quiz_content)['questions'])
+        stored = (b'{"questions":' + questions_json + b'}').decode('utf-8')
+        return fast_app.json.response({'questions': RawJSON(questions_json), 'history_id': 1}).get_data(), stored
+
+    for label, app, pipeline in [('stdlib', stdlib_app, legacy_pipeline), ('fast', fast_app, fast_pipeline)]:
+        with app.app_context():
+            micros = timed(pipeline, args.iterations)
+        print(f"{'quiz pipeline':<14} {label:<8} {micros:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark lesson rendering and conditional re-views of rendered lessons.
+
+Usage: python -m benchmarks.bench_lesson_render [--iterations 2000] [--views 500]
+"""
+import argparse
+import os
+import statistics
+import time
+from unittest.mock import MagicMock, patch
+from benchmarks.common import auth_headers, make_app, percentile
+from src.core.services.lesson_renderer import parse_markdown, render_lesson
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+
+def bench_render(markdown, iterations):
+    """Render throughput for the parse step and the full render."""
+    from src.api.routes.ai_routes import format_lesson_content
+
+    for label, func in [
+        ('format', format_lesson_content),
+        ('parse', parse_markdown),
+        ('render', render_lesson),
+        ('format+render', lambda text: render_lesson(format_lesson_content(text))),
+    ]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(markdown)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>14}: {iterations / elapsed:8.0f} lessons/s "
+              f"{len(markdown) * iterations / elapsed / 1e6:6.2f} MB/s "
+              f"({elapsed / iterations * 1e6:.0f} us/lesson)")
+
+def timed_views(client, url, headers, views):
+    """Latency and bytes for repeated GETs of one URL."""
+    timings = []
+    total_bytes = 0
+    status = None
+    for _ in range(views):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1e3)
+        total_bytes += len(response.data)
+        status = response.status_code
+    timings.sort()
+    return status, total_bytes / views, statistics.mean(timings), percentile(timings, 0.99)
+
+def bench_views(markdown, views):
+    """Compare raw history re-views with conditional rendered re-views."""
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    openai_client = MagicMock()
+    openai_client.chat.completions.create.return_value.choices = [MagicMock()]
+    openai_client.chat.completions.create.return_value.choices[0].message.content = markdown
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=openai_client):
+        lesson = client.post('/api/ai/generate-lesson', json={
+            'topic': 'Quadratic equations', 'difficulty': 'intermediate'
+        }, headers=headers)
+    history_id = lesson.json['history_id']
+    rendered_url = f'/api/ai/search-history/{history_id}/rendered'
+    etag = client.get(rendered_url, headers=headers).headers['ETag']
+
+    for label, url, view_headers in [
+        ('raw item', f'/api/ai/search-history/{history_id}', headers),
+        ('rendered', rendered_url, headers),
+        ('rendered 304', rendered_url, {**headers, 'If-None-Match': etag}),
+    ]:
+        status, size, mean, p99 = timed_views(client, url, view_headers, views)
+        print(f"{label:>14}: status {status} {size:8.0f} B/view mean {mean:.3f} ms p99 {p99:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2_000)
+    parser.add_argument('--views', type=int, default=500)
+    args = parser.parse_args()
+
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        markdown = f.read()
+    print(f"lesson: {len(markdown)} chars")
+    bench_render(markdown, args.iterations)
+    bench_views(markdown, args.views)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Whole-lesson vs per-section history views, and section storage dedupe.
+
+Saves --lessons copies of the sample lesson (every copy shares its sections,
+and with --vary each one gets a different introduction) and compares a full
+history item fetch with fetching one section, a section range and a 304
+section revalidation: response bytes, lesson text read from the database
+and latency per view.
+
+Usage: python -m benchmarks.bench_lesson_sections [--views 300] [--lessons 20] [--vary]
+"""
+import argparse
+import os
+import statistics
+import time
+from unittest.mock import MagicMock, patch
+from sqlalchemy import event
+from benchmarks.common import auth_headers, make_app, percentile
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+
+class ReadCounter:
+    """Sum the size of string values in result rows fetched through the engine."""
+
+    def __init__(self, engine):
+        self.bytes = 0
+        event.listen(engine, 'after_cursor_execute', self.after_execute)
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if cursor.description is None:
+            return
+        rows = cursor.fetchall()
+        self.bytes += sum(len(value.encode('utf-8')) for row in rows for value in row if isinstance(value, str))
+        # Hand the rows back to SQLAlchemy as if they had not been read
+        context.cursor = _Replay(cursor.description, rows)
+
+class _Replay:
+    def __init__(self, description, rows):
+        self.description, self._rows = description, list(rows)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=None):
+        rows, self._rows = self._rows[:size or 1], self._rows[size or 1:]
+        return rows
+
+    def close(self):
+        pass
+
+def save_lessons(client, headers, markdown, lessons, vary):
+    """Generate `lessons` lessons from the sample text and return their history ids."""
+    ids = []
+    openai_client = MagicMock()
+    openai_client.chat.completions.create.return_value.choices = [MagicMock()]
+    for i in range(lessons):
+        content = markdown.replace('\n## ', f"\n\nLesson copy {i}.\n\n## ", 1) if vary else markdown
+        openai_client.chat.completions.create.return_value.choices[0].message.content = content
+        with patch('src.core.utils.openai_client.get_openai_client', return_value=openai_client):
+            ids.append(client.post('/api/ai/generate-lesson', json={
+                'topic': f"Quadratic equations {i}", 'difficulty': 'intermediate'
+            }, headers=headers).json['history_id'])
+    return ids
+
+def timed_views(client, counter, url, headers, views):
+    """Status, response bytes, DB text bytes read and latency per view for one URL."""
+    timings, total_bytes, status = [], 0, None
+    start_read = counter.bytes
+    for _ in range(views):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1e3)
+        total_bytes += len(response.data)
+        status = response.status_code
+    timings.sort()
+    return (status, total_bytes / views, (counter.bytes - start_read) / views,
+            statistics.mean(timings), percentile(timings, 0.99))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--views', type=int, default=300)
+    parser.add_argument('--lessons', type=int, default=20)
+    parser.add_argument('--vary', action='store_true', help='give every lesson its own introduction')
+    args = parser.parse_args()
+
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        markdown = f.read()
+
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+    ids = save_lessons(client, headers, markdown, args.lessons, args.vary)
+    history_id = ids[-1]
+
+    with app.app_context():
+        from src.core.models.database import db
+        from src.core.models.lesson_section import LessonSection, SectionBlob
+        from src.core.services.lesson_sections import get_section_index
+
+        index = get_section_index(history_id)
+        practice = next((s.position for s in index if s.heading and 'practice' in s.heading.lower()), len(index) - 1)
+        blob_bytes = db.session.query(db.func.sum(db.func.length(SectionBlob.content))).scalar() or 0
+        print(f"lesson: {len(markdown)} chars, {len(index)} sections; {args.lessons} lessons stored as "
+              f"{LessonSection.query.count()} index rows and {SectionBlob.query.count()} section blobs "
+              f"({blob_bytes} B vs {len(markdown) * args.lessons} B of lesson text, "
+              f"{blob_bytes / (len(markdown) * args.lessons):.0%})")
+        counter = ReadCounter(db.engine)
+
+    base = f'/api/ai/search-history/{history_id}'
+    section_url = f'{base}/sections/{practice}'
+    etag = client.get(section_url, headers=headers).headers['ETag']
+    print(f"{'view':>16} {'status':>6} {'B/view':>8} {'DB B/view':>10} {'mean ms':>8} {'p99 ms':>7}")
+    for label, url, view_headers in [
+        ('full item', base, headers),
+        ('section index', f'{base}/sections', headers),
+        (f'section {practice}', section_url, headers),
+        ('sections 1-2', f'{base}/sections?range=1-2', headers),
+        (f'section {practice} 304', section_url, {**headers, 'If-None-Match': etag}),
+    ]:
+        status, size, read, mean, p99 = timed_views(client, counter, url, view_headers, args.views)
+        print(f"{label:>16} {status:>6} {size:>8.0f} {read:>10.0f} {mean:>8.3f} {p99:>7.3f}")
+
+if __name__ == '__main__':
+    main()
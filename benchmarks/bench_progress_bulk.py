@@ -0,0 +1,52 @@
+"""Compare bulk progress ingestion against one POST per record.
+
+Usage: python -m benchmarks.bench_progress_bulk [--records 50] [--rounds 5]
+"""
+import argparse
+import time
+import uuid
+from benchmarks.common import auth_headers, make_app
+
+def make_records(count):
+    """Build a replay queue like the offline frontend would send."""
+    return [{
+        'topic': f"Topic {i % 7}",
+        'score': 50 + (i * 13) % 50,
+        'time_spent': 5 + i % 10,
+        'idempotency_key': uuid.uuid4().hex,
+    } for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    single_seconds = 0.0
+    bulk_seconds = 0.0
+    for _ in range(args.rounds):
+        records = make_records(args.records)
+        start = time.perf_counter()
+        for record in records:
+            response = client.post('/api/learning/progress', json=record, headers=headers)
+            assert response.status_code == 201
+        single_seconds += time.perf_counter() - start
+
+        records = make_records(args.records)
+        start = time.perf_counter()
+        response = client.post('/api/learning/progress/bulk', json={'records': records}, headers=headers)
+        bulk_seconds += time.perf_counter() - start
+        assert response.json['created'] == args.records
+
+    total = args.rounds * args.records
+    print(f"{total} records per mode")
+    print(f"single posts: {single_seconds:.3f}s ({total / single_seconds:,.0f} records/s)")
+    print(f"bulk posts:   {bulk_seconds:.3f}s ({total / bulk_seconds:,.0f} records/s)")
+    print(f"speedup: {single_seconds / bulk_seconds:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Quiz assembly query latency with a large question bank.
+
+Usage: python -m benchmarks.bench_question_bank [--rows 1000000] [--topics 20000] [--queries 2000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from sqlalchemy import insert, text
+from benchmarks.common import make_app, percentile
+from src.core.models.database import db
+from src.core.models.question_bank import QuizQuestion, QuizQuestionSeen
+from src.core.services.ai.question_bank import draw_unseen_questions
+
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+def populate(rows, topics, users, seen_per_user, rng):
+    """Fill the bank with synthetic questions and per-user seen sets."""
+    now = datetime.utcnow()
+    batch = []
+    for i in range(rows):
+        batch.append({
+            'topic_key': f"topic{i % topics}",
+            'topic': f"Topic {i % topics}",
+            'difficulty': DIFFICULTIES[(i // topics) % 3],
+            'question': f"Question {i}?",
+            'options': ['A', 'B', 'C', 'D'],
+            'correct_answer': 'A',
+            'explanation': 'Because.',
+            'content_hash': f"{i:064x}",
+            'created_at': now,
+        })
+        if len(batch) == 50_000:
+            db.session.execute(insert(QuizQuestion), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(QuizQuestion), batch)
+
+    seen = []
+    for user_id in range(1, users + 1):
+        for question_id in rng.sample(range(1, rows + 1), seen_per_user):
+            seen.append({'user_id': user_id, 'question_id': question_id, 'seen_at': now})
+    db.session.execute(insert(QuizQuestionSeen), seen)
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--topics', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seen-per-user', type=int, default=2_000)
+    parser.add_argument('--queries', type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    app = make_app()
+    with app.app_context():
+        start = time.perf_counter()
+        populate(args.rows, args.topics, args.users, args.seen_per_user, rng)
+        print(f"populated {args.rows:,} questions in {time.perf_counter() - start:.1f}s")
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM quiz_question q WHERE topic_key = 'topic1' "
+            "AND difficulty = 'beginner' AND NOT EXISTS (SELECT 1 FROM quiz_question_seen s "
+            "WHERE s.user_id = 1 AND s.question_id = q.id) ORDER BY id DESC LIMIT 5"
+        )).all()
+        for row in plan:
+            print(f"  plan: {row[-1]}")
+
+        timings = []
+        for _ in range(args.queries):
+            user_id = rng.randint(1, args.users)
+            topic = f"topic{rng.randrange(args.topics)}"
+            start = time.perf_counter()
+            draw_unseen_questions(user_id, topic, rng.choice(DIFFICULTIES), 5)
+            timings.append((time.perf_counter() - start) * 1000)
+            db.session.rollback()
+        timings.sort()
+        print(f"assembly query ms: p50 {percentile(timings, .5):.3f} "
+              f"p95 {percentile(timings, .95):.3f} p99 {percentile(timings, .99):.3f}")
+
+if __name__ == '__main__':
+    main()
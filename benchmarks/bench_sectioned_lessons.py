@@ -0,0 +1,71 @@
+"""Single-call vs sectioned lesson generation over the mock OpenAI server.
+
+The mock charges --token-latency per completion token and (with
+fill_completion) writes lessons up to max_tokens, so one long completion is
+slower than several short ones. Each mode generates --lessons lessons through
+produce_lesson with the lesson cache off and reports wall-clock latency,
+time until the first section is available, upstream calls and completion
+tokens per lesson.
+
+Usage: python -m benchmarks.bench_sectioned_lessons [--lessons 5] [--token-latency 1.0]
+           [--latency fixed:300] [--max-parallel 5]
+"""
+import argparse
+import time
+from unittest.mock import patch
+from benchmarks.common import make_app, percentile
+from benchmarks.mock_servers import FakeOpenAIServer
+from src.config.settings import LESSON_CACHE_CONFIG, SECTIONED_LESSON_CONFIG
+
+TOPIC = 'Quadratic equations'
+
+def run(server, lessons: int, difficulty: str, sectioned: bool):
+    """Latencies (ms), first-output times (ms), calls and completion tokens per lesson for one mode."""
+    from src.core.services.ai.generation import produce_lesson
+    from src.core.services.ai.sectioned_lessons import iter_lesson_sections
+
+    totals, firsts = [], []
+    calls_start, tokens_start = server.requests, server.completion_tokens
+    with patch.dict(SECTIONED_LESSON_CONFIG, {'ENABLED': sectioned}):
+        for _ in range(lessons):
+            start = time.perf_counter()
+            if sectioned:
+                first = None
+                for event in iter_lesson_sections(TOPIC, difficulty, 'math'):
+                    if event['type'] == 'section' and first is None:
+                        first = time.perf_counter()
+                firsts.append((first - start) * 1e3)
+            else:
+                produce_lesson(TOPIC, difficulty)
+                firsts.append((time.perf_counter() - start) * 1e3)
+            totals.append((time.perf_counter() - start) * 1e3)
+    return (sorted(totals), sorted(firsts), (server.requests - calls_start) / lessons,
+            (server.completion_tokens - tokens_start) / lessons)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lessons', type=int, default=5)
+    parser.add_argument('--difficulty', default='intermediate')
+    parser.add_argument('--latency', default='fixed:300', help='time to first token')
+    parser.add_argument('--token-latency', type=float, default=1.0, help='milliseconds per completion token')
+    parser.add_argument('--max-parallel', type=int, default=SECTIONED_LESSON_CONFIG['MAX_PARALLEL'])
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency, token_latency=args.token_latency, fill_completion=True, seed=5) as server:
+        app = make_app(OPENAI_BASE_URL=f"{server.url}/v1")
+        with app.app_context(), patch.dict(LESSON_CACHE_CONFIG, {'ENABLED': False}), \
+                patch.dict(SECTIONED_LESSON_CONFIG, {'MAX_PARALLEL': args.max_parallel}):
+            results = {
+                'single call': run(server, args.lessons, args.difficulty, sectioned=False),
+                'sectioned': run(server, args.lessons, args.difficulty, sectioned=True),
+            }
+
+    print(f"{args.lessons} {args.difficulty} lessons, latency {args.latency} + {args.token_latency} ms/token, "
+          f"{args.max_parallel} sections in parallel")
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'first ms':>9} {'calls':>6} {'out tok':>8}")
+    for mode, (totals, firsts, calls, tokens) in results.items():
+        print(f"{mode:<12} {percentile(totals, 0.50):>8.0f} {percentile(totals, 0.95):>8.0f} "
+              f"{percentile(firsts, 0.50):>9.0f} {calls:>6.1f} {tokens:>8.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Accuracy and throughput of subject classification against the legacy keyword scan.
+
+The labeled topics are split per label into a training and a held-out set.
+The linear model is trained on the training set only. Every classifier is
+then scored on the held-out topics.
+
+Usage: python -m benchmarks.bench_subject_classifier [--labeled benchmarks/data/labeled_topics.tsv]
+           [--holdout 0.3] [--seed 0]
+"""
+import argparse
+import os
+import random
+import time
+from collections import defaultdict
+from scripts.train_subject_model import load_labeled_topics, train
+from src.core.services.ai.subject_classifier import CompositeClassifier, LinearClassifier, build_classifier
+
+DEFAULT_LABELED = os.path.join(os.path.dirname(__file__), 'data', 'labeled_topics.tsv')
+
+def legacy_subject_type(topic):
+    """The substring scan get_subject_type used before the classifier module."""
+    topic = topic.lower()
+    if any(word in topic for word in ['math', 'algebra', 'calculus', 'geometry']):
+        return 'math'
+    elif any(word in topic for word in ['physics', 'chemistry', 'biology']):
+        return 'science'
+    elif any(word in topic for word in ['history', 'geography', 'economics']):
+        return 'social_studies'
+    elif any(word in topic for word in ['python', 'java', 'programming', 'code']):
+        return 'programming'
+    else:
+        return 'general'
+
+def split_examples(examples, holdout, seed):
+    """Split (topic, label) pairs into training and held-out sets, stratified by label."""
+    by_label = defaultdict(list)
+    for example in examples:
+        by_label[example[1]].append(example)
+    rng = random.Random(seed)
+    training, held_out = [], []
+    for label in sorted(by_label):
+        group = by_label[label]
+        rng.shuffle(group)
+        cut = max(1, round(len(group) * holdout))
+        held_out.extend(group[:cut])
+        training.extend(group[cut:])
+    return training, held_out
+
+def measure(name, classify_many, examples, rounds):
+    """Print accuracy and topics/second for a batch classifier."""
+    topics = [topic for topic, _ in examples]
+    predictions = classify_many(topics)
+    correct = sum(pred == label for pred, (_, label) in zip(predictions, examples))
+    misses = [(topic, label, pred) for pred, (topic, label) in zip(predictions, examples) if pred != label]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        classify_many(topics)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<12} accuracy {correct / len(examples):.1%}  "
+          f"throughput {rounds * len(topics) / elapsed:,.0f} topics/s")
+    for topic, label, pred in misses[:5]:
+        print(f"    miss: {topic!r} expected {label}, got {pred}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--labeled', default=DEFAULT_LABELED)
+    parser.add_argument('--holdout', type=float, default=0.3, help='fraction of each label held out')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    training, held_out = split_examples(load_labeled_topics(args.labeled), args.holdout, args.seed)
+    print(f"training on {len(training)} topics, scoring on {len(held_out)} held-out topics")
+    taxonomy = build_classifier({'MODEL_PATH': None})
+    with_model = CompositeClassifier(taxonomy.keywords, LinearClassifier(train(training)), taxonomy.min_confidence)
+
+    measure('legacy', lambda topics: [legacy_subject_type(t) for t in topics], held_out, args.rounds)
+    measure('taxonomy', taxonomy.classify_many, held_out, args.rounds)
+    measure('+model', with_model.classify_many, held_out, args.rounds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Throughput of local token counting on the prompts the app sends.
+
+Times count_message_tokens and the full pre-call budget check (count, fit
+max_tokens to the context window) on lesson, quiz and feedback prompts, plus
+a long lesson text. Reports which backend ran (tiktoken or the regex
+approximation) so the numbers can be compared between the two.
+
+Usage: python -m benchmarks.bench_tokenizer [--iterations 2000]
+"""
+import argparse
+import os
+import time
+from src.core.services.ai import token_budget
+from src.core.services.ai.generation import get_lesson_prompt, get_quiz_prompt
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+
+def timed(func, iterations):
+    """Microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2_000)
+    parser.add_argument('--model', default='gpt-3.5-turbo')
+    args = parser.parse_args()
+
+    with open(SAMPLE_LESSON, encoding='utf-8') as f:
+        lesson = f.read()
+    prompts = {
+        'lesson prompt': get_lesson_prompt('Quadratic equations', 'intermediate', 'math'),
+        'quiz prompt': get_quiz_prompt('Photosynthesis', 'beginner', 'science', 5),
+        'feedback prompt': [
+            {"role": "system", "content": "You are an encouraging tutor providing constructive feedback."},
+            {"role": "user", "content": "Compare this answer: 'It makes food' with the correct answer: "
+                                        "'It converts light into chemical energy'. Provide constructive feedback."},
+        ],
+        'sample lesson': [{"role": "assistant", "content": lesson}],
+    }
+
+    backend = 'tiktoken' if token_budget._encoding(args.model) is not None else 'regex approximation'
+    print(f"backend: {backend}, model {args.model}")
+    print(f"{'prompt':<16} {'chars':>7} {'tokens':>7} {'us/count':>9} {'us/budget':>10} {'Mtok/s':>7}")
+    for name, messages in prompts.items():
+        chars = sum(len(message['content']) for message in messages)
+        tokens = token_budget.count_message_tokens(messages, args.model)
+        count_us = timed(lambda: token_budget.count_message_tokens(messages, args.model), args.iterations)
+        budget_us = timed(lambda: token_budget.budget_call(messages, args.model, 2000), args.iterations)
+        print(f"{name:<16} {chars:>7} {tokens:>7} {count_us:>9.1f} {budget_us:>10.1f} {tokens / count_us:>7.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark topic index lookups at scale.
+
+Usage: python -m benchmarks.bench_topic_index [--topics 200000] [--queries 5000]
+"""
+import argparse
+import random
+import statistics
+import time
+from src.core.services.ai.topic_index import TopicIndex
+
+SUBJECTS = [
+    'python', 'java', 'rust', 'algebra', 'calculus', 'geometry', 'physics', 'chemistry',
+    'biology', 'history', 'economics', 'statistics', 'probability', 'genetics', 'optics',
+    'thermodynamics', 'poetry', 'grammar', 'accounting', 'marketing', 'astronomy',
+]
+QUALIFIERS = [
+    'linear', 'organic', 'quantum', 'modern', 'ancient', 'applied', 'discrete', 'cellular',
+    'functional', 'object', 'oriented', 'advanced', 'european', 'american', 'financial',
+    'molecular', 'classical', 'numerical', 'differential', 'integral', 'recursive', 'async',
+]
+TEMPLATES = ['{q} {s}', 'intro to {q} {s}', '{s} {q} basics', 'introduction to {q} {s} concepts',
+             '{q} {q2} {s}', '{s} for {q} beginners']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+def make_topic(rng):
+    """Build a random lesson topic."""
+    return rng.choice(TEMPLATES).format(
+        q=rng.choice(QUALIFIERS), q2=f"{rng.choice(QUALIFIERS)}{rng.randint(0, 999)}",
+        s=rng.choice(SUBJECTS)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--topics', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=5_000)
+    parser.add_argument('--threshold', type=float, default=0.85)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = TopicIndex()
+    start = time.perf_counter()
+    for doc_id in range(args.topics):
+        index.add(doc_id, make_topic(rng), rng.choice(DIFFICULTIES))
+    build_seconds = time.perf_counter() - start
+
+    timings = []
+    hits = 0
+    for _ in range(args.queries):
+        topic = make_topic(rng)
+        difficulty = rng.choice(DIFFICULTIES)
+        start = time.perf_counter()
+        match = index.lookup(topic, difficulty, threshold=args.threshold)
+        timings.append((time.perf_counter() - start) * 1e6)
+        hits += match is not None
+
+    timings.sort()
+    print(f"indexed {len(index)} topics in {build_seconds:.2f}s")
+    print(f"lookups: {args.queries}, hit rate {hits / args.queries:.1%}")
+    print(f"latency us: mean {statistics.mean(timings):.1f} "
+          f"p50 {timings[len(timings) // 2]:.1f} "
+          f"p95 {timings[int(len(timings) * 0.95)]:.1f} "
+          f"p99 {timings[int(len(timings) * 0.99)]:.1f}")
+
+if __name__ == '__main__':
+    main()
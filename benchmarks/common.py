@@ -0,0 +1,31 @@
+"""Shared helpers for benchmarks that exercise the Flask app."""
+import os
+import tempfile
+
+# src.app builds an app at import time and requires these
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark')
+
+def make_app(db_path=None, **config):
+    """Create an app backed by a throwaway SQLite file."""
+    from src.app import create_app
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='gnosis-bench-'), 'bench.db')
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', 'TESTING': True, **config})
+
+def auth_headers(client, username='benchuser', password='benchpass123'):
+    """Register (or log in) a benchmark user and return auth headers."""
+    response = client.post('/api/auth/register', json={
+        'username': username, 'email': f'{username}@example.com', 'password': password
+    })
+    if response.status_code != 201:
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
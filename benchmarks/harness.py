@@ -0,0 +1,139 @@
+"""Minimal microbenchmark harness with JSON results and regression comparison.
+
+Register cases with `@case(name)`; each returns the zero-argument callable to
+time, so setup runs outside the measurement. `run_cases` calibrates iterations
+per round and reports the median time per call.
+
+Usage: python -m benchmarks.harness compare BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+def case(name: str):
+    """Register a benchmark case factory."""
+    def register(factory):
+        if name in CASES:
+            raise ValueError(f"Duplicate benchmark case: {name}")
+        CASES[name] = factory
+        return factory
+    return register
+
+def measure(func: Callable[[], object], rounds: int = 7, min_round_seconds: float = 0.05) -> Dict:
+    """Time `func`, calibrating the loop count so each round lasts at least `min_round_seconds`."""
+    func()  # warm caches and lazy imports
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_seconds or iterations >= 1 << 24:
+            break
+        iterations *= 2 if elapsed < min_round_seconds / 4 else 1 + int(min_round_seconds / max(elapsed, 1e-9))
+
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call.append((time.perf_counter() - start) / iterations * 1e9)
+    return {
+        'median_ns': statistics.median(per_call),
+        'min_ns': min(per_call),
+        'stdev_ns': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        'rounds': rounds,
+        'iterations': iterations,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_cases(names: Optional[List[str]] = None, rounds: int = 7, min_round_seconds: float = 0.05) -> Dict:
+    """Run registered cases (all, or those whose name contains any filter)."""
+    results = {}
+    for name, factory in CASES.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        results[name] = measure(factory(), rounds, min_round_seconds)
+        print(f"{name:<40} {format_ns(results[name]['median_ns']):>12} "
+              f"(± {format_ns(results[name]['stdev_ns'])}, {results[name]['iterations']} iter x {rounds})")
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+def format_ns(value: float) -> str:
+    """Human-readable duration."""
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value:.0f} ns"
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10) -> List[Dict]:
+    """Per-case change in median time; `regression` is set beyond `threshold` (a fraction)."""
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        change = result['median_ns'] / base['median_ns'] - 1.0
+        rows.append({
+            'name': name,
+            'baseline_ns': base['median_ns'],
+            'current_ns': result['median_ns'],
+            'change': change,
+            'regression': change > threshold,
+        })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compare_parser = subparsers.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown, e.g. 0.10 = 10%%')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"baseline {baseline['meta'].get('commit')} vs current {current['meta'].get('commit')}, "
+          f"threshold {args.threshold:.0%}")
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ('faster' if row['change'] < -args.threshold else '')
+        print(f"{row['name']:<40} {format_ns(row['baseline_ns']):>12} -> {format_ns(row['current_ns']):>12} "
+              f"{row['change']:+8.1%} {flag}")
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"not in current run: {', '.join(missing)}")
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""End-to-end load test against the offline mock OpenAI and YouTube servers.
+
+Starts both mock servers and the app on a threaded local HTTP server, then
+runs concurrent virtual users through register/login, lesson, quiz, history
+and video flows. Reports throughput and p50/p95/p99 latency per endpoint.
+
+Usage: python -m benchmarks.loadtest [--users 8] [--iterations 5]
+           [--latency lognormal:800:0.5] [--error-rate 0.0] [--json results.json]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import requests
+from werkzeug.serving import make_server
+from benchmarks.common import make_app, percentile
+from benchmarks.mock_servers import FakeOpenAIServer, FakeYouTubeServer
+
+TOPICS = [
+    'Quadratic equations', 'Photosynthesis', 'Python decorators', 'The French Revolution',
+    'Supply and demand', 'Newton laws of motion', 'Cell division', 'Binary search',
+    'Linear algebra basics', 'Poetry meter', 'Organic chemistry', 'SQL joins',
+]
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and status collection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def call(self, session: requests.Session, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=120, **kwargs)
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            response, failed = None, True
+        elapsed = (time.perf_counter() - start) * 1e3
+        with self._lock:
+            self.samples[label].append(elapsed)
+            self.errors[label] += failed
+        return response if not failed else None
+
+    def report(self, wall_seconds: float) -> Dict[str, Dict]:
+        results = {}
+        for label, values in sorted(self.samples.items()):
+            values = sorted(values)
+            results[label] = {
+                'requests': len(values),
+                'errors': self.errors[label],
+                'throughput': len(values) / wall_seconds,
+                'p50_ms': percentile(values, 0.50),
+                'p95_ms': percentile(values, 0.95),
+                'p99_ms': percentile(values, 0.99),
+                'max_ms': values[-1],
+            }
+        return results
+
+
+def virtual_user(base_url: str, recorder: Recorder, iterations: int, seed: int) -> None:
+    """Run one user through the main flows."""
+    rng = random.Random(seed)
+    session = requests.Session()
+    username = f"load_{uuid.uuid4().hex[:12]}"
+    password = 'loadtest-pass-123'
+    recorder.call(session, 'register', 'POST', f"{base_url}/api/auth/register", json={
+        'username': username, 'email': f"{username}@example.com", 'password': password
+    })
+    response = recorder.call(session, 'login', 'POST', f"{base_url}/api/auth/login", json={
+        'username': username, 'password': password
+    })
+    if response is None:
+        return
+    session.headers['Authorization'] = f"Bearer {response.json()['token']}"
+
+    for _ in range(iterations):
+        topic = rng.choice(TOPICS)
+        difficulty = rng.choice(DIFFICULTIES)
+        payload = {'topic': topic, 'difficulty': difficulty}
+        lesson = recorder.call(session, 'generate-lesson', 'POST', f"{base_url}/api/ai/generate-lesson", json=payload)
+        recorder.call(session, 'generate-quiz', 'POST', f"{base_url}/api/ai/generate-quiz", json=payload)
+        recorder.call(session, 'search-history', 'GET', f"{base_url}/api/ai/search-history")
+        history_id = lesson.json().get('history_id') if lesson is not None else None
+        if history_id:
+            recorder.call(session, 'search-history-item', 'GET', f"{base_url}/api/ai/search-history/{history_id}")
+        recorder.call(session, 'learning-history', 'GET', f"{base_url}/api/learning/history")
+        recorder.call(session, 'search-video', 'POST', f"{base_url}/api/ai/search-video", json=payload)
+
+
+def run(users: int, iterations: int, latency: str, youtube_latency: str, error_rate: float,
+        seed: int = 7) -> Tuple[Dict[str, Dict], Dict]:
+    """Run the load test and return (per-endpoint results, mock server stats)."""
+    with FakeOpenAIServer(latency=latency, error_rate=error_rate, seed=seed) as openai_server, \
+            FakeYouTubeServer(latency=youtube_latency, seed=seed) as youtube_server:
+        app = make_app(
+            OPENAI_BASE_URL=f"{openai_server.url}/v1",
+            YOUTUBE_API_ENDPOINT=f"{youtube_server.url}/",
+        )
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        recorder = Recorder()
+        workers = [
+            threading.Thread(target=virtual_user, args=(base_url, recorder, iterations, seed + i))
+            for i in range(users)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall_seconds = time.perf_counter() - start
+        server.shutdown()
+
+        stats = {
+            'wall_seconds': wall_seconds,
+            'llm_requests': openai_server.requests,
+            'llm_errors': openai_server.errors,
+            'prompt_tokens': openai_server.prompt_tokens,
+            'completion_tokens': openai_server.completion_tokens,
+            'youtube_requests': youtube_server.requests,
+        }
+        return recorder.report(wall_seconds), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', default='lognormal:800:0.5', help='mock LLM latency distribution')
+    parser.add_argument('--youtube-latency', default='uniform:50:150')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args()
+
+    results, stats = run(args.users, args.iterations, args.latency, args.youtube_latency, args.error_rate)
+
+    print(f"{args.users} users x {args.iterations} iterations in {stats['wall_seconds']:.1f}s "
+          f"(LLM latency {args.latency}, error rate {args.error_rate:.1%})")
+    print(f"{'endpoint':<20} {'reqs':>5} {'errs':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, row in results.items():
+        print(f"{label:<20} {row['requests']:>5} {row['errors']:>5} {row['throughput']:>7.2f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    print(f"mock LLM: {stats['llm_requests']} requests ({stats['llm_errors']} injected errors), "
+          f"{stats['prompt_tokens']} prompt / {stats['completion_tokens']} completion tokens; "
+          f"mock YouTube: {stats['youtube_requests']} requests")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'stats': stats, 'endpoints': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
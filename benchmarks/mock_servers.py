@@ -0,0 +1,342 @@
+"""Offline stand-ins for the OpenAI chat completions and YouTube search APIs.
+
+Point the app at them with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and
+YOUTUBE_API_ENDPOINT=http://127.0.0.1:<port>/.
+
+Usage: python -m benchmarks.mock_servers [--openai-port 8801] [--youtube-port 8802]
+           [--latency lognormal:800:0.5] [--error-rate 0.01] [--stream-chunks 20]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+SAMPLE_LESSON = os.path.join(os.path.dirname(__file__), 'data', 'sample_lesson.md')
+QUESTION_COUNT_RE = re.compile(r'Include (\d+) multiple choice')
+
+
+class LatencyModel:
+    """Response latency drawn from a distribution, in milliseconds.
+
+    Specs: "fixed:<ms>", "uniform:<low>:<high>" or "lognormal:<median>:<sigma>".
+    """
+
+    def __init__(self, spec: str = 'fixed:0', seed: Optional[int] = None):
+        kind, *params = spec.split(':')
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == 'fixed':
+                return self.params[0] if self.params else 0.0
+            if self.kind == 'uniform':
+                return self._rng.uniform(self.params[0], self.params[1])
+            median, sigma = self.params
+            return median * self._rng.lognormvariate(0.0, sigma)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+def make_quiz(topic: str, count: int, rng: random.Random) -> Dict:
+    """Quiz JSON in the shape generate_quiz expects."""
+    questions = []
+    for _ in range(count):
+        n = rng.randint(2, 99)
+        questions.append({
+            'question': f"[{uuid.uuid4().hex[:8]}] About {topic}: what is {n} + {n}?",
+            'options': [str(2 * n), str(2 * n + 1), str(n), str(n * n)],
+            'correct_answer': str(2 * n),
+            'explanation': f"Adding {n} to itself doubles it, giving {2 * n}.",
+        })
+    return {'questions': questions}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address):
+        # Clients abandoning a request (e.g. a lost hedge) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockServer:
+    """Run a handler class on a background ThreadingHTTPServer."""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = _Server((host, port), self.handler_class)
+        self.httpd.mock = self
+        self.thread: Optional[threading.Thread] = None
+        self.requests = 0
+        self.errors = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, error: bool = False) -> None:
+        with self._counter_lock:
+            self.requests += 1
+            self.errors += error
+
+    def start(self) -> 'MockServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # keep load-test output readable
+
+    def send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+
+class _OpenAIHandler(_JSONHandler):
+    def do_POST(self):
+        mock: FakeOpenAIServer = self.server.mock
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+        request = self.read_json()
+        model = request.get('model', 'gpt-3.5-turbo')
+        time.sleep(mock.latency_for(model).sample() / 1000.0)
+
+        error = mock.pick_error()
+        if error:
+            mock.count(error=True)
+            status, error_type = error
+            headers = {'Retry-After': '1'} if status == 429 else None
+            self.send_json(status, {'error': {'message': f"Injected {error_type}", 'type': error_type}}, headers)
+            return
+
+        content = mock.completion_for(request)
+        if request.get('max_tokens') and not request.get('response_format'):
+            content = content[:request['max_tokens'] * 4]  # the completion stops at the token limit
+        prompt_tokens = sum(estimate_tokens(m.get('content') or '') for m in request.get('messages', []))
+        completion_tokens = estimate_tokens(content)
+        if mock.token_latency:
+            # Decoding time grows with the length of the completion
+            time.sleep(completion_tokens * mock.token_latency / 1000.0)
+        mock.record_usage(prompt_tokens, completion_tokens)
+        mock.count()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+        if request.get('stream'):
+            self.stream(completion_id, model, content, mock)
+            return
+        self.send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+    def stream(self, completion_id: str, model: str, content: str, mock: 'FakeOpenAIServer') -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        chunk_size = max(1, len(content) // mock.stream_chunks)
+        for start in range(0, len(content), chunk_size):
+            delta = {'content': content[start:start + chunk_size]}
+            if start == 0:
+                delta['role'] = 'assistant'
+            self.write_event(completion_id, model, delta, None)
+            time.sleep(mock.stream_chunk_delay / 1000.0)
+        self.write_event(completion_id, model, {}, 'stop')
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def write_event(self, completion_id, model, delta, finish_reason) -> None:
+        chunk = {
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(MockServer):
+    """Chat completions with configurable latency, streaming, usage and error injection.
+
+    JSON-mode requests get a quiz with the number of questions the prompt asks
+    for; everything else gets the sample lesson, cut at the request's
+    max_tokens (with `fill_completion`, repeated until it reaches max_tokens).
+    `model_latency` maps model names to their own latency specs and
+    `token_latency` adds milliseconds per completion token.
+    """
+
+    handler_class = _OpenAIHandler
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: str = 'fixed:0',
+                 error_rate: float = 0.0, rate_limit_share: float = 0.5,
+                 stream_chunks: int = 20, stream_chunk_delay: float = 0.0, seed: Optional[int] = None,
+                 model_latency: Optional[Dict[str, str]] = None, token_latency: float = 0.0,
+                 fill_completion: bool = False):
+        super().__init__(host, port)
+        self.token_latency = token_latency
+        self.fill_completion = fill_completion
+        self.latency = LatencyModel(latency, seed)
+        self.model_latency = {model: LatencyModel(spec, seed) for model, spec in (model_latency or {}).items()}
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share
+        self.stream_chunks = stream_chunks
+        self.stream_chunk_delay = stream_chunk_delay
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._rng = random.Random(seed)
+        with open(SAMPLE_LESSON, encoding='utf-8') as f:
+            self.lesson = f.read()
+
+    def latency_for(self, model: str) -> LatencyModel:
+        return self.model_latency.get(model, self.latency)
+
+    def pick_error(self):
+        with self._counter_lock:
+            if self._rng.random() >= self.error_rate:
+                return None
+            if self._rng.random() < self.rate_limit_share:
+                return 429, 'rate_limit_exceeded'
+            return 500, 'server_error'
+
+    def completion_for(self, request: Dict) -> str:
+        messages = request.get('messages', [])
+        wants_json = (request.get('response_format') or {}).get('type') == 'json_object'
+        if not wants_json:
+            if self.fill_completion and request.get('max_tokens'):
+                return (self.lesson + '\n\n') * (request['max_tokens'] * 4 // len(self.lesson) + 1)
+            return self.lesson
+        text = ' '.join(m.get('content') or '' for m in messages)
+        match = QUESTION_COUNT_RE.search(text)
+        with self._counter_lock:
+            quiz = make_quiz('the topic', int(match.group(1)) if match else 5, self._rng)
+        return json.dumps(quiz)
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._counter_lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+
+class _YouTubeHandler(_JSONHandler):
+    def do_GET(self):
+        mock: FakeYouTubeServer = self.server.mock
+        if not self.path.startswith('/youtube/v3/search'):
+            self.send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+            return
+        time.sleep(mock.latency.sample() / 1000.0)
+        mock.count()
+        video_id = uuid.uuid4().hex[:11]
+        self.send_json(200, {'items': [{
+            'id': {'videoId': video_id},
+            'snippet': {
+                'title': f"Tutorial {video_id}",
+                'description': 'A clear, beginner-friendly walkthrough of the topic.',
+            },
+        }]})
+
+
+class FakeYouTubeServer(MockServer):
+    """YouTube Data API search with configurable latency."""
+
+    handler_class = _YouTubeHandler
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: str = 'fixed:0',
+                 seed: Optional[int] = None):
+        super().__init__(host, port)
+        self.latency = LatencyModel(latency, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--openai-port', type=int, default=8801)
+    parser.add_argument('--youtube-port', type=int, default=8802)
+    parser.add_argument('--latency', default='lognormal:800:0.5', help='OpenAI latency distribution')
+    parser.add_argument('--youtube-latency', default='uniform:50:150')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--stream-chunks', type=int, default=20)
+    parser.add_argument('--stream-chunk-delay', type=float, default=20.0, help='milliseconds')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='milliseconds per completion token')
+    parser.add_argument('--fill-completion', action='store_true', help='lessons run to max_tokens')
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(
+        args.host, args.openai_port, latency=args.latency, error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks, stream_chunk_delay=args.stream_chunk_delay,
+        token_latency=args.token_latency, fill_completion=args.fill_completion
+    ).start()
+    youtube_server = FakeYouTubeServer(args.host, args.youtube_port, latency=args.youtube_latency).start()
+    print(f"OPENAI_BASE_URL={openai_server.url}/v1")
+    print(f"YOUTUBE_API_ENDPOINT={youtube_server.url}/")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        openai_server.stop()
+        youtube_server.stop()
+
+if __name__ == '__main__':
+    main()
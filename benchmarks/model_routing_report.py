@@ -0,0 +1,139 @@
+"""Latency and cost comparison of model routing configurations over the mock OpenAI server.
+
+Runs the same workload (lessons per difficulty, a quiz, answer feedback and a
+health check) through get_openai_response twice: once with every route on
+the OPENAI_CONFIG defaults, once with the configured routing (optionally
+from a routes file). Per-model latency comes from --model-latency; token
+usage is what the mock server counted; cost uses the price table.
+
+Usage: python -m benchmarks.model_routing_report [--calls 5] [--routes-file routes.json]
+           [--model-latency gpt-4o=lognormal:1500:0.4 ...] [--prices prices.json] [--output report.md]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+from benchmarks.common import make_app, percentile
+from benchmarks.mock_servers import FakeOpenAIServer
+
+# USD per 1K tokens (input, output); override with --prices
+DEFAULT_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4': (0.03, 0.06),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4o-mini': (0.00015, 0.0006),
+}
+
+def workload():
+    """(label, route, difficulty, messages) for each kind of call the app makes."""
+    from src.core.services.ai.generation import get_lesson_prompt, get_quiz_prompt
+    from src.core.services.ai.model_router import FEEDBACK, HEALTH_CHECK, LESSON, QUIZ
+
+    items = [
+        (f"lesson:{difficulty}", LESSON, difficulty, get_lesson_prompt('Quadratic equations', difficulty, 'math'))
+        for difficulty in ('beginner', 'intermediate', 'advanced')
+    ]
+    items.append(('quiz', QUIZ, 'intermediate', get_quiz_prompt('Photosynthesis', 'intermediate', 'science', 5)))
+    items.append(('feedback', FEEDBACK, None, [
+        {"role": "system", "content": "You are an encouraging tutor providing constructive feedback."},
+        {"role": "user", "content": "Compare this answer: 'It makes food' with the correct answer: "
+                                    "'It converts light into chemical energy'. Provide constructive feedback."},
+    ]))
+    items.append(('health_check', HEALTH_CHECK, None, [{"role": "user", "content": "Hello!"}]))
+    return items
+
+def cost(model: str, prompt_tokens: float, completion_tokens: float, prices: Dict) -> Optional[float]:
+    if model not in prices:
+        return None
+    input_price, output_price = prices[model]
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+def run_scenario(router, server: FakeOpenAIServer, calls: int, prices: Dict) -> List[Dict]:
+    """Run the workload under one router and summarize each call kind."""
+    from src.core.services.ai.model_router import set_router
+    from src.core.utils.openai_client import get_openai_response
+
+    set_router(router)
+    rows = []
+    try:
+        for label, route, difficulty, messages in workload():
+            params = router.resolve(route, difficulty)
+            latencies = []
+            prompt_start, completion_start = server.prompt_tokens, server.completion_tokens
+            for _ in range(calls):
+                start = time.perf_counter()
+                get_openai_response(messages, route=route, difficulty=difficulty)
+                latencies.append((time.perf_counter() - start) * 1e3)
+            latencies.sort()
+            prompt_tokens = (server.prompt_tokens - prompt_start) / calls
+            completion_tokens = (server.completion_tokens - completion_start) / calls
+            rows.append({
+                'call': label,
+                'model': params['model'],
+                'max_tokens': params['max_tokens'],
+                'p50_ms': percentile(latencies, 0.50),
+                'p95_ms': percentile(latencies, 0.95),
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cost_per_call': cost(params['model'], prompt_tokens, completion_tokens, prices),
+            })
+    finally:
+        set_router(None)
+    return rows
+
+def format_report(results: Dict[str, List[Dict]]) -> str:
+    lines = []
+    for scenario, rows in results.items():
+        lines.append(f"### {scenario}\n")
+        lines.append("| call | model | max tokens | p50 ms | p95 ms | prompt tok | completion tok | $/call |")
+        lines.append("|---|---|---:|---:|---:|---:|---:|---:|")
+        for row in rows:
+            price = f"{row['cost_per_call']:.5f}" if row['cost_per_call'] is not None else 'n/a'
+            lines.append(f"| {row['call']} | {row['model']} | {row['max_tokens']} | {row['p50_ms']:.1f} | "
+                         f"{row['p95_ms']:.1f} | {row['prompt_tokens']:.0f} | {row['completion_tokens']:.0f} | {price} |")
+        known = [row['cost_per_call'] for row in rows if row['cost_per_call'] is not None]
+        lines.append(f"\nTotal for one of each call: {sum(row['p50_ms'] for row in rows):.1f} ms at p50, "
+                     f"${sum(known):.5f}\n")
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=5, help='calls per workload item')
+    parser.add_argument('--latency', default='lognormal:300:0.3', help='latency for models without their own')
+    parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=SPEC')
+    parser.add_argument('--routes-file', help='JSON routes file for the routed scenario')
+    parser.add_argument('--prices', help='JSON {"model": [input_per_1k, output_per_1k]}')
+    parser.add_argument('--output', help='also write the markdown report here')
+    parser.add_argument('--json', help='also write raw results here')
+    args = parser.parse_args()
+
+    prices = dict(DEFAULT_PRICES)
+    if args.prices:
+        with open(args.prices, encoding='utf-8') as f:
+            prices.update({model: tuple(pair) for model, pair in json.load(f).items()})
+    model_latency = dict(item.split('=', 1) for item in args.model_latency)
+
+    from src.config.settings import MODEL_ROUTING_CONFIG
+    from src.core.services.ai.model_router import ModelRouter
+
+    with FakeOpenAIServer(latency=args.latency, model_latency=model_latency, seed=7) as server:
+        app = make_app(OPENAI_BASE_URL=f"{server.url}/v1")
+        baseline_config = {**MODEL_ROUTING_CONFIG, 'ROUTES': {}, 'DIFFICULTY_OVERRIDES': {}, 'ROUTES_FILE': None}
+        routed_config = {**MODEL_ROUTING_CONFIG, 'ROUTES_FILE': args.routes_file or MODEL_ROUTING_CONFIG['ROUTES_FILE']}
+        with app.app_context():
+            results = {
+                'defaults for every call': run_scenario(ModelRouter(baseline_config), server, args.calls, prices),
+                'configured routing': run_scenario(ModelRouter(routed_config), server, args.calls, prices),
+            }
+
+    report = format_report(results)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Rebuild or verify the progress summary tables.
+
+Usage:
+    python scripts/backfill_progress_summaries.py            # rebuild for every user
+    python scripts/backfill_progress_summaries.py --user 42  # rebuild for one user
+    python scripts/backfill_progress_summaries.py --check    # only report discrepancies
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app import app  # noqa: E402
+from src.core.services.progress_service import backfill_summaries, check_consistency  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild or verify progress summaries.')
+    parser.add_argument('--user', type=int, default=None, help='only process this user id')
+    parser.add_argument('--check', action='store_true', help='compare against a full recomputation')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if not args.check:
+            users = backfill_summaries(args.user)
+            print(f"Rebuilt progress summaries for {users} users")
+        problems = check_consistency(args.user)
+        for problem in problems:
+            print(problem)
+        print(f"{len(problems)} discrepancies found")
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
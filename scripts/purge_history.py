@@ -0,0 +1,50 @@
+"""Remove (or archive, then remove) search history older than the retention age.
+
+Run it from cron, or keep it running with --every. Rows are deleted in
+HISTORY_DELETE_BATCH_SIZE batches, so the app keeps writing while it runs.
+
+Usage:
+    python scripts/purge_history.py                     # HISTORY_RETENTION_DAYS / HISTORY_RETENTION_MODE
+    python scripts/purge_history.py --days 365 --archive
+    python scripts/purge_history.py --every 86400       # purge once a day until interrupted
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app import app  # noqa: E402
+from src.config.settings import HISTORY_DELETION_CONFIG  # noqa: E402
+from src.core.services.history_deletion import purge_expired_history  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description='Purge expired search history.')
+    parser.add_argument('--days', type=int, default=HISTORY_DELETION_CONFIG['RETENTION_DAYS'],
+                        help='retention age in days (0 keeps everything)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--archive', dest='archive', action='store_true', default=None,
+                      help='append expired rows to gzip NDJSON archives before deleting them')
+    mode.add_argument('--purge', dest='archive', action='store_false', help='delete without archiving')
+    parser.add_argument('--every', type=float, default=None, metavar='SECONDS',
+                        help=f"repeat on this interval (e.g. {HISTORY_DELETION_CONFIG['PURGE_INTERVAL']:.0f})")
+    args = parser.parse_args()
+    if args.days <= 0:
+        print('Retention is disabled (set HISTORY_RETENTION_DAYS or --days)')
+        return 1
+
+    with app.app_context():
+        while True:
+            result = purge_expired_history(args.days, args.archive)
+            archived = f", archived to {result['archive']}" if result['archive'] else ''
+            print(f"Removed {result['deleted']} history rows created before {result['cutoff']}{archived}")
+            if args.every is None:
+                return 0
+            try:
+                time.sleep(args.every)
+            except KeyboardInterrupt:
+                return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Run background generation workers for jobs queued with {"async": true}.
+
+Usage:
+    python scripts/run_job_workers.py              # JOBS_WORKERS processes
+    python scripts/run_job_workers.py --workers 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import JOBS_CONFIG  # noqa: E402
+
+def worker_main(poll_interval):
+    """Build the app in this process (no shared SQLite handles) and work the queue."""
+    from src.app import create_app
+    from src.core.services.ai.generation_jobs import JobWorker, get_job_queue
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = create_app()
+    with app.app_context():
+        JobWorker(get_job_queue(), poll_interval).run_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background generation workers.')
+    parser.add_argument('--workers', type=int, default=JOBS_CONFIG['WORKERS'])
+    parser.add_argument('--poll-interval', type=float, default=JOBS_CONFIG['POLL_INTERVAL'])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    processes = [
+        multiprocessing.Process(target=worker_main, args=(args.poll_interval,), name=f"job-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} job workers on {JOBS_CONFIG['DB_PATH']}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Unfinished jobs become visible again once their lease expires
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
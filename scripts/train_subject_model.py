@@ -0,0 +1,82 @@
+"""Train the optional linear subject model from a labeled topic file.
+
+Usage:
+    python scripts/train_subject_model.py benchmarks/data/labeled_topics.tsv instance/subject_model.json
+
+The input is a tab-separated file of `topic<TAB>label` lines. Point
+SUBJECT_MODEL_PATH at the output to enable the model as a fallback for
+topics the taxonomy does not match.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.services.ai.subject_classifier import tokenize  # noqa: E402
+
+def load_labeled_topics(path):
+    """Read (topic, label) pairs from a TSV file."""
+    examples = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            topic, label = line.rsplit('\t', 1)
+            examples.append((topic, label))
+    return examples
+
+def train(examples, epochs=30, learning_rate=0.5, l2=1e-4, seed=0):
+    """Fit a softmax regression over stemmed unigrams with plain SGD."""
+    labels = sorted({label for _, label in examples})
+    label_index = {label: i for i, label in enumerate(labels)}
+    features = [(set(tokenize(topic)), label_index[label]) for topic, label in examples]
+    weights = {}
+    bias = [0.0] * len(labels)
+    rng = random.Random(seed)
+
+    for _ in range(epochs):
+        rng.shuffle(features)
+        for tokens, target in features:
+            logits = list(bias)
+            for token in tokens:
+                row = weights.get(token)
+                if row:
+                    for i, weight in enumerate(row):
+                        logits[i] += weight
+            peak = max(logits)
+            exps = [math.exp(logit - peak) for logit in logits]
+            total = sum(exps)
+            for i in range(len(labels)):
+                gradient = exps[i] / total - (1.0 if i == target else 0.0)
+                bias[i] -= learning_rate * gradient
+                for token in tokens:
+                    row = weights.setdefault(token, [0.0] * len(labels))
+                    row[i] -= learning_rate * (gradient + l2 * row[i])
+
+    return {
+        'labels': labels,
+        'bias': [round(b, 5) for b in bias],
+        'weights': {token: [round(w, 5) for w in row] for token, row in weights.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the linear subject model.')
+    parser.add_argument('labeled_topics')
+    parser.add_argument('output')
+    parser.add_argument('--epochs', type=int, default=30)
+    args = parser.parse_args()
+
+    examples = load_labeled_topics(args.labeled_topics)
+    model = train(examples, epochs=args.epochs)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(model, f)
+    print(f"Trained on {len(examples)} topics, {len(model['weights'])} features -> {args.output}")
+
+if __name__ == '__main__':
+    main()
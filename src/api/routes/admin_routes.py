@@ -0,0 +1,97 @@
+"""Admin routes for inspecting request profiles, the LLM queue, model routing and quiz prefetch."""
+import hmac
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request
+from src.config.settings import PROFILING_CONFIG
+from src.core.services.llm_scheduler import get_scheduler
+from src.core.services.ai.model_router import get_router
+from src.core.services.ai.hedging import get_hedger
+from src.core.services.ai.quiz_prefetch import prefetch_stats
+
+bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+def check_debug_token():
+    """Error response unless the request carries the debug token; 404 when no token is configured."""
+    debug_token = PROFILING_CONFIG['DEBUG_TOKEN']
+    if not debug_token:
+        return jsonify({'error': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Debug-Token', ''), debug_token):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+def debug_token_required(f):
+    """Require the profiling debug token; hide the endpoints when profiling is off."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        store = current_app.extensions.get('profile_store')
+        if store is None:
+            return jsonify({'error': 'Not found'}), 404
+        error = check_debug_token()
+        if error:
+            return error
+        return f(store, *args, **kwargs)
+    return decorated
+
+@bp.route('/profiles', methods=['GET'])
+@debug_token_required
+def list_profiles(store):
+    """List the most recent request profiles."""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify(store.list(limit)), 200
+
+@bp.route('/profiles/<profile_id>', methods=['GET'])
+@debug_token_required
+def get_profile(store, profile_id):
+    """Get one profile including stack samples and individual queries."""
+    profile = store.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile), 200
+
+@bp.route('/llm-queue', methods=['GET'])
+def llm_queue():
+    """LLM scheduler depth and queue-wait metrics for this process (for autoscaling)."""
+    error = check_debug_token()
+    if error:
+        return error
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **scheduler.snapshot()}), 200
+
+@bp.route('/llm-hedging', methods=['GET'])
+def llm_hedging():
+    """Hedged request counts, win rate and current hedge delays for this process."""
+    error = check_debug_token()
+    if error:
+        return error
+    hedger = get_hedger()
+    if hedger is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **hedger.snapshot()}), 200
+
+@bp.route('/quiz-prefetch', methods=['GET'])
+def quiz_prefetch_stats():
+    """Speculative quiz prefetch outcomes, hit rate and throttling state."""
+    error = check_debug_token()
+    if error:
+        return error
+    return jsonify(prefetch_stats()), 200
+
+@bp.route('/model-routes', methods=['GET'])
+def model_routes():
+    """Effective model and generation parameters per route."""
+    error = check_debug_token()
+    if error:
+        return error
+    return jsonify(get_router().table()), 200
+
+@bp.route('/model-routes/reload', methods=['POST'])
+def reload_model_routes():
+    """Re-read the model routes file now instead of waiting for the next check."""
+    error = check_debug_token()
+    if error:
+        return error
+    router = get_router()
+    router.reload()
+    return jsonify(router.table()), 200
@@ -1,22 +1,54 @@
 """AI routes for generating lessons and quizzes."""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from src.core.models.search_history import SearchHistory
 from src.core.models.database import db
 from src.core.utils.openai_client import get_openai_response
 from src.api.routes.auth_routes import token_required
+from src.core.services.ai import generation, generation_jobs, model_router, quiz_prefetch
+from src.core.services.ai.generation import GenerationError, format_lesson_content
+from src.core.services.ai.subject_classifier import classify_subject
+from src.core.services.ai.adaptive_difficulty import get_engine
+from src.core.services.ai.answer_grading import (
+    AMBIGUOUS,
+    CORRECT,
+    get_quiz_feedback_prompt,
+    grade_answer,
+    grade_quiz,
+    templated_feedback,
+)
+from src.core.services.progress_service import record_progress
+from src.core.services.job_queue import QUEUED, TERMINAL_STATUSES
+from src.core.services.llm_scheduler import Priority
+from src.core.services.ai.token_budget import TokenBudgetError, count_tokens, truncate_to_tokens
+from src.core.services.lesson_renderer import (
+    RENDERER_VERSION,
+    get_rendered_lesson,
+    render_lesson,
+    save_rendered_lesson,
+)
+from src.core.services.lesson_sections import (
+    ensure_section_index,
+    get_section,
+    get_section_contents,
+    parse_section_range,
+)
+from src.core.models.rendered_lesson import RenderedLesson
+from src.core.services.history_deletion import clear_user_history, delete_user_history
+from src.core.services.history_version import get_history_version, history_etag
+from src.core.utils.http_cache import is_not_modified, not_modified_response, with_validators
+from src.core.utils.json_provider import RawJSON, dumps_bytes, loads
+from src.core.utils.profiling import span
+from src.config.settings import GRADING_CONFIG, HISTORY_DELETION_CONFIG, JOBS_CONFIG, TOKEN_BUDGET_CONFIG
 import os
 import logging
 import requests
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import json
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import re
 import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize rate limiter
@@ -29,6 +61,8 @@ limiter = Limiter(
 bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
 VALID_DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+ADAPTIVE_DIFFICULTY = 'adaptive'
+RENDER_FORMATS = ['html', 'ast', 'markdown']
 MAX_TOPIC_LENGTH = 200
 MAX_ANSWER_LENGTH = 1000
 
@@ -44,109 +78,20 @@ def validate_input(topic=None, difficulty=None, answer=None):
             
     if answer is not None and (not isinstance(answer, str) or len(answer) > MAX_ANSWER_LENGTH):
         errors.append(f"Answer must be a string less than {MAX_ANSWER_LENGTH} characters")
+    elif answer is not None and count_tokens(answer) > TOKEN_BUDGET_CONFIG['MAX_ANSWER_TOKENS']:
+        errors.append(f"Answer must be at most {TOKEN_BUDGET_CONFIG['MAX_ANSWER_TOKENS']} tokens")
             
     return errors
 
 def get_subject_type(topic):
     """Determine the subject type from the topic."""
-    topic = topic.lower()
-    if any(word in topic for word in ['math', 'algebra', 'calculus', 'geometry']):
-        return 'math'
-    elif any(word in topic for word in ['physics', 'chemistry', 'biology']):
-        return 'science'
-    elif any(word in topic for word in ['history', 'geography', 'economics']):
-        return 'social_studies'
-    elif any(word in topic for word in ['python', 'java', 'programming', 'code']):
-        return 'programming'
-    else:
-        return 'general'
-
-def get_lesson_prompt(topic, difficulty, subject_type):
-    """Get the prompt for lesson generation."""
-    return [
-        {"role": "system", "content": f"You are an expert {subject_type} tutor. Create a detailed lesson about {topic} for {difficulty} level students."},
-        {"role": "user", "content": f"Please create a lesson about {topic} that is suitable for {difficulty} level students. Include examples and explanations."}
-    ]
-
-def get_quiz_prompt(topic, difficulty, subject_type):
-    """Get the prompt for quiz generation."""
-    return [
-        {"role": "system", "content": f"You are an expert {subject_type} tutor. Create a quiz about {topic} for {difficulty} level students. Return the response in JSON format with the following structure: {{\"questions\": [{{\"question\": \"...\", \"options\": [\"A\", \"B\", \"C\", \"D\"], \"correct_answer\": \"...\", \"explanation\": \"...\"}}]}}"},
-        {"role": "user", "content": f"Please create a quiz about {topic} that is suitable for {difficulty} level students. Include 5 multiple choice questions with answers. Format your response as a valid JSON object."}
-    ]
-
-def format_latex_content(content):
-    if not content:
-        return content
-
-    try:
-        content = (
-            content
-            .replace('\\\\', '\\')
-            .replace(' $ ', '$')
-            .replace(' $$ ', '$$')
-            .replace('\n$$', '\n\n$$\n\n')
-            .replace('\\frac', '\\\\frac')
-            .replace('\\sqrt', '\\\\sqrt')
-            .replace('\\sum', '\\\\sum')
-            .replace('\\int', '\\\\int')
-        )
-
-        return content
-    except Exception as e:
-        logger.error(f"Error formatting LaTeX content: {str(e)}")
-        return content
-
-def format_lesson_content(content):
-    if not content:
-        return content
-
-    try:
-        content = (
-            content
-            .replace('\\_', '_')
-            .replace('\\*', '*')
-            .replace('\\-', '-')
-            .replace('\\#', '#')
-            .replace('\\[', '[')
-            .replace('\\]', ']')
-            .replace('\\(', '(')
-            .replace('\\)', ')')
-            .replace('\n\n\n', '\n\n')
-            .replace('\n\n#', '\n#')
-            .replace('\n- ', '\n\n- ')
-            .replace('\n  - ', '\n- ')
-            .replace('\n1. ', '\n\n1. ')
-        )
-
-        content = (
-            content
-            .replace('\\\\', '\\')
-            .replace(' $', '$')
-            .replace('$ ', '$')
-            .replace('\n$$', '\n\n$$')
-            .replace('$$\n', '$$\n\n')
-        )
-
-        import re
-        content = re.sub(r'\\(?![a-zA-Z{])', '', content)
-        
-        latex_commands = [
-            'frac', 'sqrt', 'sum', 'int', 'prod', 'lim',
-            'alpha', 'beta', 'gamma', 'delta', 'theta',
-            'pi', 'sigma', 'omega', 'infty', 'cdot',
-            'times', 'div', 'pm', 'mp', 'leq', 'geq',
-            'neq', 'approx', 'equiv', 'rightarrow'
-        ]
-        
-        for cmd in latex_commands:
-            content = re.sub(f'(?<!\\\\){cmd}(?={{|\\s|\\()', f'\\{cmd}', content)
-            content = content.replace(f'\\\\{cmd}', f'\\{cmd}')
+    return classify_subject(topic)
 
-        return content.strip()
-    except Exception as e:
-        logger.error(f"Error formatting lesson content: {str(e)}")
-        return content.strip()
+def resolve_difficulty(user_id, topic, difficulty):
+    """Pick a difficulty for 'adaptive' requests from the learner's skill estimate."""
+    if difficulty == ADAPTIVE_DIFFICULTY and isinstance(topic, str):
+        return get_engine().recommend(user_id, topic)
+    return difficulty
 
 def format_quiz_content(content):
     if not content:
@@ -196,71 +141,85 @@ def format_quiz_content(content):
 
         return content.strip()
     except Exception as e:
-        logger.error(f"Error formatting quiz content: {str(e)}")
+        logger.error("Error formatting quiz content: %s", e)
         return content.strip()
 
+def enqueue_job_response(kind, user_id, topic, difficulty, fresh=False):
+    """Queue a generation job and point the client at its status endpoints."""
+    job_id, deduplicated = generation_jobs.enqueue_generation(kind, user_id, topic, difficulty, fresh)
+    logger.info("Queued %s job %s for user %s (deduplicated: %s)", kind, job_id, user_id, deduplicated)
+    return jsonify({
+        "job_id": job_id,
+        "status": QUEUED,
+        "deduplicated": deduplicated,
+        "difficulty": difficulty,
+        "status_url": f"{bp.url_prefix}/jobs/{job_id}",
+        "events_url": f"{bp.url_prefix}/jobs/{job_id}/events"
+    }), 202
+
+def prefetch_quiz(user_id, lesson, topic, difficulty):
+    """Start generating the quiz for a lesson the user just received, when prefetch is on."""
+    if quiz_prefetch.enabled() and quiz_prefetch.schedule_quiz_prefetch(
+            generation_jobs.get_job_queue(), user_id, lesson['history_id'], topic, difficulty):
+        lesson['quiz_prefetch'] = True
+
+def stream_lesson_response(user_id, topic, difficulty):
+    """NDJSON stream of lesson sections as they finish, ending with the saved lesson."""
+    def events():
+        try:
+            for event in generation.stream_lesson(user_id, topic, difficulty):
+                if event['type'] == 'lesson':
+                    prefetch_quiz(user_id, event, topic, difficulty)
+                yield dumps_bytes(event) + b'\n'
+        except GenerationError as e:
+            yield dumps_bytes({'type': 'error', 'error': str(e), 'status': e.status}) + b'\n'
+        except Exception as e:
+            logger.exception("Error streaming lesson (%s): %s", type(e).__name__, e)
+            yield dumps_bytes({'type': 'error', 'error': str(e), 'status': 500}) + b'\n'
+
+    return Response(stream_with_context(events()), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @bp.route('/generate-lesson', methods=['POST'])
 @token_required
 @limiter.limit("10 per minute")
 def generate_lesson(current_user):
-    """Generate a lesson based on the given topic and difficulty."""
+    """Generate a lesson based on the given topic and difficulty.
+
+    With {"stream": true} the lesson is generated in sections and returned
+    as NDJSON events: the outline, each section as it finishes, then the
+    saved lesson.
+    """
     data = request.get_json()
     
     # Validate input
     if not data or not data.get('topic') or not data.get('difficulty'):
-        logger.error(f"Missing required fields in request data: {data}")
+        logger.warning("Missing required fields in lesson request")
         return jsonify({"error": "Missing required fields"}), 400
         
     topic = data['topic']
-    difficulty = data['difficulty']
+    difficulty = resolve_difficulty(current_user.id, topic, data['difficulty'])
     
     # Validate input parameters
     errors = validate_input(topic=topic, difficulty=difficulty)
     if errors:
-        logger.error(f"Input validation errors: {errors}")
+        logger.warning("Input validation errors: %s", errors)
         return jsonify({"errors": errors}), 400
     
     try:
-        # Get subject type for specialized prompts
-        subject_type = get_subject_type(topic)
-        logger.info(f"Subject type determined: {subject_type}")
-        
-        # Generate lesson content
-        prompt = get_lesson_prompt(topic, difficulty, subject_type)
-        logger.info(f"Generated lesson prompt: {prompt}")
-        
-        lesson_content = get_openai_response(prompt)
-        logger.info(f"Received lesson content (first 200 chars): {lesson_content[:200]}")
-        
-        if not lesson_content:
-            logger.error("Empty lesson content received from OpenAI")
-            return jsonify({"error": "Failed to generate lesson content"}), 500
-            
-        # Save to search history
-        try:
-            history = SearchHistory(
-                user_id=current_user.id,
-                topic=topic,
-                difficulty=difficulty,
-                content_type='lesson',
-                content=lesson_content
-            )
-            db.session.add(history)
-            db.session.commit()
-            logger.info(f"Lesson saved to history with ID: {history.id}")
-        except Exception as db_error:
-            logger.error(f"Database error saving lesson: {str(db_error)}")
-            # Continue even if history save fails
-        
-        return jsonify({
-            "lesson": format_lesson_content(lesson_content),
-            "history_id": history.id if 'history' in locals() else None
-        }), 200
-        
+        if JOBS_CONFIG['ENABLED'] and data.get('async'):
+            return enqueue_job_response('lesson', current_user.id, topic, difficulty)
+        if data.get('stream'):
+            return stream_lesson_response(current_user.id, topic, difficulty)
+        lesson = generation.generate_lesson(current_user.id, topic, difficulty)
+        prefetch_quiz(current_user.id, lesson, topic, difficulty)
+        return jsonify(lesson), 200
+    except GenerationError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        logger.error(f"Error generating lesson: {str(e)}")
-        logger.error(f"Error type: {type(e)}")
-        logger.exception("Full traceback:")
+        logger.exception("Error generating lesson (%s): %s", type(e).__name__, e)
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/generate-quiz', methods=['POST'])
@@ -271,107 +230,116 @@ def generate_quiz(current_user):
     try:
         data = request.get_json()
         if not data:
-            logger.error("No JSON data provided in quiz request")
+            logger.warning("No JSON data provided in quiz request")
             return jsonify({'error': 'No JSON data provided'}), 400
             
         topic = data.get('topic')
         if not topic:
-            logger.error("Missing topic in quiz request")
+            logger.warning("Missing topic in quiz request")
             return jsonify({'error': 'Missing required field: topic'}), 400
             
         difficulty = data.get('difficulty', 'intermediate')
-        history_id = data.get('history_id')
+        difficulty = resolve_difficulty(current_user.id, topic, difficulty)
         
-        logger.info(f"Generating quiz for topic: {topic}, difficulty: {difficulty}")
+        logger.debug("Generating quiz for topic: %s, difficulty: %s", topic, difficulty)
         
         errors = validate_input(topic=topic, difficulty=difficulty)
         if errors:
-            logger.error(f"Quiz input validation errors: {errors}")
+            logger.warning("Quiz input validation errors: %s", errors)
             return jsonify({'errors': errors}), 400
 
-        subject_type = get_subject_type(topic)
-        logger.info(f"Quiz subject type determined: {subject_type}")
-        
-        prompt = get_quiz_prompt(topic, difficulty, subject_type)
-        logger.info(f"Generated quiz prompt: {prompt}")
-        
-        try:
-            quiz_content = get_openai_response(prompt)
-            logger.info(f"Received quiz content (first 200 chars): {quiz_content[:200]}")
-        except Exception as openai_error:
-            logger.error(f"OpenAI API error: {str(openai_error)}")
-            logger.exception("Full OpenAI error traceback:")
-            return jsonify({'error': str(openai_error)}), 500
-
-        try:
-            quiz_json = json.loads(quiz_content)
-            logger.info("Successfully parsed quiz JSON")
-            
-            if 'questions' not in quiz_json:
-                logger.error(f"Invalid quiz format - missing 'questions' key. Content: {quiz_content}")
-                return jsonify({'error': 'Invalid quiz format - missing questions'}), 500
-            
-            if subject_type in ['math', 'science']:
-                for question in quiz_json['questions']:
-                    question['question'] = format_latex_content(question['question'])
-                    question['options'] = [format_latex_content(opt) for opt in question['options']]
-                    question['correct_answer'] = format_latex_content(question['correct_answer'])
-                    if 'explanation' in question:
-                        question['explanation'] = format_latex_content(question['explanation'])
-            
-            # Save to search history
-            try:
-                history = SearchHistory(
-                    user_id=current_user.id,
-                    topic=topic,
-                    difficulty=difficulty,
-                    content_type='quiz',
-                    content=json.dumps(quiz_json)
-                )
-                db.session.add(history)
-                db.session.commit()
-                logger.info(f"Quiz saved to history with ID: {history.id}")
-            except Exception as db_error:
-                logger.error(f"Database error saving quiz: {str(db_error)}")
-                # Continue even if history save fails
-            
-            return jsonify({
-                "questions": quiz_json['questions'],
-                "history_id": history.id if 'history' in locals() else None
-            }), 200
-            
-        except json.JSONDecodeError as json_error:
-            logger.error(f"JSON parsing error: {str(json_error)}")
-            logger.error(f"Invalid JSON content: {quiz_content}")
-            return jsonify({'error': 'Invalid quiz format - failed to parse JSON'}), 500
+        fresh = bool(data.get('fresh'))
+        # A quiz for a lesson the user just read may already have been generated
+        lesson_history_id = data.get('history_id')
+        if isinstance(lesson_history_id, int) and not fresh:
+            prefetched = quiz_prefetch.take_prefetched_quiz(current_user.id, lesson_history_id, topic, difficulty)
+            if prefetched is not None:
+                quiz = generation.assemble_quiz(current_user.id, topic, difficulty, generated=prefetched)
+                return jsonify({**quiz, 'prefetched': True}), 200
+        if JOBS_CONFIG['ENABLED'] and data.get('async'):
+            return enqueue_job_response('quiz', current_user.id, topic, difficulty, fresh)
+        return jsonify(generation.assemble_quiz(current_user.id, topic, difficulty, fresh)), 200
             
+    except GenerationError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
-        logger.error(f"Error generating quiz: {str(e)}")
-        logger.error(f"Error type: {type(e)}")
-        logger.exception("Full traceback:")
+        logger.exception("Error generating quiz (%s): %s", type(e).__name__, e)
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job(current_user, job_id):
+    """Poll a generation job; the result is included once it has succeeded."""
+    job = generation_jobs.get_job_queue().get(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@bp.route('/jobs/<job_id>/events', methods=['GET'])
+@token_required
+def stream_job_events(current_user, job_id):
+    """Server-sent events with the job status until it finishes or the stream times out."""
+    queue = generation_jobs.get_job_queue()
+    job = queue.get(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    user_id = current_user.id
+
+    def events(job):
+        deadline = time.monotonic() + JOBS_CONFIG['SSE_TIMEOUT']
+        last_status = None
+        while True:
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield b'event: status\ndata: ' + dumps_bytes(job) + b'\n\n'
+            else:
+                yield b': keepalive\n\n'
+            if job['status'] in TERMINAL_STATUSES or time.monotonic() >= deadline:
+                return
+            time.sleep(JOBS_CONFIG['POLL_INTERVAL'])
+            job = queue.get(job_id, user_id)
+
+    return Response(stream_with_context(events(job)), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @bp.route('/search-history', methods=['GET'])
 @token_required
 def get_search_history(current_user):
     """Get search history for the current user."""
     try:
-        history = SearchHistory.query.filter_by(user_id=current_user.id).order_by(SearchHistory.created_at.desc()).all()
-        return jsonify([{
+        version, updated_at = get_history_version(current_user.id)
+        etag = history_etag(current_user.id, version, 'list')
+        if is_not_modified(etag, updated_at):
+            return not_modified_response(etag, updated_at)
+        
+        # The listing never needs lesson or quiz bodies
+        history = db.session.query(
+            SearchHistory.id, SearchHistory.topic, SearchHistory.difficulty,
+            SearchHistory.content_type, SearchHistory.created_at
+        ).filter_by(user_id=current_user.id).order_by(SearchHistory.created_at.desc()).all()
+        return with_validators(jsonify([{
             'id': item.id,
             'topic': item.topic,
             'difficulty': item.difficulty,
             'content_type': item.content_type,
             'created_at': item.created_at.isoformat()
-        } for item in history]), 200
+        } for item in history]), etag, updated_at), 200
     except Exception as e:
-        logger.error(f"Error retrieving search history: {str(e)}")
+        logger.error("Error retrieving search history: %s", e)
         return jsonify({'error': 'Failed to retrieve search history'}), 500
 
 @bp.route('/search-history/<int:history_id>', methods=['GET'])
 @token_required
 def get_search_history_item(current_user, history_id):
     try:
+        # Validators are per user, so a match implies this user was already served the item
+        version, updated_at = get_history_version(current_user.id)
+        etag = history_etag(current_user.id, version, f'item-{history_id}')
+        if is_not_modified(etag, updated_at):
+            return not_modified_response(etag, updated_at)
+        
         history_item = SearchHistory.query.get(history_id)
         
         if not history_item:
@@ -380,43 +348,178 @@ def get_search_history_item(current_user, history_id):
         if history_item.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
             
-        return jsonify(history_item.to_dict())
+        return with_validators(jsonify(history_item.to_dict()), etag, updated_at)
         
     except Exception as e:
-        logger.error(f"Error getting history item: {str(e)}")
+        logger.error("Error getting history item: %s", e)
         return jsonify({'error': 'Failed to get history item'}), 500
 
-@bp.route('/search-history/<int:history_id>', methods=['DELETE'])
+@bp.route('/search-history/<int:history_id>/rendered', methods=['GET'])
 @token_required
-def delete_search_history(current_user, history_id):
+def get_rendered_history_item(current_user, history_id):
+    """Serve a stored lesson render (html, ast or markdown) with a strong ETag."""
+    render_format = request.args.get('format', 'html')
+    if render_format not in RENDER_FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(RENDER_FORMATS)}"}), 400
+    
     try:
-        history_item = SearchHistory.query.filter_by(
-            id=history_id,
-            user_id=current_user.id
+        # Only the validator columns are loaded until we know the client copy is stale
+        row = db.session.query(
+            SearchHistory.user_id, SearchHistory.content_type, RenderedLesson.etag, RenderedLesson.version
+        ).outerjoin(RenderedLesson, RenderedLesson.history_id == SearchHistory.id).filter(
+            SearchHistory.id == history_id
         ).first()
         
-        if not history_item:
+        if not row:
+            return jsonify({'error': 'History item not found'}), 404
+        if row.user_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        if row.content_type != 'lesson':
+            return jsonify({'error': 'Only lessons can be rendered'}), 400
+        
+        if row.etag and row.version == RENDERER_VERSION:
+            etag = f"{row.etag}-{render_format}"
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+            rendered_lesson = get_rendered_lesson(history_id)
+        else:
+            # Lessons saved before rendering was enabled are rendered on first view
+            history_item = db.session.get(SearchHistory, history_id)
+            rendered_lesson = save_rendered_lesson(
+                history_id, render_lesson(format_lesson_content(history_item.content or ''))
+            )
+            db.session.commit()
+            etag = f"{rendered_lesson.etag}-{render_format}"
+        
+        content = getattr(rendered_lesson, render_format)
+        response = jsonify({
+            'id': history_id,
+            'format': render_format,
+            'content': RawJSON(content) if render_format == 'ast' else content
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except Exception as e:
+        logger.error("Error getting rendered history item: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to get rendered history item'}), 500
+
+def lesson_access_error(current_user, history_id):
+    """Error response unless the history row is one of the user's lessons."""
+    row = db.session.query(SearchHistory.user_id, SearchHistory.content_type).filter(
+        SearchHistory.id == history_id
+    ).first()
+    if not row:
+        return jsonify({'error': 'History item not found'}), 404
+    if row.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    if row.content_type != 'lesson':
+        return jsonify({'error': 'Only lessons have sections'}), 400
+    return None
+
+@bp.route('/search-history/<int:history_id>/sections', methods=['GET'])
+@token_required
+def get_lesson_sections(current_user, history_id):
+    """Section index of a lesson; `?range=1-3` (inclusive, "2-" to the end) also returns their content."""
+    error = lesson_access_error(current_user, history_id)
+    if error:
+        return error
+    try:
+        index = ensure_section_index(history_id)
+        sections = [section.to_dict() for section in index]
+        section_range = request.args.get('range')
+        if section_range is not None:
+            try:
+                bounds = parse_section_range(section_range, len(index))
+            except ValueError:
+                return jsonify({'error': 'Range must look like 2, 1-3 or 2-'}), 400
+            if bounds is None:
+                return jsonify({'error': f"Lesson has {len(index)} sections"}), 416
+            sections = [{**section.to_dict(), 'content': content}
+                        for section, content in get_section_contents(history_id, *bounds)]
+        return jsonify({
+            'history_id': history_id,
+            'count': len(index),
+            'length': sum(section.length for section in index),
+            'sections': sections
+        }), 200
+    except Exception as e:
+        logger.error("Error getting lesson sections: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to get lesson sections'}), 500
+
+@bp.route('/search-history/<int:history_id>/sections/<int:position>', methods=['GET'])
+@token_required
+def get_lesson_section(current_user, history_id, position):
+    """One lesson section; its content hash is a strong ETag, so re-views skip the body read."""
+    error = lesson_access_error(current_user, history_id)
+    if error:
+        return error
+    try:
+        section = get_section(history_id, position)
+        if section is None:
+            index = ensure_section_index(history_id)
+            if position >= len(index):
+                return jsonify({'error': f"Lesson has {len(index)} sections"}), 404
+            section = index[position]
+        if is_not_modified(section.hash):
+            return not_modified_response(section.hash)
+        (_, content), = get_section_contents(history_id, position, position)
+        return with_validators(jsonify({**section.to_dict(), 'content': content}), section.hash)
+    except Exception as e:
+        logger.error("Error getting lesson section: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to get lesson section'}), 500
+
+@bp.route('/search-history/<int:history_id>', methods=['DELETE'])
+@token_required
+def delete_search_history(current_user, history_id):
+    try:
+        if not delete_user_history(current_user.id, [history_id]):
             return jsonify({'error': 'History item not found'}), 404
-            
-        db.session.delete(history_item)
-        db.session.commit()
         
         return jsonify({'message': 'History item deleted successfully'})
         
     except Exception as e:
-        logger.error(f"Error deleting search history: {str(e)}")
+        logger.error("Error deleting search history: %s", e)
         db.session.rollback()
         return jsonify({'error': 'Failed to delete history item'}), 500
 
+@bp.route('/search-history', methods=['DELETE'])
+@token_required
+def delete_search_history_items(current_user):
+    """Delete several history items in one request: {"ids": [1, 2, 3]}."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(type(i) is int for i in ids):
+        return jsonify({'error': 'Expected a non-empty array of history ids'}), 400
+    if len(ids) > HISTORY_DELETION_CONFIG['MAX_IDS_PER_REQUEST']:
+        return jsonify({'error': f"At most {HISTORY_DELETION_CONFIG['MAX_IDS_PER_REQUEST']} ids per request"}), 413
+    
+    try:
+        deleted = set(delete_user_history(current_user.id, ids))
+        return jsonify({
+            'deleted': len(deleted),
+            'not_found': sorted(set(ids) - deleted)
+        })
+    except Exception as e:
+        logger.error("Error deleting search history items: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete history items'}), 500
+
 @bp.route('/search-history/clear-all', methods=['DELETE'])
 @token_required
 def clear_search_history(current_user):
     try:
-        SearchHistory.query.filter_by(user_id=current_user.id).delete()
-        db.session.commit()
-        return jsonify({'message': 'All history items deleted successfully'})
+        deleted = clear_user_history(current_user.id)
+        return jsonify({'message': 'All history items deleted successfully', 'deleted': deleted})
     except Exception as e:
-        logger.error(f"Error clearing search history: {str(e)}")
+        logger.error("Error clearing search history: %s", e)
         db.session.rollback()
         return jsonify({'error': 'Failed to clear history'}), 500
 
@@ -431,21 +534,107 @@ def get_feedback(current_user):
         errors = validate_input(answer=answer)
         if errors:
             return jsonify({'errors': errors}), 400
+
+        # Clear matches and mismatches are graded locally without an LLM call
+        if GRADING_CONFIG['LOCAL_ENABLED']:
+            grade = grade_answer(answer, correct_answer, data.get('options'), GRADING_CONFIG['NEAR_MISS'])
+            if grade['verdict'] != AMBIGUOUS:
+                logger.debug("Answer graded locally: %s (%s)", grade['verdict'], grade['method'])
+                return jsonify({
+                    "feedback": templated_feedback(grade['verdict'], answer, correct_answer, data.get('explanation')),
+                    "correct": grade['verdict'] == CORRECT,
+                    "graded_by": "local"
+                })
         
+        # The reference answer comes from the client, so bound what reaches the prompt
+        reference = truncate_to_tokens(str(correct_answer), TOKEN_BUDGET_CONFIG['MAX_REFERENCE_TOKENS'])
         prompt = [
             {"role": "system", "content": "You are an encouraging tutor providing constructive feedback."},
-            {"role": "user", "content": f"Compare this answer: '{answer}' with the correct answer: '{correct_answer}'. Provide constructive feedback."}
+            {"role": "user", "content": f"Compare this answer: '{answer}' with the correct answer: '{reference}'. "
+                                        "Provide constructive feedback."}
         ]
-        response = get_openai_response(prompt)
+        response = get_openai_response(prompt, user_id=current_user.id, priority=Priority.FEEDBACK,
+                                       route=model_router.FEEDBACK)
         feedback_content = response
         
         return jsonify({
-            "feedback": feedback_content
+            "feedback": feedback_content,
+            "correct": None,
+            "graded_by": "llm"
         })
+    except TokenBudgetError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        logger.error(f"Feedback generation error: {str(e)}")
+        logger.error("Feedback generation error: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/quiz/<int:history_id>/submit', methods=['POST'])
+@token_required
+def submit_quiz(current_user, history_id):
+    """Grade a stored quiz and record the attempt as Progress in one request.
+
+    Body: {"answers": [...], "time_spent": minutes, "feedback": true}. With
+    `feedback`, wrong answers get LLM feedback from a single batched call.
+    """
+    data = request.get_json(silent=True) or {}
+    answers = data.get('answers')
+    if not isinstance(answers, list):
+        return jsonify({'error': 'Expected an array of answers'}), 400
+    errors = [error for answer in answers if answer is not None for error in validate_input(answer=answer)]
+    if errors:
+        return jsonify({'errors': sorted(set(errors))}), 400
+    time_spent = data.get('time_spent')
+    if time_spent is not None and (isinstance(time_spent, bool) or not isinstance(time_spent, int) or time_spent < 0):
+        return jsonify({'error': 'time_spent must be a non-negative integer'}), 400
+
+    history_item = db.session.get(SearchHistory, history_id)
+    if not history_item or history_item.user_id != current_user.id or history_item.content_type != 'quiz':
+        return jsonify({'error': 'Quiz not found'}), 404
+    try:
+        questions = loads(history_item.content)['questions']
+    except (ValueError, TypeError, KeyError):
+        logger.error("Stored quiz %s could not be parsed", history_id)
+        return jsonify({'error': 'Stored quiz is invalid'}), 500
+    if len(answers) > len(questions):
+        return jsonify({'error': f"The quiz has {len(questions)} questions"}), 400
+
+    results = grade_quiz(questions, answers, GRADING_CONFIG['NEAR_MISS'])
+    correct = sum(result['correct'] for result in results)
+    score = round(100.0 * correct / len(questions), 1) if questions else 0.0
+    try:
+        progress = record_progress(current_user.id, history_item.topic, score, time_spent=time_spent,
+                                   difficulty_level=history_item.difficulty)
+        db.session.commit()
+    except Exception as e:
+        logger.error("Database error recording quiz result: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to record quiz result'}), 500
+    get_engine().record_result(current_user.id, progress.topic, score, progress.difficulty_level)
+
+    response = {
+        'history_id': history_id,
+        'score': score,
+        'correct': correct,
+        'total': len(questions),
+        'results': results,
+        'progress': progress.to_dict()
+    }
+    wrong = [result for result in results if not result['correct']]
+    if data.get('feedback') and wrong:
+        # One LLM call for every wrong answer; grading and progress stand even if it fails
+        try:
+            prompt = get_quiz_feedback_prompt(history_item.topic, questions, wrong)
+            feedback = loads(get_openai_response(prompt, user_id=current_user.id, priority=Priority.FEEDBACK,
+                                                 route=model_router.FEEDBACK))
+            by_index = {item['index']: item['feedback'] for item in feedback['feedback']
+                        if isinstance(item, dict) and 'index' in item and 'feedback' in item}
+            for result in wrong:
+                result['feedback'] = by_index.get(result['index'])
+        except Exception as e:
+            logger.error("Batched quiz feedback failed (%s): %s", type(e).__name__, e)
+            response['feedback_error'] = 'Feedback is unavailable right now'
+    return jsonify(response), 200
+
 @bp.route('/search-video', methods=['POST'])
 @token_required
 def search_video(current_user):
@@ -465,20 +654,25 @@ def search_video(current_user):
 
         search_query = f"{topic} {difficulty} level tutorial explanation"
         
-        youtube = build('youtube', 'v3', developerKey=youtube_api_key)
+        api_endpoint = current_app.config.get('YOUTUBE_API_ENDPOINT')
+        youtube = build(
+            'youtube', 'v3', developerKey=youtube_api_key,
+            client_options={'api_endpoint': api_endpoint} if api_endpoint else None
+        )
         
         try:
-            search_response = youtube.search().list(
-                q=search_query,
-                part='id,snippet',
-                maxResults=1,
-                type='video',
-                videoDuration='medium',  
-                relevanceLanguage='en',
-                safeSearch='strict',
-                videoEmbeddable='true',  
-                fields='items(id/videoId,snippet/title,snippet/description)'  
-            ).execute()
+            with span('youtube.search'):
+                search_response = youtube.search().list(
+                    q=search_query,
+                    part='id,snippet',
+                    maxResults=1,
+                    type='video',
+                    videoDuration='medium',  
+                    relevanceLanguage='en',
+                    safeSearch='strict',
+                    videoEmbeddable='true',  
+                    fields='items(id/videoId,snippet/title,snippet/description)'  
+                ).execute()
             
             if search_response.get('items'):
                 video = search_response['items'][0]
@@ -495,11 +689,11 @@ def search_video(current_user):
                 return jsonify({"error": "No suitable videos found for this topic"}), 404
                 
         except HttpError as e:
-            logger.error(f"YouTube API error: {str(e)}")
+            logger.error("YouTube API error: %s", e)
             return jsonify({"error": "Failed to search YouTube. Please try again later."}), 500
             
     except Exception as e:
-        logger.error(f"Video search error: {str(e)}")
+        logger.error("Video search error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/test-api-key', methods=['GET'])
@@ -509,7 +703,7 @@ def test_api_key(current_user):
         prompt = [
             {"role": "user", "content": "Hello!"}
         ]
-        response = get_openai_response(prompt)
+        response = get_openai_response(prompt, user_id=current_user.id, route=model_router.HEALTH_CHECK)
         return jsonify({'status': 'success', 'message': 'API key is valid'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
\ No newline at end of file
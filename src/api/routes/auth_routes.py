@@ -8,8 +8,6 @@ from functools import wraps
 import jwt
 from flask import current_app
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('auth', __name__)
@@ -47,10 +45,10 @@ def token_required(f):
             logger.warning("Expired token used")
             return jsonify({"error": "Token has expired"}), 401
         except jwt.InvalidTokenError as e:
-            logger.warning(f"JWT validation failed: {str(e)}")
+            logger.warning("JWT validation failed: %s", e)
             return jsonify({"error": "Invalid token"}), 401
         except Exception as e:
-            logger.error(f"Token validation error: {str(e)}")
+            logger.error("Token validation error: %s", e)
             return jsonify({"error": "Authentication failed"}), 401
             
     return decorated
@@ -102,7 +100,7 @@ def register():
             algorithm='HS256'
         )
         
-        logger.info(f"User {new_user.username} registered successfully")
+        logger.info("User %s registered successfully", new_user.username)
         return jsonify({
             "message": "Registration successful",
             "token": token,
@@ -152,7 +150,7 @@ def login():
             algorithm='HS256'
         )
         
-        logger.info(f"User {user.username} logged in successfully")
+        logger.info("User %s logged in successfully", user.username)
         return jsonify({
             "token": token,
             "user": {
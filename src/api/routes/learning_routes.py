@@ -1,18 +1,64 @@
 """Learning routes."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from src.core.models.user import User, Progress
 from src.core.models.search_history import SearchHistory
 from src.core.models.database import db
+from src.core.services.progress_service import (
+    get_topic_summaries,
+    get_weekly_summaries,
+    ingest_progress_batch,
+    record_progress,
+    validate_progress_record,
+)
+from src.core.services.ai.adaptive_difficulty import get_engine
+from src.core.services.history_export import HistoryImportError, export_history, import_history
+from src.core.services.history_version import get_history_version, history_etag
 from src.core.utils.auth import token_required
+from src.core.utils.http_cache import is_not_modified, not_modified_response, with_validators
 
 bp = Blueprint('learning', __name__, url_prefix='/api/learning')
 
+MAX_BULK_PROGRESS_RECORDS = 500
+
 @bp.route('/history', methods=['GET'])
 @token_required
 def get_history(current_user_id):
     """Get user's search history."""
+    version, updated_at = get_history_version(current_user_id)
+    etag = history_etag(current_user_id, version, 'learning')
+    if is_not_modified(etag, updated_at):
+        return not_modified_response(etag, updated_at)
+    
     history = SearchHistory.query.filter_by(user_id=current_user_id).all()
-    return jsonify([h.to_dict() for h in history]), 200
+    return with_validators(jsonify([h.to_dict() for h in history]), etag, updated_at), 200
+
+@bp.route('/history/export', methods=['GET'])
+@token_required
+def export_history_ndjson(current_user_id):
+    """Stream the user's full history as NDJSON, gzip-encoded when the client accepts it."""
+    compress = request.accept_encodings['gzip'] > 0
+    body = stream_with_context(export_history(current_user_id, compress))
+    response = Response(body, mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename="history.ndjson"',
+        'Cache-Control': 'no-store',
+    })
+    response.vary.add('Accept-Encoding')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@bp.route('/history/import', methods=['POST'])
+@token_required
+def import_history_ndjson(current_user_id):
+    """Insert history records from an NDJSON body (optionally Content-Encoding: gzip) in batches."""
+    encoding = request.headers.get('Content-Encoding', '').lower()
+    if encoding not in ('', 'identity', 'gzip'):
+        return jsonify({'error': 'Content-Encoding must be gzip or identity'}), 415
+    try:
+        result = import_history(current_user_id, request.stream, gzipped=encoding == 'gzip')
+    except HistoryImportError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(result), 200
 
 @bp.route('/progress', methods=['GET'])
 @token_required
@@ -28,13 +74,85 @@ def update_progress(current_user_id):
     data = request.get_json()
     if not data or not data.get('topic') or not data.get('score'):
         return jsonify({'error': 'Missing required fields'}), 400
+    values, errors = validate_progress_record(data)
+    if errors:
+        return jsonify({'error': '; '.join(errors)}), 400
     
-    progress = Progress(
-        user_id=current_user_id,
-        topic=data['topic'],
-        score=data['score']
+    progress = record_progress(
+        current_user_id,
+        values['topic'],
+        values['score'],
+        time_spent=values['time_spent'],
+        difficulty_level=values['difficulty_level']
     )
-    db.session.add(progress)
     db.session.commit()
+    get_engine().record_result(current_user_id, progress.topic, progress.score, progress.difficulty_level)
     
     return jsonify(progress.to_dict()), 201
+
+@bp.route('/progress/bulk', methods=['POST'])
+@token_required
+def bulk_update_progress(current_user_id):
+    """Record many progress entries in one transaction.
+
+    Accepts {"records": [...]} (or a bare array). Each record may carry an
+    `idempotency_key` so replayed submissions are reported as duplicates
+    rather than inserted twice.
+    """
+    data = request.get_json(silent=True)
+    records = data.get('records') if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'Expected a non-empty array of progress records'}), 400
+    if len(records) > MAX_BULK_PROGRESS_RECORDS:
+        return jsonify({'error': f"At most {MAX_BULK_PROGRESS_RECORDS} records per request"}), 413
+    
+    results = ingest_progress_batch(current_user_id, records)
+    counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+    engine = get_engine()
+    for result in results:
+        counts[result['status']] += 1
+        if result['status'] == 'created':
+            record = records[result['index']]
+            engine.record_result(current_user_id, record['topic'], record['score'], record.get('difficulty_level'))
+    
+    return jsonify({'results': results, **counts}), 200
+
+@bp.route('/progress/summary', methods=['GET'])
+@token_required
+def get_progress_summary(current_user_id):
+    """Get per-topic progress aggregates."""
+    summaries = get_topic_summaries(current_user_id)
+    attempts = sum(s.attempts for s in summaries)
+    return jsonify({
+        'topics': [s.to_dict() for s in summaries],
+        'totals': {
+            'topics': len(summaries),
+            'attempts': attempts,
+            'average_score': sum(s.total_score for s in summaries) / attempts if attempts else None,
+            'time_spent': sum(s.time_spent for s in summaries)
+        }
+    }), 200
+
+@bp.route('/progress/weekly', methods=['GET'])
+@token_required
+def get_progress_weekly(current_user_id):
+    """Get progress totals per week."""
+    weeks = request.args.get('weeks', type=int)
+    return jsonify([w.to_dict() for w in get_weekly_summaries(current_user_id, weeks)]), 200
+
+@bp.route('/recommendation', methods=['GET'])
+@token_required
+def get_recommendation(current_user_id):
+    """Get the recommended difficulty for a topic."""
+    topic = request.args.get('topic')
+    if not topic:
+        return jsonify({'error': 'Missing required parameter: topic'}), 400
+    
+    engine = get_engine()
+    rating, attempts = engine.estimate(current_user_id, topic)
+    return jsonify({
+        'topic': topic,
+        'difficulty': engine.recommend(current_user_id, topic),
+        'rating': round(rating, 1),
+        'attempts': attempts
+    }), 200
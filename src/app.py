@@ -6,26 +6,32 @@ from dotenv import load_dotenv
 from src.api.routes.auth_routes import bp as auth_bp
 from src.api.routes.ai_routes import bp as ai_bp
 from src.api.routes.learning_routes import bp as learning_bp
+from src.api.routes.admin_routes import bp as admin_bp
 from src.core.models.database import db
 from src.api.swagger import swagger_blueprint
+from src.core.utils.structured_logging import configure_logging
+from src.core.utils.compression import init_compression
+from src.core.utils.json_provider import FastJSONProvider
+from src.core.utils.profiling import init_profiling
 import logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-def create_app():
-    """Create and configure the Flask application."""
+def create_app(test_config=None):
+    """Create and configure the Flask application.
+
+    `test_config` overrides settings (e.g. SQLALCHEMY_DATABASE_URI) before
+    extensions are initialized, for tests and benchmarks.
+    """
     # Load environment variables
     logger.info("Loading environment variables...")
     # Force reload environment variables
     load_dotenv(override=True)
-    logger.info(f"OpenAI API Key from env: {os.getenv('OPENAI_API_KEY')[:10]}...")
     
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     # Configure CORS with proper preflight handling
     CORS(app, 
@@ -49,6 +55,8 @@ def create_app():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
 
+    init_compression(app)
+
     # Get the absolute path to the database file
     db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'app.db')
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -62,7 +70,7 @@ def create_app():
     
     missing_vars = [var for var in required_env_vars if not os.getenv(var)]
     if missing_vars:
-        logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
+        logger.error("Missing required environment variables: %s", ', '.join(missing_vars))
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
     # Set up app configuration
@@ -71,11 +79,17 @@ def create_app():
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SECRET_KEY=os.getenv('SECRET_KEY').strip(),
         OPENAI_API_KEY=os.getenv('OPENAI_API_KEY').strip(),
-        YOUTUBE_API_KEY=os.getenv('YOUTUBE_API_KEY').strip()
+        YOUTUBE_API_KEY=os.getenv('YOUTUBE_API_KEY').strip(),
+        # Optional endpoint overrides, e.g. the offline mock servers in benchmarks/
+        OPENAI_BASE_URL=os.getenv('OPENAI_BASE_URL') or None,
+        YOUTUBE_API_ENDPOINT=os.getenv('YOUTUBE_API_ENDPOINT') or None
     )
+    if test_config:
+        app.config.update(test_config)
     
     # Initialize extensions
     db.init_app(app)
+    init_profiling(app)
     
     # Create database tables
     with app.app_context():
@@ -86,12 +100,13 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
     app.register_blueprint(learning_bp, url_prefix='/api/learning')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(swagger_blueprint)
     
     # Log configuration (safely)
     logger.info("App configuration loaded")
-    logger.info(f"Database path: {db_path}")
-    logger.info(f"OpenAI API Key present: {'Yes' if app.config['OPENAI_API_KEY'] else 'No'}")
+    logger.info("Database: %s", app.config['SQLALCHEMY_DATABASE_URI'])
+    logger.info("OpenAI API Key present: %s", 'Yes' if app.config['OPENAI_API_KEY'] else 'No')
     
     return app
 
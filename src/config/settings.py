@@ -30,9 +30,214 @@ DATABASE_CONFIG = {
 # OpenAI configuration
 OPENAI_CONFIG = {
     "API_KEY": os.getenv("OPENAI_API_KEY"),
-    "MODEL": "gpt-3.5-turbo",
+    "BASE_URL": os.getenv("OPENAI_BASE_URL"),
+    "MODEL": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
     "MAX_TOKENS": 2000,
     "TEMPERATURE": 0.7,
+    "TIMEOUT": float(os.getenv("OPENAI_TIMEOUT", "60")),
+}
+
+# Generation parameters per endpoint; unset keys fall back to OPENAI_CONFIG
+MODEL_ROUTING_CONFIG = {
+    "ROUTES": {
+        "lesson": {"model": os.getenv("LESSON_MODEL", "gpt-4"), "max_tokens": 3000, "timeout": 90},
+        # Sectioned lessons: a short outline, then each section in its own call
+        "lesson_outline": {"model": os.getenv("LESSON_MODEL", "gpt-4"), "max_tokens": 300, "temperature": 0.3, "timeout": 30},
+        "lesson_section": {"model": os.getenv("LESSON_MODEL", "gpt-4"), "max_tokens": 600, "timeout": 60},
+        "quiz": {"model": os.getenv("QUIZ_MODEL"), "max_tokens": 2000, "temperature": 0.5},
+        "feedback": {"model": os.getenv("FEEDBACK_MODEL"), "max_tokens": 500, "timeout": 20},
+        "health_check": {"model": os.getenv("HEALTH_CHECK_MODEL"), "max_tokens": 5, "temperature": 0.0, "timeout": 10},
+    },
+    # Per-difficulty tweaks on top of a route
+    "DIFFICULTY_OVERRIDES": {
+        "lesson": {"beginner": {"max_tokens": 2000}, "advanced": {"max_tokens": 4000}},
+    },
+    # Optional JSON file ({"routes": {...}, "difficulty_overrides": {...}}) re-read when it changes
+    "ROUTES_FILE": os.getenv("MODEL_ROUTES_FILE"),
+    "RELOAD_INTERVAL": float(os.getenv("MODEL_ROUTES_RELOAD_INTERVAL", "5")),
+}
+
+# Prompt token accounting before each LLM call
+TOKEN_BUDGET_CONFIG = {
+    # Context window per model name prefix (longest prefix wins)
+    "CONTEXT_WINDOWS": {
+        "gpt-3.5-turbo": 16385,
+        "gpt-4": 8192,
+        "gpt-4-turbo": 128000,
+        "gpt-4o": 128000,
+        "gpt-4.1": 1047576,
+    },
+    "DEFAULT_CONTEXT_WINDOW": int(os.getenv("LLM_DEFAULT_CONTEXT_WINDOW", "8192")),
+    # Headroom for tokenizer differences; calls that cannot get MIN_COMPLETION_TOKENS are rejected
+    "SAFETY_MARGIN": int(os.getenv("LLM_TOKEN_SAFETY_MARGIN", "64")),
+    "MIN_COMPLETION_TOKENS": int(os.getenv("LLM_MIN_COMPLETION_TOKENS", "256")),
+    # User-supplied fields are rejected (answers) or truncated (reference text) past these sizes
+    "MAX_ANSWER_TOKENS": int(os.getenv("LLM_MAX_ANSWER_TOKENS", "400")),
+    "MAX_REFERENCE_TOKENS": int(os.getenv("LLM_MAX_REFERENCE_TOKENS", "400")),
+    # Predicted prompt + completion tokens charged per user; empty disables the limit
+    "USER_LIMIT": os.getenv("LLM_USER_TOKEN_LIMIT", "200000 per hour"),
+    "STORAGE_URI": os.getenv("LLM_TOKEN_LIMIT_STORAGE", "memory://"),
+}
+
+# Generate lessons as an outline plus concurrently generated sections
+SECTIONED_LESSON_CONFIG = {
+    "ENABLED": os.getenv("SECTIONED_LESSONS_ENABLED", "false").lower() == "true",
+    # Section calls in flight per lesson (the LLM scheduler still caps the process)
+    "MAX_PARALLEL": int(os.getenv("SECTIONED_LESSONS_MAX_PARALLEL", "5")),
+    "SECTIONS": ["Introduction", "Key Concepts", "Examples", "Practice Exercises", "Summary"],
+}
+
+# Near-duplicate lesson cache
+LESSON_CACHE_CONFIG = {
+    "ENABLED": os.getenv("LESSON_CACHE_ENABLED", "true").lower() == "true",
+    "SIMILARITY_THRESHOLD": float(os.getenv("LESSON_CACHE_THRESHOLD", "0.85")),
+    "MAX_CANDIDATES": 256,
+}
+
+# Subject classification
+SUBJECT_CLASSIFIER_CONFIG = {
+    "TAXONOMY_PATH": os.getenv(
+        "SUBJECT_TAXONOMY_PATH", str(Path(__file__).resolve().parent / "subject_taxonomy.json")
+    ),
+    # Optional linear model trained with scripts/train_subject_model.py
+    "MODEL_PATH": os.getenv("SUBJECT_MODEL_PATH"),
+    "MIN_MODEL_CONFIDENCE": float(os.getenv("SUBJECT_MODEL_MIN_CONFIDENCE", "0.6")),
+}
+
+# Progress analytics
+PROGRESS_CONFIG = {
+    # Scores at or above this count towards a topic's streak
+    "PASSING_SCORE": float(os.getenv("PROGRESS_PASSING_SCORE", "70")),
+}
+
+# Adaptive difficulty
+ADAPTIVE_CONFIG = {
+    "CACHE_SIZE": int(os.getenv("ADAPTIVE_CACHE_SIZE", "100000")),
+    "FLUSH_INTERVAL_SECONDS": float(os.getenv("ADAPTIVE_FLUSH_INTERVAL", "30")),
+    # Pick the difficulty at which the learner is expected to score about this well
+    "TARGET_SUCCESS_RATE": float(os.getenv("ADAPTIVE_TARGET_SUCCESS", "0.7")),
+}
+
+# Quiz question bank
+QUESTION_BANK_CONFIG = {
+    # Assemble quizzes from unseen bank questions before asking the LLM
+    "ENABLED": os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true",
+    "QUIZ_SIZE": int(os.getenv("QUIZ_SIZE", "5")),
+}
+
+RENDER_CONFIG = {
+    # Store markdown AST and sanitized HTML for lessons when they are generated
+    "ENABLED": os.getenv("RENDER_LESSONS", "true").lower() == "true",
+}
+LESSON_SECTIONS_CONFIG = {
+    # Index lessons by section at save time, storing each distinct section body once
+    "ENABLED": os.getenv("LESSON_SECTIONS_ENABLED", "true").lower() == "true",
+}
+
+HISTORY_EXPORT_CONFIG = {
+    # Rows fetched per cursor round trip while exporting
+    "CHUNK_SIZE": int(os.getenv("HISTORY_EXPORT_CHUNK_SIZE", "500")),
+    # Export output is flushed (and import input read) in blocks of about this size
+    "BUFFER_BYTES": int(os.getenv("HISTORY_EXPORT_BUFFER_BYTES", "65536")),
+    "GZIP_LEVEL": int(os.getenv("HISTORY_EXPORT_GZIP_LEVEL", "6")),
+    # Rows inserted per transaction while importing
+    "IMPORT_BATCH_SIZE": int(os.getenv("HISTORY_IMPORT_BATCH_SIZE", "500")),
+    "MAX_LINE_BYTES": int(os.getenv("HISTORY_IMPORT_MAX_LINE_BYTES", str(8 * 1024 * 1024))),
+}
+
+HISTORY_DELETION_CONFIG = {
+    # Rows deleted per transaction, and the pause between batches that lets other writers in
+    "BATCH_SIZE": int(os.getenv("HISTORY_DELETE_BATCH_SIZE", "500")),
+    "BATCH_PAUSE": float(os.getenv("HISTORY_DELETE_BATCH_PAUSE", "0.02")),
+    "MAX_IDS_PER_REQUEST": int(os.getenv("HISTORY_DELETE_MAX_IDS", "1000")),
+    # History older than this many days is removed by scripts/purge_history.py; 0 keeps everything
+    "RETENTION_DAYS": int(os.getenv("HISTORY_RETENTION_DAYS", "0")),
+    # "purge" deletes expired rows; "archive" first appends them to gzip NDJSON files in ARCHIVE_DIR
+    "RETENTION_MODE": os.getenv("HISTORY_RETENTION_MODE", "purge").lower(),
+    "ARCHIVE_DIR": os.getenv("HISTORY_ARCHIVE_DIR", str(BASE_DIR / "instance" / "history_archive")),
+    "PURGE_INTERVAL": float(os.getenv("HISTORY_PURGE_INTERVAL", "86400")),
+}
+
+HEDGING_CONFIG = {
+    # Send a second identical request when a call is slower than usual; off by default
+    "ENABLED": os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+    "ROUTES": [r.strip() for r in os.getenv("LLM_HEDGING_ROUTES", "lesson,quiz").split(",") if r.strip()],
+    # Hedge after this percentile of the route's recent latencies
+    "PERCENTILE": float(os.getenv("LLM_HEDGING_PERCENTILE", "0.95")),
+    "MIN_DELAY_MS": float(os.getenv("LLM_HEDGING_MIN_DELAY_MS", "500")),
+    "MIN_SAMPLES": int(os.getenv("LLM_HEDGING_MIN_SAMPLES", "20")),
+    "WINDOW": int(os.getenv("LLM_HEDGING_WINDOW", "500")),
+    # Extra calls allowed per call (0.05 = at most 5% more upstream requests)
+    "BUDGET_RATIO": float(os.getenv("LLM_HEDGING_BUDGET", "0.05")),
+    "MAX_BURST": float(os.getenv("LLM_HEDGING_MAX_BURST", "5")),
+    "MAX_THREADS": int(os.getenv("LLM_HEDGING_THREADS", "32")),
+}
+
+GRADING_CONFIG = {
+    # Grade clear matches/mismatches in get_feedback locally instead of calling the LLM
+    "LOCAL_ENABLED": os.getenv("LOCAL_GRADING_ENABLED", "true").lower() == "true",
+    # Numeric answers within this relative distance of the expected value are escalated, not marked wrong
+    "NEAR_MISS": float(os.getenv("GRADING_NEAR_MISS", "0.01")),
+}
+
+LLM_SCHEDULER_CONFIG = {
+    "ENABLED": os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true",
+    # Concurrent OpenAI calls allowed per process
+    "MAX_CONCURRENCY": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    # Tokens of credit a queued user earns per round; calls cost their estimated tokens
+    "QUANTUM_TOKENS": float(os.getenv("LLM_QUANTUM_TOKENS", "2000")),
+    "QUEUE_TIMEOUT": float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+}
+
+QUIZ_PREFETCH_CONFIG = {
+    # Generate a quiz in the background after each lesson; runs on the job workers (JOBS_ENABLED)
+    "ENABLED": os.getenv("QUIZ_PREFETCH_ENABLED", "false").lower() == "true",
+    # Unused prefetched quizzes count as wasted after this many seconds
+    "TTL": float(os.getenv("QUIZ_PREFETCH_TTL", "3600")),
+    # Job workers write off expired prefetches at most this often (seconds)
+    "EXPIRE_INTERVAL": float(os.getenv("QUIZ_PREFETCH_EXPIRE_INTERVAL", "60")),
+    "MAX_OUTSTANDING": int(os.getenv("QUIZ_PREFETCH_MAX_OUTSTANDING", "50")),
+    "MAX_PER_USER": int(os.getenv("QUIZ_PREFETCH_MAX_PER_USER", "2")),
+    # Below MIN_HIT_RATE over the last WINDOW outcomes, only PROBE_RATE of lessons are prefetched
+    "WINDOW": int(os.getenv("QUIZ_PREFETCH_WINDOW", "200")),
+    "MIN_SAMPLES": int(os.getenv("QUIZ_PREFETCH_MIN_SAMPLES", "20")),
+    "MIN_HIT_RATE": float(os.getenv("QUIZ_PREFETCH_MIN_HIT_RATE", "0.4")),
+    "PROBE_RATE": float(os.getenv("QUIZ_PREFETCH_PROBE_RATE", "0.1")),
+}
+JOBS_CONFIG = {
+    # Lets clients request {"async": true} generation; requires scripts/run_job_workers.py
+    "ENABLED": os.getenv("JOBS_ENABLED", "false").lower() == "true",
+    "DB_PATH": os.getenv("JOBS_DB_PATH", str(BASE_DIR / "instance" / "jobs.db")),
+    # Seconds a claimed job stays invisible before another worker may retry it
+    "VISIBILITY_TIMEOUT": float(os.getenv("JOBS_VISIBILITY_TIMEOUT", "300")),
+    "MAX_ATTEMPTS": int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+    "POLL_INTERVAL": float(os.getenv("JOBS_POLL_INTERVAL", "0.5")),
+    "WORKERS": int(os.getenv("JOBS_WORKERS", "2")),
+    "SSE_TIMEOUT": float(os.getenv("JOBS_SSE_TIMEOUT", "120")),
+}
+
+PROFILING_CONFIG = {
+    # Off by default; when on, sampled or header-selected requests are profiled
+    "ENABLED": os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+    "SAMPLE_RATE": float(os.getenv("PROFILING_SAMPLE_RATE", "0.0")),
+    # Required value of the X-Debug-Profile header, and of X-Debug-Token for /api/admin
+    "DEBUG_TOKEN": os.getenv("PROFILING_DEBUG_TOKEN"),
+    "SAMPLE_INTERVAL_MS": float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5")),
+    "STORE_DIR": os.getenv("PROFILING_DIR", str(BASE_DIR / "instance" / "profiles")),
+    "MAX_PROFILES": int(os.getenv("PROFILING_MAX_PROFILES", "200")),
+}
+
+JSON_CONFIG = {
+    # "auto" uses orjson when installed; "stdlib" forces the built-in encoder
+    "BACKEND": os.getenv("JSON_BACKEND", "auto").lower(),
+}
+
+COMPRESSION_CONFIG = {
+    "ENABLED": os.getenv("COMPRESSION_ENABLED", "true").lower() == "true",
+    # Bodies smaller than this are sent uncompressed
+    "MIN_SIZE": int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    "GZIP_LEVEL": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "BROTLI_QUALITY": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5")),
 }
 
 # Security configuration
@@ -42,6 +247,25 @@ SECURITY_CONFIG = {
     "RATE_LIMIT_DEFAULT": "200 per day",
 }
 
+# Logging configuration
+LOGGING_CONFIG = {
+    "LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+    "FORMAT": os.getenv("LOG_FORMAT", "text"),  # 'text' or 'json'
+    # Per-logger overrides, e.g. LOG_LEVELS="src.core.utils.openai_client=DEBUG,werkzeug=WARNING"
+    "LOGGER_LEVELS": {
+        "httpx": "WARNING",
+        "openai": "WARNING",
+        **dict(
+            item.strip().split("=", 1)
+            for item in os.getenv("LOG_LEVELS", "").split(",")
+            if "=" in item
+        ),
+    },
+    "PAYLOAD_SAMPLE_RATE": float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01")),
+    "PAYLOAD_MAX_CHARS": int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "500")),
+    "QUEUE_SIZE": int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+}
+
 # CORS configuration
 CORS_CONFIG = {
     "ORIGINS": [
@@ -62,6 +286,27 @@ def get_config() -> Dict[str, Any]:
         "FLASK": FLASK_CONFIG,
         "DATABASE": DATABASE_CONFIG,
         "OPENAI": OPENAI_CONFIG,
+        "MODEL_ROUTING": MODEL_ROUTING_CONFIG,
+        "TOKEN_BUDGET": TOKEN_BUDGET_CONFIG,
+        "SECTIONED_LESSON": SECTIONED_LESSON_CONFIG,
+        "LESSON_CACHE": LESSON_CACHE_CONFIG,
+        "SUBJECT_CLASSIFIER": SUBJECT_CLASSIFIER_CONFIG,
+        "PROGRESS": PROGRESS_CONFIG,
+        "ADAPTIVE": ADAPTIVE_CONFIG,
+        "QUESTION_BANK": QUESTION_BANK_CONFIG,
+        "RENDER": RENDER_CONFIG,
+        "LESSON_SECTIONS": LESSON_SECTIONS_CONFIG,
+        "HISTORY_EXPORT": HISTORY_EXPORT_CONFIG,
+        "HISTORY_DELETION": HISTORY_DELETION_CONFIG,
+        "COMPRESSION": COMPRESSION_CONFIG,
+        "JSON": JSON_CONFIG,
+        "PROFILING": PROFILING_CONFIG,
+        "JOBS": JOBS_CONFIG,
+        "QUIZ_PREFETCH": QUIZ_PREFETCH_CONFIG,
+        "LLM_SCHEDULER": LLM_SCHEDULER_CONFIG,
+        "GRADING": GRADING_CONFIG,
+        "HEDGING": HEDGING_CONFIG,
         "SECURITY": SECURITY_CONFIG,
         "CORS": CORS_CONFIG,
+        "LOGGING": LOGGING_CONFIG,
     }
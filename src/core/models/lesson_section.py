@@ -0,0 +1,34 @@
+"""Lesson section models."""
+from datetime import datetime
+from src.core.models.database import db
+
+class SectionBlob(db.Model):
+    """Section text stored once per distinct content hash."""
+
+    __tablename__ = 'section_blob'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class LessonSection(db.Model):
+    """One section of a lesson: where it sits in the stored content and which blob holds it."""
+
+    __tablename__ = 'lesson_section'
+
+    history_id = db.Column(db.Integer, db.ForeignKey('search_history.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    heading = db.Column(db.String(500))
+    offset = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    hash = db.Column(db.String(64), db.ForeignKey('section_blob.hash'), nullable=False, index=True)
+
+    def to_dict(self):
+        """Section metadata without its content."""
+        return {
+            'index': self.position,
+            'heading': self.heading,
+            'offset': self.offset,
+            'length': self.length,
+            'hash': self.hash,
+        }
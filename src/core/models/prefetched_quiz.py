@@ -0,0 +1,26 @@
+"""Speculatively generated quiz model."""
+from datetime import datetime
+from src.core.models.database import db
+
+PENDING = 'pending'
+READY = 'ready'
+USED = 'used'
+WASTED = 'wasted'
+FAILED = 'failed'
+
+class PrefetchedQuiz(db.Model):
+    """Quiz questions generated in the background for the lesson a user just received."""
+
+    __tablename__ = 'prefetched_quiz'
+    __table_args__ = (
+        db.Index('ix_prefetched_quiz_status_resolved', 'status', 'resolved_at'),
+    )
+
+    lesson_history_id = db.Column(db.Integer, db.ForeignKey('search_history.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    topic = db.Column(db.String(200), nullable=False)
+    difficulty = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    questions = db.Column(db.Text)  # JSON question list while ready; cleared once resolved
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
@@ -0,0 +1,72 @@
+"""Incrementally maintained progress aggregates."""
+from datetime import datetime
+from src.core.models.database import db
+
+class ProgressSummary(db.Model):
+    """Per-user, per-topic aggregate of Progress rows."""
+
+    __tablename__ = 'progress_summary'
+    __table_args__ = (db.UniqueConstraint('user_id', 'topic', name='uq_progress_summary_user_topic'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    topic = db.Column(db.String(200), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Float, nullable=False, default=0.0)
+    best_score = db.Column(db.Float)
+    last_score = db.Column(db.Float)
+    time_spent = db.Column(db.Integer, nullable=False, default=0)  # in minutes
+    current_streak = db.Column(db.Integer, nullable=False, default=0)  # consecutive passing attempts
+    best_streak = db.Column(db.Integer, nullable=False, default=0)
+    first_completed_at = db.Column(db.DateTime)
+    last_completed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            'topic': self.topic,
+            'attempts': self.attempts,
+            'average_score': self.total_score / self.attempts if self.attempts else None,
+            'best_score': self.best_score,
+            'last_score': self.last_score,
+            'time_spent': self.time_spent,
+            'current_streak': self.current_streak,
+            'best_streak': self.best_streak,
+            'first_completed_at': self.first_completed_at.isoformat() if self.first_completed_at else None,
+            'last_completed_at': self.last_completed_at.isoformat() if self.last_completed_at else None
+        }
+
+class ProgressWeekly(db.Model):
+    """Per-user activity totals for each ISO week (starting Monday)."""
+
+    __tablename__ = 'progress_weekly'
+    __table_args__ = (db.UniqueConstraint('user_id', 'week_start', name='uq_progress_weekly_user_week'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    week_start = db.Column(db.Date, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Float, nullable=False, default=0.0)
+    time_spent = db.Column(db.Integer, nullable=False, default=0)  # in minutes
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            'week_start': self.week_start.isoformat(),
+            'attempts': self.attempts,
+            'average_score': self.total_score / self.attempts if self.attempts else None,
+            'time_spent': self.time_spent
+        }
+
+class SkillEstimate(db.Model):
+    """Persisted adaptive-difficulty rating for a user on a canonical topic."""
+
+    __tablename__ = 'skill_estimate'
+    __table_args__ = (db.UniqueConstraint('user_id', 'topic_key', name='uq_skill_estimate_user_topic'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    topic_key = db.Column(db.String(200), nullable=False)
+    rating = db.Column(db.Float, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
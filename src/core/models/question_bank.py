@@ -0,0 +1,42 @@
+"""Quiz question bank models."""
+from datetime import datetime
+from src.core.models.database import db
+
+class QuizQuestion(db.Model):
+    """A generated multiple-choice question that can be reused across quizzes."""
+
+    __tablename__ = 'quiz_question'
+    __table_args__ = (
+        db.Index('ix_quiz_question_topic_difficulty', 'topic_key', 'difficulty', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic_key = db.Column(db.String(200), nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    difficulty = db.Column(db.String(50), nullable=False)
+    question = db.Column(db.Text, nullable=False)
+    options = db.Column(db.JSON, nullable=False)
+    correct_answer = db.Column(db.Text, nullable=False)
+    explanation = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_question(self):
+        """Convert to the question shape returned by quiz generation."""
+        question = {
+            'question': self.question,
+            'options': self.options,
+            'correct_answer': self.correct_answer,
+        }
+        if self.explanation is not None:
+            question['explanation'] = self.explanation
+        return question
+
+class QuizQuestionSeen(db.Model):
+    """Questions already served to a user."""
+
+    __tablename__ = 'quiz_question_seen'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id'), primary_key=True)
+    seen_at = db.Column(db.DateTime, default=datetime.utcnow)
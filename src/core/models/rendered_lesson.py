@@ -0,0 +1,16 @@
+"""Pre-rendered lesson model."""
+from datetime import datetime
+from src.core.models.database import db
+
+class RenderedLesson(db.Model):
+    """Formatted markdown, AST and HTML rendered once for a lesson history row."""
+
+    __tablename__ = 'rendered_lesson'
+
+    history_id = db.Column(db.Integer, db.ForeignKey('search_history.id'), primary_key=True)
+    etag = db.Column(db.String(64), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    markdown = db.Column(db.Text, nullable=False)
+    ast = db.Column(db.Text, nullable=False)  # JSON-encoded block list
+    html = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -26,3 +26,12 @@ class SearchHistory(db.Model):
             'content_type': self.content_type,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class HistoryVersion(db.Model):
+    """Per-user counter bumped whenever the user's search history changes."""
+
+    __tablename__ = 'history_version'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -22,27 +22,27 @@ class User(db.Model):
     def set_password(self, password):
         """Hash and set the user's password."""
         try:
-            logger.debug(f"Setting password for user {self.username}")
+            logger.debug("Setting password for user %s", self.username)
             if isinstance(password, str):
                 password = password.encode('utf-8')
             salt = bcrypt.gensalt()
             self.password_hash = bcrypt.hashpw(password, salt)
             logger.debug("Password set successfully")
         except Exception as e:
-            logger.error(f"Error setting password: {str(e)}")
+            logger.error("Error setting password: %s", e)
             raise
     
     def check_password(self, password):
         """Check if the provided password matches the hash."""
         try:
-            logger.debug(f"Checking password for user {self.username}")
+            logger.debug("Checking password for user %s", self.username)
             if isinstance(password, str):
                 password = password.encode('utf-8')
             result = bcrypt.checkpw(password, self.password_hash)
-            logger.debug(f"Password check result: {result}")
+            logger.debug("Password check result: %s", result)
             return result
         except Exception as e:
-            logger.error(f"Error checking password: {str(e)}")
+            logger.error("Error checking password: %s", e)
             return False
     
     def to_dict(self):
@@ -76,3 +76,14 @@ class Progress(db.Model):
             'score': self.score,
             'completed_at': self.completed_at.isoformat()
         }
+
+class ProgressIngestKey(db.Model):
+    """Client-supplied idempotency key for a recorded Progress row."""
+    __tablename__ = 'progress_ingest_key'
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='uq_progress_ingest_key_user_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    progress_id = db.Column(db.Integer, db.ForeignKey('progress.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,228 @@
+"""Adaptive difficulty from an incrementally updated per-user, per-topic skill rating."""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.config.settings import ADAPTIVE_CONFIG
+from src.core.models.database import db
+from src.core.models.progress_summary import SkillEstimate
+from src.core.services.ai.topic_index import canonical_key
+
+logger = logging.getLogger(__name__)
+
+# Elo-style ratings for the content at each difficulty
+DIFFICULTY_RATINGS = {
+    'beginner': 800.0,
+    'intermediate': 1200.0,
+    'advanced': 1600.0,
+}
+
+# Rating of a learner with no results on a topic yet
+INITIAL_RATING = 1000.0
+
+Key = Tuple[int, str]
+
+@lru_cache(maxsize=4096)
+def topic_key(topic: str) -> str:
+    """Canonical key so rephrased topics share one skill estimate."""
+    return (canonical_key(topic) or topic.strip().lower())[:200]
+
+def expected_score(rating: float, difficulty: str) -> float:
+    """Probability of success for a learner with `rating` at a difficulty."""
+    return 1.0 / (1.0 + 10 ** ((DIFFICULTY_RATINGS[difficulty] - rating) / 400.0))
+
+def normalize_score(score: float) -> float:
+    """Scores arrive as percentages or fractions; map them to 0..1."""
+    score = float(score)
+    if score > 1.0:
+        score /= 100.0
+    return min(max(score, 0.0), 1.0)
+
+
+class AdaptiveDifficultyEngine:
+    """Elo-style skill tracking with an in-memory LRU table and batched persistence.
+
+    `recommend` and `record_result` touch a single table entry, so both are
+    O(1); a miss costs one indexed lookup through `loader`, made outside the
+    lock so it does not stall other keys. Changes are queued as
+    (rating change, attempts) deltas that survive LRU eviction, and are
+    written back through `saver` in one batch at most every `flush_interval`
+    seconds, rather than once per quiz. Saving deltas rather than absolute
+    values lets several processes update the same estimate without
+    overwriting each other's attempts.
+    """
+
+    def __init__(self, capacity: int = 100_000, flush_interval: float = 30.0,
+                 target_success: float = 0.7, initial_rating: float = INITIAL_RATING,
+                 loader: Optional[Callable[[Key], Optional[Tuple[float, int]]]] = None,
+                 saver: Optional[Callable[[Dict[Key, Tuple[float, int]]], None]] = None):
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.target_success = target_success
+        self.initial_rating = initial_rating
+        self.loader = loader
+        self.saver = saver
+        self._lock = threading.Lock()
+        self._table: 'OrderedDict[Key, list]' = OrderedDict()  # key -> [rating, attempts]
+        self._dirty: Dict[Key, Tuple[float, int]] = {}  # key -> (rating change, attempts) not yet saved
+        self._last_flush = time.monotonic()
+
+    def _load(self, key: Key) -> Optional[Tuple[float, int]]:
+        """Stored estimate for a key that is not in memory. Runs without the lock."""
+        with self._lock:
+            if key in self._table or self.loader is None:
+                return None
+        return self.loader(key)
+
+    def _entry(self, key: Key, stored: Optional[Tuple[float, int]]) -> list:
+        """Table entry for a key, created from `stored` on a miss. Call with the lock held."""
+        entry = self._table.get(key)
+        if entry is not None:
+            # Also covers another thread having loaded the key while we queried
+            self._table.move_to_end(key)
+            return entry
+        rating, attempts = stored or (self.initial_rating, 0)
+        # Changes made before the entry was evicted have not been saved yet
+        change, pending = self._dirty.get(key, (0.0, 0))
+        entry = [rating + change, attempts + pending]
+        self._table[key] = entry
+        if len(self._table) > self.capacity:
+            # Unflushed changes of the evicted entry are still queued in _dirty
+            self._table.popitem(last=False)
+        return entry
+
+    def estimate(self, user_id: int, topic: str) -> Tuple[float, int]:
+        """Current (rating, attempts) for a user on a topic."""
+        key = (user_id, topic_key(topic))
+        stored = self._load(key)
+        with self._lock:
+            rating, attempts = self._entry(key, stored)
+            return rating, attempts
+
+    def recommend(self, user_id: int, topic: str) -> str:
+        """Difficulty whose expected success rate is closest to the target."""
+        rating, _ = self.estimate(user_id, topic)
+        return min(
+            DIFFICULTY_RATINGS,
+            key=lambda difficulty: abs(expected_score(rating, difficulty) - self.target_success)
+        )
+
+    def record_result(self, user_id: int, topic: str, score: float, difficulty: Optional[str] = None) -> float:
+        """Fold a quiz result into the skill estimate and return the new rating."""
+        if difficulty not in DIFFICULTY_RATINGS:
+            difficulty = 'intermediate'
+        key = (user_id, topic_key(topic))
+        stored = self._load(key)
+        with self._lock:
+            entry = self._entry(key, stored)
+            rating, attempts = entry
+            # Move quickly while the estimate is new, then settle
+            k_factor = max(16.0, 64.0 / (1.0 + attempts / 5.0))
+            entry[0] = rating + k_factor * (normalize_score(score) - expected_score(rating, difficulty))
+            entry[1] = attempts + 1
+            change, pending = self._dirty.get(key, (0.0, 0))
+            self._dirty[key] = (change + entry[0] - rating, pending + 1)
+            new_rating = entry[0]
+        self.maybe_flush()
+        return new_rating
+
+    def maybe_flush(self) -> bool:
+        """Persist changed estimates if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return False
+        self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Persist all changed estimates now. Returns how many were written."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            dirty, self._dirty = self._dirty, {}
+        if not dirty or self.saver is None:
+            return 0
+        try:
+            self.saver(dirty)
+        except Exception as e:
+            logger.error("Failed to persist %d skill estimates: %s", len(dirty), e)
+            with self._lock:
+                for key, (change, pending) in dirty.items():
+                    newer_change, newer_pending = self._dirty.get(key, (0.0, 0))
+                    self._dirty[key] = (change + newer_change, pending + newer_pending)
+            return 0
+        return len(dirty)
+
+    def clear(self) -> None:
+        """Drop all in-memory state without persisting it."""
+        with self._lock:
+            self._table.clear()
+            self._dirty.clear()
+
+
+def load_skill_estimate(key: Key) -> Optional[Tuple[float, int]]:
+    """Read one stored estimate."""
+    user_id, key_topic = key
+    row = db.session.query(SkillEstimate.rating, SkillEstimate.attempts).filter_by(
+        user_id=user_id, topic_key=key_topic
+    ).first()
+    return (row[0], row[1]) if row else None
+
+def save_skill_estimates(changes: Dict[Key, Tuple[float, int]]) -> None:
+    """Add (rating change, attempts) deltas to the stored estimates in one transaction.
+
+    Each row is one INSERT ... ON CONFLICT DO UPDATE that adds to the stored
+    values, so workers saving the same estimate do not overwrite each other.
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'topic_key': key_topic,
+        'rating': INITIAL_RATING + change,
+        'attempts': attempts,
+        'updated_at': now,
+    } for (user_id, key_topic), (change, attempts) in changes.items()]
+    stored = SkillEstimate.__table__.c
+    statement = sqlite_insert(SkillEstimate)
+    new = statement.excluded
+    try:
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id', 'topic_key'],
+            set_={
+                'rating': stored.rating + (new.rating - INITIAL_RATING),
+                'attempts': stored.attempts + new.attempts,
+                'updated_at': new.updated_at,
+            }
+        ), rows)
+        db.session.commit()
+    except Exception:
+        # Flushes run inside request sessions; leave them usable for the rest of the request
+        db.session.rollback()
+        raise
+
+def _flush_on_exit(engine: AdaptiveDifficultyEngine, app) -> None:
+    """Save pending changes when the process exits, e.g. on a deploy or worker restart."""
+    with app.app_context() if app is not None else nullcontext():
+        engine.flush()
+
+_engine: Optional[AdaptiveDifficultyEngine] = None
+
+def get_engine() -> AdaptiveDifficultyEngine:
+    """Get the shared engine, persisting through the application database."""
+    global _engine
+    if _engine is None:
+        _engine = AdaptiveDifficultyEngine(
+            capacity=ADAPTIVE_CONFIG['CACHE_SIZE'],
+            flush_interval=ADAPTIVE_CONFIG['FLUSH_INTERVAL_SECONDS'],
+            target_success=ADAPTIVE_CONFIG['TARGET_SUCCESS_RATE'],
+            loader=load_skill_estimate,
+            saver=save_skill_estimates,
+        )
+        app = current_app._get_current_object() if has_app_context() else None
+        atexit.register(_flush_on_exit, _engine, app)
+    return _engine
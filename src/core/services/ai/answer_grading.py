@@ -0,0 +1,293 @@
+"""Local answer-equivalence checks so get_feedback only asks the LLM about unclear answers.
+
+An answer is compared with the expected one after normalization (case,
+whitespace, LaTeX delimiters), by option letter when the options are known,
+and numerically or symbolically for simple math expressions. Clear matches
+and clear mismatches get templated feedback; everything else is AMBIGUOUS
+and escalated.
+"""
+import ast
+import math
+import random
+import re
+from typing import Dict, List, Optional, Tuple
+
+CORRECT = 'correct'
+INCORRECT = 'incorrect'
+AMBIGUOUS = 'ambiguous'
+
+MAX_EXPRESSION_LENGTH = 120
+MAX_EXPONENT = 64
+SYMBOLIC_TRIALS = 6
+ABS_TOLERANCE = 1e-9
+REL_TOLERANCE = 1e-9
+
+FEEDBACK_TEMPLATES = {
+    CORRECT: "Correct! Your answer \"{answer}\" matches the expected answer.",
+    INCORRECT: "Not quite. You answered \"{answer}\", but the correct answer is \"{correct_answer}\". "
+               "Review the steps and try a similar question.",
+}
+
+_LEADING_PHRASES = re.compile(r'^(?:the\s+)?(?:final\s+)?(?:answer|solution)\s*(?:is|:|=)\s*', re.IGNORECASE)
+_OPTION_LETTER = re.compile(r'^(?:option\s+)?\(?([a-h])\)?[.):]?$', re.IGNORECASE)
+_OPTION_PREFIX = re.compile(r'^\(?[a-h][.)]\s+', re.IGNORECASE)
+_LATEX_DELIMITERS = re.compile(r'\$\$?|\\[()\[\]]')
+_LATEX_COMMAND = re.compile(r'\\([a-z]+)')
+_ARTICLE = re.compile(r'^(?:the|a|an)\s+')
+_LATEX_FRAC = re.compile(r'\\[dt]?frac\s*\{([^{}]*)\}\s*\{([^{}]*)\}')
+_LATEX_SQRT = re.compile(r'\\sqrt\s*\{([^{}]*)\}')
+_LATEX_SPACING = re.compile(r'\\[,;:! ]|\\left|\\right|\\quad')
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d{3}\b)')
+_IMPLICIT_NUMBER = re.compile(r'(\d|\))\s*(?=[a-z(])')
+_IMPLICIT_VARIABLE = re.compile(r'(?<![a-z])([a-z])\s*(?=\()')
+_EQUATION = re.compile(r'^([a-z])\s*=\s*(.+)$')
+
+_LATEX_SYMBOLS = {
+    '\\cdot': '*', '\\times': '*', '\\div': '/', '\\pi': 'pi', '\\infty': 'inf',
+    '×': '*', '·': '*', '÷': '/', '−': '-', 'π': 'pi', '√': 'sqrt',
+}
+_FUNCTIONS = {
+    'sqrt': math.sqrt, 'abs': abs, 'ln': math.log, 'log': math.log10, 'exp': math.exp,
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+}
+_CONSTANTS = {'pi': math.pi, 'e': math.e}
+_BINARY = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+}
+
+
+def normalize_answer(text) -> str:
+    """Case-, whitespace- and delimiter-insensitive form of an answer."""
+    text = _LATEX_DELIMITERS.sub('', str(text or ''))
+    text = _LEADING_PHRASES.sub('', text.strip())
+    text = ' '.join(text.casefold().split())
+    return text.strip(' .;"\'')
+
+
+def _compact(text: str) -> str:
+    """Normalized answer without articles, spaces or LaTeX command backslashes."""
+    return _LATEX_COMMAND.sub(r'\1', _ARTICLE.sub('', text)).replace(' ', '')
+
+
+def _to_expression(text: str) -> Optional[str]:
+    """Rewrite a LaTeX/plain math answer as Python expression source, or None."""
+    text = normalize_answer(text)
+    if not text or len(text) > MAX_EXPRESSION_LENGTH:
+        return None
+    for symbol, replacement in _LATEX_SYMBOLS.items():
+        text = text.replace(symbol, replacement)
+    text = _LATEX_SPACING.sub('', text)
+    for _ in range(4):  # nested fractions and roots, innermost first
+        text = _LATEX_FRAC.sub(r'((\1)/(\2))', text)
+        text = _LATEX_SQRT.sub(r'sqrt(\1)', text)
+    if '\\' in text:
+        return None
+    text = _THOUSANDS.sub('', text).replace('{', '(').replace('}', ')').replace('^', '**')
+    text = re.sub(r'(\d+(?:\.\d+)?)\s*%', r'(\1/100)', text)
+    text = _IMPLICIT_NUMBER.sub(r'\1*', text)
+    text = _IMPLICIT_VARIABLE.sub(r'\1*', text)
+    return text
+
+
+def _parse(text: str) -> Optional[Tuple[ast.AST, frozenset]]:
+    """Parse a simple math expression; returns (tree, free variables) or None."""
+    source = _to_expression(text)
+    if source is None:
+        return None
+    try:
+        tree = ast.parse(source, mode='eval').body
+    except (SyntaxError, ValueError):
+        return None
+    variables = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id in _FUNCTIONS or node.id in _CONSTANTS:
+                continue
+            if len(node.id) != 1:
+                return None
+            variables.add(node.id)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS \
+                    or len(node.args) != 1 or node.keywords:
+                return None
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                return None
+        elif not isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Load, ast.operator, ast.unaryop)):
+            return None
+    return tree, frozenset(variables)
+
+
+def _evaluate(node: ast.AST, env: Dict[str, float]) -> float:
+    if isinstance(node, ast.Constant):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return env[node.id] if node.id in env else _CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp):
+        value = _evaluate(node.operand, env)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Call):
+        return float(_FUNCTIONS[node.func.id](_evaluate(node.args[0], env)))
+    if isinstance(node, ast.BinOp):
+        left, right = _evaluate(node.left, env), _evaluate(node.right, env)
+        if isinstance(node.op, ast.Pow):
+            if abs(right) > MAX_EXPONENT:
+                raise OverflowError("exponent too large")
+            return float(left ** right)
+        if type(node.op) in _BINARY:
+            return _BINARY[type(node.op)](left, right)
+    raise ValueError("unsupported expression")
+
+
+def _safe_evaluate(tree: ast.AST, env: Dict[str, float]) -> Optional[float]:
+    try:
+        value = _evaluate(tree, env)
+    except (ArithmeticError, ValueError, TypeError, KeyError):
+        return None
+    if isinstance(value, complex) or math.isnan(value) or math.isinf(value):
+        return None
+    return value
+
+
+def _close(a: float, b: float) -> bool:
+    return math.isclose(a, b, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE)
+
+
+def _strip_equation(text: str) -> Tuple[Optional[str], str]:
+    """Split "x = 2" into ("x", "2"); other answers have no variable."""
+    match = _EQUATION.match(normalize_answer(text))
+    if match and '=' not in match.group(2):
+        return match.group(1), match.group(2)
+    return None, text
+
+
+def compare_math(answer: str, correct_answer: str, near_miss: float = 0.01) -> Optional[Tuple[str, str]]:
+    """Numeric or symbolic comparison; None when either side is not a simple expression."""
+    answer_var, answer = _strip_equation(answer)
+    correct_var, correct_answer = _strip_equation(correct_answer)
+    if answer_var and correct_var and answer_var != correct_var:
+        return None
+    parsed_answer, parsed_correct = _parse(answer), _parse(correct_answer)
+    if parsed_answer is None or parsed_correct is None:
+        return None
+    (answer_tree, answer_vars), (correct_tree, correct_vars) = parsed_answer, parsed_correct
+
+    if not answer_vars and not correct_vars:
+        got, expected = _safe_evaluate(answer_tree, {}), _safe_evaluate(correct_tree, {})
+        if got is None or expected is None:
+            return None
+        if _close(got, expected):
+            return CORRECT, 'numeric'
+        # A plain decimal that is the expected value correctly rounded
+        literal = normalize_answer(answer).replace(',', '')
+        if re.fullmatch(r'-?\d+\.\d{2,}', literal):
+            if round(expected, len(literal.split('.')[1])) == got:
+                return CORRECT, 'rounded'
+        if abs(got - expected) <= near_miss * max(abs(expected), ABS_TOLERANCE):
+            return None  # close enough that the intent is unclear
+        return INCORRECT, 'numeric'
+
+    if answer_vars != correct_vars or len(answer_vars) > 3:
+        return None
+    # Compare at fixed pseudo-random points; distinct simple expressions almost never agree everywhere
+    rng = random.Random(1)
+    agreed = 0
+    for _ in range(SYMBOLIC_TRIALS):
+        env = {name: rng.uniform(0.5, 3.5) for name in answer_vars}
+        got, expected = _safe_evaluate(answer_tree, env), _safe_evaluate(correct_tree, env)
+        if got is None or expected is None:
+            continue
+        if not math.isclose(got, expected, rel_tol=1e-7, abs_tol=1e-9):
+            return INCORRECT, 'symbolic'
+        agreed += 1
+    return (CORRECT, 'symbolic') if agreed >= SYMBOLIC_TRIALS // 2 else None
+
+
+def _option_index(text: str, options: List[str]) -> Optional[int]:
+    """Index of the option an answer refers to, by letter or by its text."""
+    normalized = normalize_answer(text)
+    match = _OPTION_LETTER.match(normalized)
+    if match:
+        index = ord(match.group(1).lower()) - ord('a')
+        return index if index < len(options) else None
+    normalized = _OPTION_PREFIX.sub('', normalized)
+    for index, option in enumerate(options):
+        if _OPTION_PREFIX.sub('', normalize_answer(option)) == normalized:
+            return index
+    return None
+
+
+def grade_answer(answer, correct_answer, options: Optional[List] = None, near_miss: float = 0.01) -> Dict:
+    """Grade an answer locally.
+
+    Returns {'verdict': CORRECT | INCORRECT | AMBIGUOUS, 'method': str}.
+    """
+    if not normalize_answer(answer):
+        return {'verdict': INCORRECT, 'method': 'empty'}
+    if options and isinstance(options, list):
+        options = [str(option) for option in options]
+        answer_index, correct_index = _option_index(answer, options), _option_index(correct_answer, options)
+        if answer_index is not None and correct_index is not None:
+            return {'verdict': CORRECT if answer_index == correct_index else INCORRECT, 'method': 'option'}
+        # Compare the option text a bare letter stands for
+        if answer_index is not None and _OPTION_LETTER.match(normalize_answer(answer)):
+            answer = _OPTION_PREFIX.sub('', options[answer_index])
+        if correct_index is not None and _OPTION_LETTER.match(normalize_answer(correct_answer)):
+            correct_answer = _OPTION_PREFIX.sub('', options[correct_index])
+
+    normalized, expected = normalize_answer(answer), normalize_answer(correct_answer)
+    if normalized == expected or _compact(normalized) == _compact(expected):
+        return {'verdict': CORRECT, 'method': 'normalized'}
+
+    result = compare_math(answer, correct_answer, near_miss)
+    if result is not None:
+        return {'verdict': result[0], 'method': result[1]}
+    return {'verdict': AMBIGUOUS, 'method': 'none'}
+
+
+def templated_feedback(verdict: str, answer: str, correct_answer: str, explanation: Optional[str] = None) -> str:
+    """Feedback text for a locally graded answer."""
+    feedback = FEEDBACK_TEMPLATES[verdict].format(answer=str(answer).strip(), correct_answer=str(correct_answer).strip())
+    if explanation:
+        feedback = f"{feedback} {str(explanation).strip()}"
+    return feedback
+
+
+def grade_quiz(questions: List[Dict], answers: List, near_miss: float = 0.01) -> List[Dict]:
+    """Grade every answer of a stored quiz in one pass.
+
+    Multiple-choice answers that match no option are AMBIGUOUS and count as wrong.
+    """
+    results = []
+    for index, question in enumerate(questions):
+        answer = answers[index] if index < len(answers) else None
+        grade = grade_answer(answer, question.get('correct_answer'), question.get('options'), near_miss)
+        results.append({
+            'index': index,
+            'answer': answer,
+            'correct': grade['verdict'] == CORRECT,
+            'verdict': grade['verdict'],
+            'correct_answer': question.get('correct_answer'),
+            'explanation': question.get('explanation'),
+        })
+    return results
+
+
+def get_quiz_feedback_prompt(topic: str, questions: List[Dict], wrong: List[Dict]) -> List[Dict]:
+    """One prompt asking for feedback on every wrong answer of a quiz."""
+    items = '\n'.join(
+        f"{result['index']}. Question: {questions[result['index']].get('question')}\n"
+        f"   Student answer: {result['answer']}\n   Correct answer: {result['correct_answer']}"
+        for result in wrong
+    )
+    return [
+        {"role": "system", "content": "You are an encouraging tutor providing constructive feedback. "
+                                      "Return the response in JSON format with the following structure: "
+                                      "{\"feedback\": [{\"index\": 0, \"feedback\": \"...\"}]}"},
+        {"role": "user", "content": f"A student took a quiz about {topic}. For each numbered question below, "
+                                    "explain briefly why their answer is wrong and how to reach the correct one."
+                                    f"\n\n{items}"}
+    ]
@@ -0,0 +1,364 @@
+"""Lesson and quiz generation shared by the API routes and background job workers."""
+import hashlib
+import json
+import logging
+from typing import Dict, Iterator, List, Optional
+from src.core.models.database import db
+from src.core.models.search_history import SearchHistory
+from src.core.utils.openai_client import get_openai_response
+from src.core.utils.structured_logging import log_payload
+from src.core.utils.json_provider import RawJSON, dumps_bytes, loads
+from src.core.services.ai.lesson_cache import find_cached_lesson, remember_lesson
+from src.core.services.ai.subject_classifier import classify_subject
+from src.core.services.ai.sectioned_lessons import assemble_sections, generate_sectioned_content, iter_lesson_sections
+from src.core.services.ai.question_bank import add_questions, draw_unseen_questions, mark_seen
+from src.core.services.llm_scheduler import LLMQueueTimeout, Priority
+from src.core.services.ai.model_router import LESSON, QUIZ
+from src.core.services.lesson_sections import save_lesson_sections
+from src.core.services.ai.token_budget import TokenBudgetError
+from src.core.services.lesson_renderer import (
+    get_rendered_lesson,
+    render_lesson,
+    rendered_from_row,
+    save_rendered_lesson,
+)
+from src.config.settings import (
+    LESSON_CACHE_CONFIG,
+    LESSON_SECTIONS_CONFIG,
+    QUESTION_BANK_CONFIG,
+    RENDER_CONFIG,
+    SECTIONED_LESSON_CONFIG,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationError(Exception):
+    """A generation step failed; `status` is the HTTP status to report."""
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.status = status
+
+
+def get_lesson_prompt(topic, difficulty, subject_type):
+    """Get the prompt for lesson generation."""
+    return [
+        {"role": "system", "content": f"You are an expert {subject_type} tutor. Create a detailed lesson about {topic} for {difficulty} level students."},
+        {"role": "user", "content": f"Please create a lesson about {topic} that is suitable for {difficulty} level students. Include examples and explanations."}
+    ]
+
+def get_quiz_prompt(topic, difficulty, subject_type, question_count=5):
+    """Get the prompt for quiz generation."""
+    return [
+        {"role": "system", "content": f"You are an expert {subject_type} tutor. Create a quiz about {topic} for {difficulty} level students. Return the response in JSON format with the following structure: {{\"questions\": [{{\"question\": \"...\", \"options\": [\"A\", \"B\", \"C\", \"D\"], \"correct_answer\": \"...\", \"explanation\": \"...\"}}]}}"},
+        {"role": "user", "content": f"Please create a quiz about {topic} that is suitable for {difficulty} level students. Include {question_count} multiple choice questions with answers. Format your response as a valid JSON object."}
+    ]
+
+def format_latex_content(content):
+    if not content:
+        return content
+
+    try:
+        content = (
+            content
+            .replace('\\\\', '\\')
+            .replace(' $ ', '$')
+            .replace(' $$ ', '$$')
+            .replace('\n$$', '\n\n$$\n\n')
+            .replace('\\frac', '\\\\frac')
+            .replace('\\sqrt', '\\\\sqrt')
+            .replace('\\sum', '\\\\sum')
+            .replace('\\int', '\\\\int')
+        )
+
+        return content
+    except Exception as e:
+        logger.error("Error formatting LaTeX content: %s", e)
+        return content
+
+def format_lesson_content(content):
+    if not content:
+        return content
+
+    try:
+        content = (
+            content
+            .replace('\\_', '_')
+            .replace('\\*', '*')
+            .replace('\\-', '-')
+            .replace('\\#', '#')
+            .replace('\\[', '[')
+            .replace('\\]', ']')
+            .replace('\\(', '(')
+            .replace('\\)', ')')
+            .replace('\n\n\n', '\n\n')
+            .replace('\n\n#', '\n#')
+            .replace('\n- ', '\n\n- ')
+            .replace('\n  - ', '\n- ')
+            .replace('\n1. ', '\n\n1. ')
+        )
+
+        content = (
+            content
+            .replace('\\\\', '\\')
+            .replace(' $', '$')
+            .replace('$ ', '$')
+            .replace('\n$$', '\n\n$$')
+            .replace('$$\n', '$$\n\n')
+        )
+
+        import re
+        content = re.sub(r'\\(?![a-zA-Z{])', '', content)
+        
+        latex_commands = [
+            'frac', 'sqrt', 'sum', 'int', 'prod', 'lim',
+            'alpha', 'beta', 'gamma', 'delta', 'theta',
+            'pi', 'sigma', 'omega', 'infty', 'cdot',
+            'times', 'div', 'pm', 'mp', 'leq', 'geq',
+            'neq', 'approx', 'equiv', 'rightarrow'
+        ]
+        
+        for cmd in latex_commands:
+            content = re.sub(f'(?<!\\\\){cmd}(?={{|\\s|\\()', f'\\{cmd}', content)
+            content = content.replace(f'\\\\{cmd}', f'\\{cmd}')
+
+        return content.strip()
+    except Exception as e:
+        logger.error("Error formatting lesson content: %s", e)
+        return content.strip()
+
+def prompt_hash(kind: str, messages: List[Dict]) -> str:
+    """Stable key for identical generation requests."""
+    canonical = json.dumps([kind, messages], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def produce_lesson(topic: str, difficulty: str, user_id: Optional[int] = None,
+                   priority: Priority = Priority.INTERACTIVE) -> Dict:
+    """Get lesson content (from the near-duplicate cache or the LLM) and its render.
+
+    Returns a draft that `save_lesson` can store for any number of users.
+    """
+    # Serve a near-duplicate lesson if one was already generated
+    cached_lesson = None
+    if LESSON_CACHE_CONFIG['ENABLED']:
+        cached_lesson = find_cached_lesson(topic, difficulty)
+
+    if cached_lesson:
+        lesson_content = cached_lesson.content
+    else:
+        # Get subject type for specialized prompts
+        subject_type = classify_subject(topic)
+        logger.debug("Subject type determined: %s", subject_type)
+
+        try:
+            if SECTIONED_LESSON_CONFIG['ENABLED']:
+                lesson_content = generate_sectioned_content(topic, difficulty, subject_type, user_id, priority)
+            else:
+                # Generate lesson content
+                prompt = get_lesson_prompt(topic, difficulty, subject_type)
+                log_payload(logger, "Lesson prompt", prompt)
+                lesson_content = get_openai_response(prompt, user_id=user_id, priority=priority,
+                                                     route=LESSON, difficulty=difficulty)
+        except LLMQueueTimeout as e:
+            raise GenerationError(str(e), status=503)
+        except TokenBudgetError as e:
+            raise GenerationError(str(e), status=e.status)
+
+    return build_lesson_draft(lesson_content, cached_lesson)
+
+def build_lesson_draft(lesson_content: str, cached_lesson=None) -> Dict:
+    """Format and render lesson content into a draft for `save_lesson`."""
+    if not lesson_content:
+        logger.error("Empty lesson content received from OpenAI")
+        raise GenerationError("Failed to generate lesson content")
+
+    # Format and render once; a cached lesson reuses its stored render
+    rendered = None
+    if RENDER_CONFIG['ENABLED']:
+        source = get_rendered_lesson(cached_lesson.id) if cached_lesson else None
+        if source:
+            rendered = rendered_from_row(source)
+        else:
+            rendered = render_lesson(format_lesson_content(lesson_content))
+        formatted_lesson = rendered['markdown']
+    else:
+        formatted_lesson = format_lesson_content(lesson_content)
+
+    return {
+        'content': lesson_content,
+        'formatted': formatted_lesson,
+        'rendered': rendered,
+        'cached': cached_lesson is not None,
+    }
+
+def stream_lesson(user_id: int, topic: str, difficulty: str) -> Iterator[Dict]:
+    """Generate a lesson section by section, yielding each one as it finishes.
+
+    Ends with a {"type": "lesson"} event carrying the saved lesson, the same
+    body the non-streaming endpoint returns. A cached lesson skips straight
+    to that event.
+    """
+    cached_lesson = find_cached_lesson(topic, difficulty) if LESSON_CACHE_CONFIG['ENABLED'] else None
+    if cached_lesson:
+        draft = build_lesson_draft(cached_lesson.content, cached_lesson)
+    else:
+        titles, sections = [], {}
+        try:
+            for event in iter_lesson_sections(topic, difficulty, classify_subject(topic), user_id):
+                if event['type'] == 'outline':
+                    titles = event['sections']
+                else:
+                    sections[event['index']] = event['content']
+                yield event
+        except LLMQueueTimeout as e:
+            raise GenerationError(str(e), status=503)
+        except TokenBudgetError as e:
+            raise GenerationError(str(e), status=e.status)
+        draft = build_lesson_draft(assemble_sections(topic, titles, sections))
+    yield {'type': 'lesson', **save_lesson(user_id, topic, difficulty, draft)}
+
+def save_lesson(user_id: int, topic: str, difficulty: str, draft: Dict) -> Dict:
+    """Store a lesson draft in the user's history and build the API response."""
+    history_id = None
+    try:
+        history = SearchHistory(
+            user_id=user_id,
+            topic=topic,
+            difficulty=difficulty,
+            content_type='lesson',
+            content=draft['content']
+        )
+        db.session.add(history)
+        db.session.flush()
+        if draft['rendered']:
+            save_rendered_lesson(history.id, draft['rendered'])
+        if LESSON_SECTIONS_CONFIG['ENABLED']:
+            try:
+                with db.session.begin_nested():
+                    save_lesson_sections(history.id, draft['content'])
+            except Exception as section_error:
+                # The index is rebuilt on first section request; keep the lesson itself
+                logger.warning("Could not index lesson sections for %s: %s", history.id, section_error)
+        db.session.commit()
+        if not draft['cached'] and not draft.get('remembered'):
+            # Index only the first copy when one draft is saved for several users
+            remember_lesson(history)
+            draft['remembered'] = True
+        history_id = history.id
+        logger.info("Lesson saved to history with ID: %s", history_id)
+    except Exception as db_error:
+        logger.error("Database error saving lesson: %s", db_error)
+        db.session.rollback()
+        # Continue even if history save fails
+
+    return {
+        "lesson": draft['formatted'],
+        "history_id": history_id,
+        "cached": draft['cached'],
+        "difficulty": difficulty
+    }
+
+def generate_lesson(user_id: int, topic: str, difficulty: str) -> Dict:
+    """Generate (or reuse) a lesson and save it to the user's history."""
+    return save_lesson(user_id, topic, difficulty, produce_lesson(topic, difficulty, user_id))
+
+def produce_quiz_questions(topic: str, difficulty: str, count: int, user_id: Optional[int] = None,
+                           priority: Priority = Priority.INTERACTIVE) -> List[Dict]:
+    """Ask the LLM for `count` questions, with LaTeX cleaned up for math and science."""
+    subject_type = classify_subject(topic)
+    logger.debug("Quiz subject type determined: %s", subject_type)
+
+    prompt = get_quiz_prompt(topic, difficulty, subject_type, question_count=count)
+    log_payload(logger, "Quiz prompt", prompt)
+
+    try:
+        quiz_content = get_openai_response(prompt, user_id=user_id, priority=priority,
+                                           route=QUIZ, difficulty=difficulty)
+    except LLMQueueTimeout as e:
+        raise GenerationError(str(e), status=503)
+    except TokenBudgetError as e:
+        raise GenerationError(str(e), status=e.status)
+    except Exception as openai_error:
+        logger.exception("OpenAI API error: %s", openai_error)
+        raise GenerationError(str(openai_error))
+
+    try:
+        quiz_json = loads(quiz_content)
+    except json.JSONDecodeError as json_error:
+        logger.error("JSON parsing error: %s", json_error)
+        log_payload(logger, "Invalid JSON content", quiz_content, level=logging.ERROR, sampled=False)
+        raise GenerationError('Invalid quiz format - failed to parse JSON')
+
+    if 'questions' not in quiz_json:
+        logger.error("Invalid quiz format - missing 'questions' key")
+        log_payload(logger, "Invalid quiz content", quiz_content, level=logging.ERROR, sampled=False)
+        raise GenerationError('Invalid quiz format - missing questions')
+
+    generated = quiz_json['questions']
+    if subject_type in ['math', 'science']:
+        for question in generated:
+            question['question'] = format_latex_content(question['question'])
+            question['options'] = [format_latex_content(opt) for opt in question['options']]
+            question['correct_answer'] = format_latex_content(question['correct_answer'])
+            if 'explanation' in question:
+                question['explanation'] = format_latex_content(question['explanation'])
+    return generated
+
+def assemble_quiz(user_id: int, topic: str, difficulty: str, fresh: bool = False,
+                  generated: Optional[List[Dict]] = None) -> Dict:
+    """Build a quiz from unseen bank questions plus new ones, and save it to history.
+
+    `generated` supplies already-produced questions (e.g. from a shared job);
+    otherwise the LLM is asked only for what the bank cannot cover.
+    """
+    use_bank = QUESTION_BANK_CONFIG['ENABLED'] and not fresh
+    quiz_size = QUESTION_BANK_CONFIG['QUIZ_SIZE']
+
+    # Serve questions this user has not seen yet from the bank first
+    bank_questions = []
+    if use_bank:
+        bank_questions = draw_unseen_questions(user_id, topic, difficulty, quiz_size)
+    questions = [q.to_question() for q in bank_questions]
+
+    # Only ask the LLM for the questions the bank could not supply
+    missing = quiz_size - len(questions)
+    new_questions = []
+    if missing > 0:
+        if generated is None:
+            generated = produce_quiz_questions(topic, difficulty, missing, user_id)
+        new_questions = generated[:missing]
+        questions.extend(new_questions)
+
+    # Serialize once; the stored history content and the response share these bytes
+    questions_json = dumps_bytes(questions)
+
+    # Save to search history
+    history_id = None
+    try:
+        if use_bank:
+            question_ids = [q.id for q in bank_questions]
+            question_ids.extend(add_questions(topic, difficulty, new_questions))
+            mark_seen(user_id, question_ids)
+        history = SearchHistory(
+            user_id=user_id,
+            topic=topic,
+            difficulty=difficulty,
+            content_type='quiz',
+            content=(b'{"questions":' + questions_json + b'}').decode('utf-8')
+        )
+        db.session.add(history)
+        db.session.commit()
+        history_id = history.id
+        logger.info("Quiz saved to history with ID: %s (%d questions from bank)", history_id, len(bank_questions))
+    except Exception as db_error:
+        logger.error("Database error saving quiz: %s", db_error)
+        db.session.rollback()
+        # Continue even if history save fails
+
+    return {
+        "questions": RawJSON(questions_json),
+        "history_id": history_id,
+        "difficulty": difficulty,
+        "from_bank": len(bank_questions)
+    }
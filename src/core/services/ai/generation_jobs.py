@@ -0,0 +1,139 @@
+"""Run lesson and quiz generation as background jobs."""
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from src.config.settings import JOBS_CONFIG, QUESTION_BANK_CONFIG
+from src.core.models.database import db
+from src.core.services.ai.generation import (
+    GenerationError,
+    assemble_quiz,
+    get_lesson_prompt,
+    get_quiz_prompt,
+    produce_lesson,
+    produce_quiz_questions,
+    prompt_hash,
+    save_lesson,
+)
+from src.core.services.ai import quiz_prefetch
+from src.core.services.ai.subject_classifier import classify_subject
+from src.core.services.job_queue import LEASE_LOST, RUNNING, JobQueue
+from src.core.services.llm_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ('lesson', 'quiz', quiz_prefetch.JOB_KIND)
+
+_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Get the shared job queue."""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(
+            JOBS_CONFIG['DB_PATH'],
+            visibility_timeout=JOBS_CONFIG['VISIBILITY_TIMEOUT'],
+            max_attempts=JOBS_CONFIG['MAX_ATTEMPTS'],
+        )
+    return _queue
+
+def set_job_queue(queue: Optional[JobQueue]) -> None:
+    """Replace the shared job queue (tests use a temporary database)."""
+    global _queue
+    _queue = queue
+
+def enqueue_generation(kind: str, user_id: int, topic: str, difficulty: str, fresh: bool = False) -> Tuple[str, bool]:
+    """Queue a generation job, sharing it with identical in-flight requests."""
+    subject_type = classify_subject(topic)
+    if kind == 'lesson':
+        dedupe_key = prompt_hash(kind, get_lesson_prompt(topic, difficulty, subject_type))
+    else:
+        prompt = get_quiz_prompt(topic, difficulty, subject_type, QUESTION_BANK_CONFIG['QUIZ_SIZE'])
+        dedupe_key = prompt_hash(f"{kind}:fresh" if fresh else kind, prompt)
+    payload = {'topic': topic, 'difficulty': difficulty, 'fresh': fresh}
+    return get_job_queue().enqueue(kind, payload, user_id, dedupe_key=dedupe_key)
+
+def run_job(queue: JobQueue, job: Dict, owner: str) -> None:
+    """Generate once, then save a copy to each waiting user's history."""
+    job_id = job['id']
+    payload = job['payload']
+    topic, difficulty = payload['topic'], payload['difficulty']
+    # The LLM call is shared, so it is queued as the user who started the job
+    waiters = queue.pending_waiters(job_id)
+    requester_id = waiters[0] if waiters else None
+    try:
+        if job['kind'] == 'lesson':
+            draft = produce_lesson(topic, difficulty, requester_id, Priority.BACKGROUND)
+
+            def save(user_id):
+                lesson = save_lesson(user_id, topic, difficulty, draft)
+                if quiz_prefetch.schedule_quiz_prefetch(queue, user_id, lesson['history_id'], topic, difficulty):
+                    lesson['quiz_prefetch'] = True
+                return lesson
+        elif job['kind'] == 'quiz':
+            questions = produce_quiz_questions(topic, difficulty, QUESTION_BANK_CONFIG['QUIZ_SIZE'],
+                                               requester_id, Priority.BACKGROUND)
+
+            def save(user_id):
+                return assemble_quiz(user_id, topic, difficulty, payload.get('fresh', False),
+                                     generated=[dict(q) for q in questions])
+        elif job['kind'] == quiz_prefetch.JOB_KIND:
+            prefetched = quiz_prefetch.run_quiz_prefetch(payload, requester_id)
+
+            def save(user_id):
+                return prefetched
+        else:
+            queue.fail(job_id, owner, f"Unknown job kind: {job['kind']}", retry=False)
+            return
+
+        # Waiters can join until the job is marked complete
+        outcome = RUNNING
+        while outcome == RUNNING:
+            for user_id in queue.pending_waiters(job_id):
+                # Renewing first keeps another worker from reclaiming the job mid-save
+                if not queue.renew_lease(job_id, owner) or not queue.record_result(
+                        job_id, owner, user_id, save(user_id)):
+                    outcome = LEASE_LOST
+                    break
+            else:
+                outcome = queue.complete(job_id, owner)
+        if outcome == LEASE_LOST:
+            # Our lease expired and another worker reclaimed the job; it saves the remaining results
+            logger.warning("Job %s (%s) lost its lease; leaving it to the new owner", job_id, job['kind'])
+            return
+        logger.info("Job %s (%s) succeeded after %d attempt(s)", job_id, job['kind'], job['attempts'])
+    except GenerationError as e:
+        logger.warning("Job %s (%s) failed: %s", job_id, job['kind'], e)
+        queue.fail(job_id, owner, str(e))
+    except Exception as e:
+        logger.exception("Job %s (%s) crashed: %s", job_id, job['kind'], e)
+        db.session.rollback()
+        queue.fail(job_id, owner, str(e))
+    finally:
+        db.session.remove()
+
+
+class JobWorker:
+    """Claim and run jobs in a loop. Needs an application context."""
+
+    def __init__(self, queue: JobQueue, poll_interval: float = 0.5, owner: Optional[str] = None):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+    def run_once(self) -> bool:
+        """Run one job if any is visible. Returns whether a job ran."""
+        quiz_prefetch.maybe_expire_stale()
+        job = self.queue.claim(self.owner)
+        if job is None:
+            return False
+        run_job(self.queue, job, self.owner)
+        return True
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None) -> None:
+        logger.info("Job worker %s started", self.owner)
+        while stop_event is None or not stop_event.is_set():
+            if not self.run_once():
+                time.sleep(self.poll_interval)
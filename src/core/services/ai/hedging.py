@@ -0,0 +1,188 @@
+"""Hedged LLM requests: race a second copy of a slow call against the first.
+
+When a call on a hedged route has not returned after the route's observed
+latency percentile (HEDGING_PERCENTILE), an identical request is sent and
+whichever finishes first wins; the loser's HTTP client is closed to abandon
+it. Extra calls are limited by a budget that earns BUDGET_RATIO hedges per
+call, and a hedge is only sent when the LLM scheduler has a spare slot.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, Tuple
+from src.config.settings import HEDGING_CONFIG
+from src.core.services.llm_scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# An attempt factory returns (blocking call, cancel) for one fresh request
+Attempt = Tuple[Callable[[], object], Callable[[], None]]
+
+
+class LatencyTracker:
+    """Sliding window of call latencies per route."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(route, deque(maxlen=self.window)).append(seconds)
+
+    def routes(self):
+        with self._lock:
+            return list(self._samples)
+
+    def percentile(self, route: str, fraction: float, min_samples: int = 1) -> Optional[float]:
+        """Nearest-rank percentile in seconds, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(route, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class Hedger:
+    """Issue budgeted hedge requests for slow calls and keep win-rate metrics."""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or HEDGING_CONFIG
+        self.tracker = LatencyTracker(self.config['WINDOW'])
+        self._executor = ThreadPoolExecutor(max_workers=self.config['MAX_THREADS'], thread_name_prefix='llm-hedge')
+        self._lock = threading.Lock()
+        self._credit = 0.0
+        self.stats = {
+            'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'primary_wins': 0,
+            'skipped_budget': 0, 'skipped_capacity': 0, 'errors_rescued': 0,
+        }
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def hedge_delay(self, route: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while the route has too little history."""
+        delay = self.tracker.percentile(route, self.config['PERCENTILE'], self.config['MIN_SAMPLES'])
+        if delay is None:
+            return None
+        return max(delay, self.config['MIN_DELAY_MS'] / 1000.0)
+
+    def _earn_credit(self) -> None:
+        with self._lock:
+            self.stats['calls'] += 1
+            self._credit = min(self._credit + self.config['BUDGET_RATIO'], self.config['MAX_BURST'])
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self._credit < 1.0:
+                self.stats['skipped_budget'] += 1
+                return False
+            self._credit -= 1.0
+            return True
+
+    @staticmethod
+    def _timed(call: Callable[[], object]) -> Tuple[object, float]:
+        start = time.perf_counter()
+        result = call()
+        return result, time.perf_counter() - start
+
+    def _finish(self, route: str, attempt) -> object:
+        """Record a winning attempt's latency and return its result."""
+        result, elapsed = attempt.result()
+        self.tracker.record(route, elapsed)
+        return result
+
+    def call(self, route: str, start_attempt: Callable[[], Attempt]) -> object:
+        """Run a call, hedging it if it is slower than the route's usual latency."""
+        self._earn_credit()
+        primary_call, primary_cancel = start_attempt()
+        delay = self.hedge_delay(route)
+        primary_start = time.perf_counter()
+        primary = self._executor.submit(self._timed, primary_call)
+        if delay is None:
+            return self._finish(route, primary)
+
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return self._finish(route, primary)
+        if not self._take_credit():
+            return self._finish(route, primary)
+        scheduler = get_scheduler()
+        if scheduler is not None and not scheduler.try_acquire():
+            self._count('skipped_capacity')
+            return self._finish(route, primary)
+
+        try:
+            hedge_call, hedge_cancel = start_attempt()
+            hedge = self._executor.submit(self._timed, hedge_call)
+            self._count('hedged')
+            logger.debug("Hedging %s call after %.0f ms", route, delay * 1e3)
+            pending = {primary: primary_cancel, hedge: hedge_cancel}
+            first_error = None
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    if future.exception() is not None:
+                        first_error = first_error or future.exception()
+                        continue
+                    if primary in pending:
+                        # The abandoned primary took at least this long; leaving it out of the
+                        # window would pull the hedge delay below the real upstream tail
+                        self.tracker.record(route, time.perf_counter() - primary_start)
+                    # Abandon the slower request; its thread ends when the connection closes
+                    for cancel in pending.values():
+                        try:
+                            cancel()
+                        except Exception as e:
+                            logger.debug("Error cancelling hedged request: %s", e)
+                    self._count('hedge_wins' if future is hedge else 'primary_wins')
+                    if first_error is not None:
+                        self._count('errors_rescued')
+                    return self._finish(route, future)
+            raise first_error
+        finally:
+            if scheduler is not None:
+                scheduler.release()
+
+    def snapshot(self) -> Dict:
+        """Hedge counts, win rate, extra-call ratio and current delays per route."""
+        with self._lock:
+            stats = dict(self.stats)
+        routes = self.tracker.routes()
+        return {
+            **stats,
+            'hedge_rate': stats['hedged'] / stats['calls'] if stats['calls'] else 0.0,
+            'hedge_win_rate': stats['hedge_wins'] / stats['hedged'] if stats['hedged'] else 0.0,
+            'delay_ms': {
+                route: round(delay * 1e3, 1) if delay is not None else None
+                for route, delay in ((route, self.hedge_delay(route)) for route in routes)
+            },
+        }
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+def get_hedger() -> Optional[Hedger]:
+    """Get the shared hedger, or None when hedging is disabled."""
+    global _hedger
+    if not HEDGING_CONFIG['ENABLED']:
+        return None
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger()
+    return _hedger
+
+def set_hedger(hedger: Optional[Hedger]) -> None:
+    """Replace the shared hedger (None rebuilds it from config)."""
+    global _hedger
+    _hedger = hedger
+
+def is_hedged(route: str) -> bool:
+    return route in HEDGING_CONFIG['ROUTES']
@@ -0,0 +1,54 @@
+"""Near-duplicate lesson cache backed by the topic index."""
+import logging
+import threading
+from typing import Optional
+from src.config.settings import LESSON_CACHE_CONFIG
+from src.core.models.database import db
+from src.core.models.search_history import SearchHistory
+from src.core.services.ai.topic_index import TopicIndex
+
+logger = logging.getLogger(__name__)
+
+_index = TopicIndex(max_candidates=LESSON_CACHE_CONFIG['MAX_CANDIDATES'])
+_sync_lock = threading.Lock()
+_state = {'last_id': 0}
+
+def _sync_index() -> None:
+    """Index lessons saved since the last sync (including those from other workers)."""
+    with _sync_lock:
+        rows = db.session.query(
+            SearchHistory.id, SearchHistory.topic, SearchHistory.difficulty
+        ).filter(
+            SearchHistory.content_type == 'lesson',
+            SearchHistory.id > _state['last_id']
+        ).order_by(SearchHistory.id).all()
+        for row_id, topic, difficulty in rows:
+            _index.add(row_id, topic, difficulty or '')
+            _state['last_id'] = row_id
+
+def find_cached_lesson(topic: str, difficulty: str) -> Optional[SearchHistory]:
+    """Return a stored lesson whose topic is close enough to be served instead of a new one."""
+    _sync_index()
+    match = _index.lookup(topic, difficulty, threshold=LESSON_CACHE_CONFIG['SIMILARITY_THRESHOLD'])
+    if not match:
+        return None
+
+    history_id, score = match
+    lesson = db.session.get(SearchHistory, history_id)
+    if not lesson or lesson.content_type != 'lesson' or not lesson.content:
+        # Row was deleted or replaced since it was indexed
+        _index.remove(history_id)
+        return None
+
+    logger.info("Lesson cache hit for %r: history %s (similarity %.2f)", topic, history_id, score)
+    return lesson
+
+def remember_lesson(history: SearchHistory) -> None:
+    """Add a freshly generated lesson to the index."""
+    _index.add(history.id, history.topic, history.difficulty or '')
+
+def reset_lesson_cache() -> None:
+    """Forget every indexed lesson; the next lookup re-reads them from the database."""
+    with _sync_lock:
+        _index.clear()
+        _state['last_id'] = 0
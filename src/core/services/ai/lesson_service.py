@@ -1,10 +1,15 @@
 """Service for generating lesson content using AI."""
-from src.core.utils.openai_client import get_openai_client
+from src.config.settings import SECTIONED_LESSON_CONFIG
+from src.core.services.ai.model_router import LESSON
+from src.core.services.ai.sectioned_lessons import generate_sectioned_content
+from src.core.services.ai.subject_classifier import classify_subject
+from src.core.utils.openai_client import get_openai_response
 
 def generate_lesson_content(topic: str, difficulty: str) -> str:
     """Generate lesson content using OpenAI."""
-    client = get_openai_client()
-    
+    if SECTIONED_LESSON_CONFIG['ENABLED']:
+        return generate_sectioned_content(topic, difficulty, classify_subject(topic))
+
     # Create the prompt
     prompt = f"""Create a lesson about {topic} for {difficulty} level students.
     Include:
@@ -15,13 +20,8 @@ def generate_lesson_content(topic: str, difficulty: str) -> str:
     5. Summary
     """
     
-    # Call OpenAI API
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a knowledgeable teacher."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    
-    return response.choices[0].message.content
+    # Call OpenAI API with the lesson route's model and budget
+    return get_openai_response([
+        {"role": "system", "content": "You are a knowledgeable teacher."},
+        {"role": "user", "content": prompt}
+    ], route=LESSON, difficulty=difficulty)
@@ -0,0 +1,128 @@
+"""Pick the model and generation parameters for each kind of LLM call.
+
+Parameters resolve in layers: OPENAI_CONFIG defaults, then the route's
+settings, then any per-difficulty override. An optional JSON routes file is
+merged on top and re-read when its modification time changes, so routing
+can be tuned without a restart.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from src.config.settings import MODEL_ROUTING_CONFIG, OPENAI_CONFIG
+
+logger = logging.getLogger(__name__)
+
+LESSON = 'lesson'
+LESSON_OUTLINE = 'lesson_outline'
+LESSON_SECTION = 'lesson_section'
+QUIZ = 'quiz'
+FEEDBACK = 'feedback'
+HEALTH_CHECK = 'health_check'
+DEFAULT = 'default'
+
+PARAMETERS = ('model', 'max_tokens', 'temperature', 'timeout')
+
+
+def _clean(values: Optional[Dict]) -> Dict:
+    """Known parameters that are actually set."""
+    return {key: value for key, value in (values or {}).items() if key in PARAMETERS and value is not None}
+
+
+class ModelRouter:
+    """Resolve generation parameters for a route, reloading the routes file when it changes."""
+
+    def __init__(self, config: Optional[Dict] = None, defaults: Optional[Dict] = None):
+        self.config = config or MODEL_ROUTING_CONFIG
+        defaults = defaults or OPENAI_CONFIG
+        self.defaults = _clean({
+            'model': defaults['MODEL'],
+            'max_tokens': defaults['MAX_TOKENS'],
+            'temperature': defaults['TEMPERATURE'],
+            'timeout': defaults.get('TIMEOUT'),
+        })
+        self._lock = threading.Lock()
+        self._file_mtime = None
+        self._checked_at = 0.0
+        self._file_routes: Dict = {}
+        self._file_overrides: Dict = {}
+
+    def _maybe_reload(self) -> None:
+        path = self.config.get('ROUTES_FILE')
+        if not path:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.config.get('RELOAD_INTERVAL', 5):
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            if mtime != self._file_mtime:
+                self._load(path, mtime)
+
+    def _load(self, path: str, mtime: Optional[float]) -> None:
+        """Replace the file layer; keeps the previous one if the file is unreadable."""
+        if mtime is None:
+            self._file_routes, self._file_overrides, self._file_mtime = {}, {}, None
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            routes = {name: _clean(values) for name, values in data.get('routes', {}).items()}
+            overrides = {
+                name: {difficulty: _clean(values) for difficulty, values in by_difficulty.items()}
+                for name, by_difficulty in data.get('difficulty_overrides', {}).items()
+            }
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error("Ignoring invalid model routes file %s: %s", path, e)
+            return
+        self._file_routes, self._file_overrides, self._file_mtime = routes, overrides, mtime
+        logger.info("Loaded model routes from %s (%d routes)", path, len(routes))
+
+    def reload(self) -> None:
+        """Re-read the routes file now."""
+        self._checked_at = 0.0
+        self._file_mtime = -1.0
+        self._maybe_reload()
+
+    def resolve(self, route: str = DEFAULT, difficulty: Optional[str] = None) -> Dict:
+        """Generation parameters for a route and optional difficulty."""
+        self._maybe_reload()
+        params = dict(self.defaults)
+        params.update(_clean(self.config['ROUTES'].get(route)))
+        params.update(self._file_routes.get(route, {}))
+        if difficulty:
+            params.update(_clean(self.config['DIFFICULTY_OVERRIDES'].get(route, {}).get(difficulty)))
+            params.update(self._file_overrides.get(route, {}).get(difficulty, {}))
+        return params
+
+    def table(self) -> Dict[str, Dict]:
+        """Effective parameters for every configured route and difficulty override."""
+        self._maybe_reload()
+        routes = {DEFAULT, *self.config['ROUTES'], *self._file_routes}
+        table = {route: self.resolve(route) for route in sorted(routes)}
+        for route in sorted({*self.config['DIFFICULTY_OVERRIDES'], *self._file_overrides}):
+            difficulties = {*self.config['DIFFICULTY_OVERRIDES'].get(route, {}), *self._file_overrides.get(route, {})}
+            for difficulty in sorted(difficulties):
+                table[f"{route}:{difficulty}"] = self.resolve(route, difficulty)
+        return table
+
+
+_router: Optional[ModelRouter] = None
+
+def get_router() -> ModelRouter:
+    """Get the shared model router."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+def set_router(router: Optional[ModelRouter]) -> None:
+    """Replace the shared router (None rebuilds it from config)."""
+    global _router
+    _router = router
@@ -0,0 +1,95 @@
+"""Question bank: store generated quiz questions and assemble quizzes from them."""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import and_, exists, insert, select
+from src.core.models.database import db
+from src.core.models.question_bank import QuizQuestion, QuizQuestionSeen
+from src.core.services.ai.adaptive_difficulty import topic_key
+
+logger = logging.getLogger(__name__)
+
+def question_hash(topic: str, difficulty: str, question: Dict) -> str:
+    """Content hash identifying a question regardless of whitespace, case or option order."""
+    parts = [
+        topic_key(topic),
+        difficulty,
+        ' '.join(str(question.get('question', '')).lower().split()),
+        '|'.join(sorted(' '.join(str(o).lower().split()) for o in question.get('options') or [])),
+        ' '.join(str(question.get('correct_answer', '')).lower().split()),
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def _is_valid(question) -> bool:
+    return (
+        isinstance(question, dict)
+        and isinstance(question.get('question'), str)
+        and isinstance(question.get('options'), list)
+        and question.get('correct_answer') is not None
+    )
+
+def add_questions(topic: str, difficulty: str, questions: List[Dict]) -> List[int]:
+    """Store generated questions, skipping ones already in the bank.
+
+    Returns the bank id for each valid input question, in order. The caller commits.
+    """
+    hashes = {}
+    for question in questions:
+        if _is_valid(question):
+            hashes.setdefault(question_hash(topic, difficulty, question), question)
+    if not hashes:
+        return []
+
+    known = dict(db.session.query(QuizQuestion.content_hash, QuizQuestion.id).filter(
+        QuizQuestion.content_hash.in_(list(hashes))
+    ))
+    key = topic_key(topic)
+    new_rows = [{
+        'topic_key': key,
+        'topic': topic[:200],
+        'difficulty': difficulty,
+        'question': question['question'],
+        'options': question['options'],
+        'correct_answer': str(question['correct_answer']),
+        'explanation': question.get('explanation'),
+        'content_hash': content_hash,
+        'created_at': datetime.utcnow(),
+    } for content_hash, question in hashes.items() if content_hash not in known]
+    if new_rows:
+        inserted = db.session.execute(
+            insert(QuizQuestion).returning(QuizQuestion.content_hash, QuizQuestion.id, sort_by_parameter_order=True),
+            new_rows
+        )
+        known.update(dict(inserted.all()))
+
+    return [known[question_hash(topic, difficulty, q)] for q in questions if _is_valid(q)]
+
+def draw_unseen_questions(user_id: int, topic: str, difficulty: str, count: int) -> List[QuizQuestion]:
+    """Newest bank questions on a topic and level that the user has not been served."""
+    seen = exists().where(and_(
+        QuizQuestionSeen.user_id == user_id,
+        QuizQuestionSeen.question_id == QuizQuestion.id
+    ))
+    rows = db.session.scalars(
+        select(QuizQuestion).where(
+            QuizQuestion.topic_key == topic_key(topic),
+            QuizQuestion.difficulty == difficulty,
+            ~seen
+        ).order_by(QuizQuestion.id.desc()).limit(count)
+    ).all()
+    # Present them in the order they were generated
+    return sorted(rows, key=lambda row: row.id)
+
+def mark_seen(user_id: int, question_ids: List[int]) -> None:
+    """Record that questions were served to a user. The caller commits."""
+    question_ids = set(question_ids)
+    if not question_ids:
+        return
+    already = {row[0] for row in db.session.query(QuizQuestionSeen.question_id).filter(
+        QuizQuestionSeen.user_id == user_id, QuizQuestionSeen.question_id.in_(question_ids)
+    )}
+    rows = [{'user_id': user_id, 'question_id': qid, 'seen_at': datetime.utcnow()}
+            for qid in question_ids - already]
+    if rows:
+        db.session.execute(insert(QuizQuestionSeen), rows)
@@ -0,0 +1,181 @@
+"""Speculative quiz prefetch: generate the quiz for a lesson before it is asked for.
+
+After a lesson is saved, a background job (BACKGROUND priority, charged to
+the user's token budget) generates quiz questions and stores them keyed to
+the lesson's history id. A quiz request naming that lesson is then assembled
+from the stored questions without waiting for the LLM. Each prefetch ends
+as used or wasted (requested too early, for something else, or never within
+TTL); when the recent hit rate drops below MIN_HIT_RATE only a PROBE_RATE
+sample of lessons is prefetched, so the feature throttles itself.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from src.config.settings import JOBS_CONFIG, QUESTION_BANK_CONFIG, QUIZ_PREFETCH_CONFIG
+from src.core.models.database import db
+from src.core.models.prefetched_quiz import FAILED, PENDING, READY, USED, WASTED, PrefetchedQuiz
+from src.core.services.ai.adaptive_difficulty import topic_key
+from src.core.services.ai.generation import GenerationError, produce_quiz_questions
+from src.core.services.job_queue import JobQueue
+from src.core.services.llm_scheduler import Priority
+from src.core.utils.json_provider import dumps_bytes, loads
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND = 'quiz_prefetch'
+
+_expiry_lock = threading.Lock()
+_last_expiry: Optional[float] = None
+
+
+def enabled() -> bool:
+    """Prefetch is on and there are job workers to run it."""
+    return QUIZ_PREFETCH_CONFIG['ENABLED'] and JOBS_CONFIG['ENABLED']
+
+
+def _resolve(lesson_history_id: int, from_status: str, to_status: str, **values) -> bool:
+    """Move a prefetch between states if it is still in `from_status`. The caller commits."""
+    updated = PrefetchedQuiz.query.filter_by(lesson_history_id=lesson_history_id, status=from_status).update(
+        {'status': to_status, **values}, synchronize_session=False)
+    return updated == 1
+
+
+def expire_stale() -> None:
+    """Write off prefetches nobody used (or that never finished) within TTL."""
+    cutoff = datetime.utcnow() - timedelta(seconds=QUIZ_PREFETCH_CONFIG['TTL'])
+    now = datetime.utcnow()
+    for from_status, to_status in ((READY, WASTED), (PENDING, FAILED)):
+        PrefetchedQuiz.query.filter(
+            PrefetchedQuiz.status == from_status, PrefetchedQuiz.created_at < cutoff
+        ).update({'status': to_status, 'questions': None, 'resolved_at': now}, synchronize_session=False)
+    db.session.commit()
+
+
+def maybe_expire_stale() -> bool:
+    """Run expire_stale at most once per EXPIRE_INTERVAL in this process. Called by the job workers."""
+    global _last_expiry
+    if not enabled():
+        return False
+    with _expiry_lock:
+        now = time.monotonic()
+        if _last_expiry is not None and now - _last_expiry < QUIZ_PREFETCH_CONFIG['EXPIRE_INTERVAL']:
+            return False
+        _last_expiry = now
+    try:
+        expire_stale()
+    except Exception as e:
+        logger.error("Could not expire stale quiz prefetches: %s", e)
+        db.session.rollback()
+        return False
+    return True
+
+
+def recent_hit_rate() -> Optional[float]:
+    """Share of recent prefetches that were used, or None with too few outcomes."""
+    outcomes = [status for (status,) in db.session.query(PrefetchedQuiz.status)
+                .filter(PrefetchedQuiz.status.in_([USED, WASTED]))
+                .order_by(PrefetchedQuiz.resolved_at.desc())
+                .limit(QUIZ_PREFETCH_CONFIG['WINDOW'])]
+    if len(outcomes) < max(1, QUIZ_PREFETCH_CONFIG['MIN_SAMPLES']):
+        return None
+    return outcomes.count(USED) / len(outcomes)
+
+
+def should_prefetch(user_id: int) -> bool:
+    """Whether another prefetch fits the outstanding caps and the recent hit rate."""
+    # Read-only on the request path: rows past TTL stop counting before the workers write them off
+    cutoff = datetime.utcnow() - timedelta(seconds=QUIZ_PREFETCH_CONFIG['TTL'])
+    outstanding = PrefetchedQuiz.query.filter(PrefetchedQuiz.status.in_([PENDING, READY]),
+                                              PrefetchedQuiz.created_at >= cutoff)
+    if outstanding.count() >= QUIZ_PREFETCH_CONFIG['MAX_OUTSTANDING']:
+        return False
+    if outstanding.filter(PrefetchedQuiz.user_id == user_id).count() >= QUIZ_PREFETCH_CONFIG['MAX_PER_USER']:
+        return False
+    hit_rate = recent_hit_rate()
+    if hit_rate is not None and hit_rate < QUIZ_PREFETCH_CONFIG['MIN_HIT_RATE']:
+        return random.random() < QUIZ_PREFETCH_CONFIG['PROBE_RATE']
+    return True
+
+
+def schedule_quiz_prefetch(queue: JobQueue, user_id: int, lesson_history_id: int, topic: str,
+                           difficulty: str) -> bool:
+    """Queue quiz generation for a lesson the user just received. Returns whether it was queued."""
+    if not enabled() or lesson_history_id is None:
+        return False
+    try:
+        if not should_prefetch(user_id):
+            logger.debug("Skipping quiz prefetch for lesson %s", lesson_history_id)
+            return False
+        db.session.add(PrefetchedQuiz(lesson_history_id=lesson_history_id, user_id=user_id,
+                                      topic=topic[:200], difficulty=difficulty))
+        db.session.commit()
+    except Exception as e:
+        logger.error("Could not record quiz prefetch for lesson %s: %s", lesson_history_id, e)
+        db.session.rollback()
+        return False
+    queue.enqueue(JOB_KIND, {'lesson_history_id': lesson_history_id, 'topic': topic, 'difficulty': difficulty},
+                  user_id)
+    return True
+
+
+def run_quiz_prefetch(payload: Dict, requester_id: Optional[int]) -> Dict:
+    """Generate and store the questions for one prefetch job; failures are recorded, not retried."""
+    lesson_history_id = payload['lesson_history_id']
+    prefetch = db.session.get(PrefetchedQuiz, lesson_history_id)
+    if prefetch is None or prefetch.status != PENDING:
+        return {'lesson_history_id': lesson_history_id, 'status': prefetch.status if prefetch else None}
+    try:
+        questions = produce_quiz_questions(prefetch.topic, prefetch.difficulty, QUESTION_BANK_CONFIG['QUIZ_SIZE'],
+                                           requester_id, Priority.BACKGROUND)
+    except GenerationError as e:
+        logger.warning("Quiz prefetch for lesson %s failed: %s", lesson_history_id, e)
+        _resolve(lesson_history_id, PENDING, FAILED, resolved_at=datetime.utcnow())
+        db.session.commit()
+        return {'lesson_history_id': lesson_history_id, 'status': FAILED}
+
+    # The quiz may already have been requested, in which case this generation was wasted
+    stored = _resolve(lesson_history_id, PENDING, READY, questions=dumps_bytes(questions).decode('utf-8'))
+    db.session.commit()
+    if not stored:
+        logger.debug("Quiz prefetch for lesson %s finished after the quiz was requested", lesson_history_id)
+    return {'lesson_history_id': lesson_history_id, 'status': READY if stored else WASTED}
+
+
+def take_prefetched_quiz(user_id: int, lesson_history_id: int, topic: str, difficulty: str) -> Optional[List[Dict]]:
+    """Claim the prefetched questions for a lesson, or None on a miss.
+
+    A request that cannot use the prefetch (still generating, another topic
+    or difficulty) writes it off as wasted.
+    """
+    prefetch = db.session.get(PrefetchedQuiz, lesson_history_id)
+    if prefetch is None or prefetch.user_id != user_id or prefetch.status not in (PENDING, READY):
+        return None
+    now = datetime.utcnow()
+    matches = topic_key(prefetch.topic) == topic_key(topic) and prefetch.difficulty == difficulty
+    fresh = prefetch.created_at >= now - timedelta(seconds=QUIZ_PREFETCH_CONFIG['TTL'])
+    questions = loads(prefetch.questions) if prefetch.status == READY else None
+    if questions is not None and matches and fresh and _resolve(lesson_history_id, READY, USED,
+                                                                 questions=None, resolved_at=now):
+        db.session.commit()
+        return questions
+    _resolve(lesson_history_id, prefetch.status, WASTED, questions=None, resolved_at=now)
+    db.session.commit()
+    return None
+
+
+def prefetch_stats() -> Dict:
+    """Prefetch counts by outcome, hit rate and whether prefetching is currently throttled."""
+    counts = dict(db.session.query(PrefetchedQuiz.status, func.count()).group_by(PrefetchedQuiz.status))
+    used, wasted = counts.get(USED, 0), counts.get(WASTED, 0)
+    recent = recent_hit_rate()
+    return {
+        'enabled': enabled(),
+        'counts': {status: counts.get(status, 0) for status in (PENDING, READY, USED, WASTED, FAILED)},
+        'hit_rate': used / (used + wasted) if used + wasted else None,
+        'recent_hit_rate': recent,
+        'throttled': recent is not None and recent < QUIZ_PREFETCH_CONFIG['MIN_HIT_RATE'],
+    }
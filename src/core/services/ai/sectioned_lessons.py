@@ -0,0 +1,122 @@
+"""Sectioned lesson generation: a short outline, then every section in parallel.
+
+One long completion spends most of its time decoding the whole lesson in
+sequence. Here a cheap outline call fixes what each section covers, then the
+sections are generated concurrently (at most MAX_PARALLEL per lesson, and
+still through the LLM scheduler) and reported as each finishes. Wall-clock
+time drops to roughly the outline plus the slowest section. The sections are
+assembled in outline order, so the result reads like a single-call lesson.
+"""
+import logging
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+from flask import current_app
+from src.config.settings import SECTIONED_LESSON_CONFIG
+from src.core.services.ai.model_router import LESSON_OUTLINE, LESSON_SECTION
+from src.core.services.llm_scheduler import Priority
+from src.core.utils.openai_client import get_openai_response
+
+logger = logging.getLogger(__name__)
+
+_OUTLINE_LINE = re.compile(r'^\s*(?:[-*]|\d+[.)])?\s*[*#\s]*(?P<title>[^:*]+?)[*\s]*:\s*(?P<points>.*)$')
+
+
+def get_outline_prompt(topic, difficulty, subject_type, sections):
+    """Get the prompt for a lesson outline with one line per section."""
+    return [
+        {"role": "system", "content": f"You are an expert {subject_type} tutor planning a lesson about {topic} "
+                                      f"for {difficulty} level students."},
+        {"role": "user", "content": f"Write a short outline for a lesson about {topic} with exactly these sections: "
+                                    f"{', '.join(sections)}. "
+                                    "Give one line per section in the form 'Section title: point; point; point'. "
+                                    "Return only the outline."}
+    ]
+
+
+def get_section_prompt(topic, difficulty, subject_type, outline, title):
+    """Get the prompt for one section, with the whole outline for context."""
+    outline_text = '\n'.join(f"{section}: {'; '.join(points)}" for section, points in outline.items())
+    focus = f" covering: {'; '.join(outline[title])}" if outline[title] else ''
+    return [
+        {"role": "system", "content": f"You are an expert {subject_type} tutor writing one section of a lesson "
+                                      f"about {topic} for {difficulty} level students."},
+        {"role": "user", "content": f"Lesson outline:\n{outline_text}\n\nWrite only the '{title}' section{focus}. "
+                                    f"Start with the heading '## {title}', include examples and explanations "
+                                    "where they fit, and do not repeat the other sections."}
+    ]
+
+
+def parse_outline(text: str, sections: List[str]) -> Dict[str, List[str]]:
+    """Points per section from an outline reply; sections the reply missed get none."""
+    outline = {title: [] for title in sections}
+    for line in (text or '').splitlines():
+        match = _OUTLINE_LINE.match(line)
+        if not match:
+            continue
+        name = match.group('title').strip().lower()
+        for title in sections:
+            if name.startswith(title.lower()) and not outline[title]:
+                outline[title] = [p.strip(' .') for p in match.group('points').split(';') if p.strip(' .')]
+                break
+    return outline
+
+
+def assemble_sections(topic: str, titles: List[str], sections: Dict[int, str]) -> str:
+    """Join the finished sections in outline order under the lesson title."""
+    parts = [f"# {topic}"]
+    for index, title in enumerate(titles):
+        content = (sections.get(index) or '').strip()
+        if content and not content.startswith('#'):
+            content = f"## {title}\n\n{content}"
+        if content:
+            parts.append(content)
+    return '\n\n'.join(parts)
+
+
+def iter_lesson_sections(topic: str, difficulty: str, subject_type: str, user_id: Optional[int] = None,
+                         priority: Priority = Priority.INTERACTIVE) -> Iterator[Dict]:
+    """Yield the outline, then each section as soon as it is generated.
+
+    Events are {"type": "outline", "sections": [titles]} followed by
+    {"type": "section", "index", "title", "content"} in completion order. A
+    failed section cancels the rest and re-raises.
+    """
+    titles = list(SECTIONED_LESSON_CONFIG['SECTIONS'])
+    outline_text = get_openai_response(get_outline_prompt(topic, difficulty, subject_type, titles),
+                                       user_id=user_id, priority=priority, route=LESSON_OUTLINE, difficulty=difficulty)
+    outline = parse_outline(outline_text, titles)
+    yield {'type': 'outline', 'sections': titles}
+
+    app = current_app._get_current_object()
+
+    def generate(title):
+        with app.app_context():
+            return get_openai_response(get_section_prompt(topic, difficulty, subject_type, outline, title),
+                                       user_id=user_id, priority=priority, route=LESSON_SECTION, difficulty=difficulty)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, SECTIONED_LESSON_CONFIG['MAX_PARALLEL']),
+                                  thread_name_prefix='lesson-section')
+    try:
+        pending = {executor.submit(generate, title): index for index, title in enumerate(titles)}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=pending.get):
+                index = pending.pop(future)
+                yield {'type': 'section', 'index': index, 'title': titles[index], 'content': future.result()}
+    finally:
+        # Also reached when the consumer stops early (e.g. a disconnected stream)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_sectioned_content(topic: str, difficulty: str, subject_type: str, user_id: Optional[int] = None,
+                               priority: Priority = Priority.INTERACTIVE) -> str:
+    """Generate a whole lesson section by section and return the assembled markdown."""
+    titles, sections = [], {}
+    for event in iter_lesson_sections(topic, difficulty, subject_type, user_id, priority):
+        if event['type'] == 'outline':
+            titles = event['sections']
+        else:
+            sections[event['index']] = event['content']
+    logger.debug("Assembled %d sections for %s", len(sections), topic)
+    return assemble_sections(topic, titles, sections)
@@ -0,0 +1,163 @@
+"""Subject classification for lesson and quiz topics."""
+import json
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config.settings import SUBJECT_CLASSIFIER_CONFIG
+from src.core.services.ai.topic_index import stem
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+_stem = lru_cache(maxsize=65536)(stem)
+
+def tokenize(topic: str) -> List[str]:
+    """Split a topic into stemmed word tokens."""
+    return [_stem(word) for word in _WORD_RE.findall(topic.lower())]
+
+
+class SubjectClassifier:
+    """Base class for subject classifiers."""
+
+    default = 'general'
+
+    def classify(self, topic: str) -> str:
+        """Return the subject label for a single topic."""
+        raise NotImplementedError
+
+    def classify_many(self, topics: Iterable[str]) -> List[str]:
+        """Classify a batch of topics."""
+        return [self.classify(topic) for topic in topics]
+
+
+class KeywordClassifier(SubjectClassifier):
+    """Whole-word phrase matcher over a subject taxonomy.
+
+    Every taxonomy term is stemmed and compiled into a single dict keyed by
+    its word n-gram, so classifying a topic is one hash lookup per n-gram of
+    the topic. Matching never happens inside words ("codependency" does not
+    contain the term "code"). Longer phrases score higher; ties go to the
+    subject listed first in the taxonomy.
+    """
+
+    def __init__(self, taxonomy: Dict):
+        self.default = taxonomy.get('default', 'general')
+        self.subjects = [subject['name'] for subject in taxonomy['subjects']]
+        self._terms: Dict[Tuple[str, ...], List[str]] = {}
+        for subject in taxonomy['subjects']:
+            for term in subject['terms']:
+                key = tuple(tokenize(term))
+                if key:
+                    self._terms.setdefault(key, []).append(subject['name'])
+        self._max_words = max((len(key) for key in self._terms), default=1)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'KeywordClassifier':
+        """Load a classifier from a taxonomy JSON file."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def scores(self, topic: str) -> Dict[str, float]:
+        """Sum of matched phrase lengths per subject."""
+        words = tokenize(topic)
+        scores: Dict[str, float] = {}
+        for size in range(1, min(self._max_words, len(words)) + 1):
+            for start in range(len(words) - size + 1):
+                for subject in self._terms.get(tuple(words[start:start + size]), ()):
+                    scores[subject] = scores.get(subject, 0.0) + size
+        return scores
+
+    def classify(self, topic: str) -> str:
+        scores = self.scores(topic)
+        if not scores:
+            return self.default
+        return max(self.subjects, key=lambda subject: scores.get(subject, 0.0))
+
+
+class LinearClassifier(SubjectClassifier):
+    """Softmax linear model over stemmed unigrams, trained offline."""
+
+    def __init__(self, model: Dict):
+        self.labels: List[str] = model['labels']
+        self.bias: List[float] = model['bias']
+        self.weights: Dict[str, List[float]] = model['weights']
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LinearClassifier':
+        """Load model weights written by scripts/train_subject_model.py."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def predict(self, topic: str) -> Tuple[str, float]:
+        """Return the most likely label and its probability."""
+        logits = list(self.bias)
+        for token in set(tokenize(topic)):
+            weights = self.weights.get(token)
+            if weights:
+                for i, weight in enumerate(weights):
+                    logits[i] += weight
+        peak = max(logits)
+        exps = [math.exp(logit - peak) for logit in logits]
+        best = max(range(len(logits)), key=logits.__getitem__)
+        return self.labels[best], exps[best] / sum(exps)
+
+    def classify(self, topic: str) -> str:
+        return self.predict(topic)[0]
+
+
+class CompositeClassifier(SubjectClassifier):
+    """Keyword matches first, falling back to the linear model when it is confident."""
+
+    def __init__(self, keywords: KeywordClassifier, model: Optional[LinearClassifier] = None,
+                 min_confidence: float = 0.6):
+        self.keywords = keywords
+        self.model = model
+        self.min_confidence = min_confidence
+        self.default = keywords.default
+
+    def classify(self, topic: str) -> str:
+        subject = self.keywords.classify(topic)
+        if subject != self.default or self.model is None:
+            return subject
+        label, confidence = self.model.predict(topic)
+        return label if confidence >= self.min_confidence else self.default
+
+
+def build_classifier(config: Optional[Dict] = None) -> SubjectClassifier:
+    """Build a classifier from SUBJECT_CLASSIFIER_CONFIG-style settings."""
+    config = {**SUBJECT_CLASSIFIER_CONFIG, **(config or {})}
+    keywords = KeywordClassifier.from_file(config['TAXONOMY_PATH'])
+    model = None
+    if config['MODEL_PATH']:
+        try:
+            model = LinearClassifier.from_file(config['MODEL_PATH'])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load subject model from %s: %s", config['MODEL_PATH'], e)
+    return CompositeClassifier(keywords, model, config['MIN_MODEL_CONFIDENCE'])
+
+_classifier: Optional[SubjectClassifier] = None
+
+def get_classifier() -> SubjectClassifier:
+    """Get the shared classifier instance."""
+    global _classifier
+    if _classifier is None:
+        _classifier = build_classifier()
+    return _classifier
+
+def set_classifier(classifier: SubjectClassifier) -> None:
+    """Replace the shared classifier (e.g. after retraining)."""
+    global _classifier
+    _classifier = classifier
+    classify_subject.cache_clear()
+
+@lru_cache(maxsize=4096)
+def classify_subject(topic: str) -> str:
+    """Classify a topic with the shared classifier."""
+    return get_classifier().classify(topic)
+
+def classify_subjects(topics: Iterable[str]) -> List[str]:
+    """Classify a batch of topics, e.g. for warm-up or analytics jobs."""
+    return get_classifier().classify_many(topics)
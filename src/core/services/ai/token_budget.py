@@ -0,0 +1,184 @@
+"""Count prompt tokens locally and keep LLM calls inside their budgets.
+
+Before each call the prompt is measured, `max_tokens` is clipped to what the
+model's context window leaves, prompts that leave no room for an answer are
+rejected, and the predicted tokens (prompt + completion budget) are charged
+against the caller's token rate limit. Counts come from tiktoken when it is
+installed and from a regex approximation of its BPE pre-tokenizer otherwise;
+the approximation errs high so budgets stay safe.
+"""
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+from src.config.settings import OPENAI_CONFIG, TOKEN_BUDGET_CONFIG
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead per message and for priming the reply (OpenAI cookbook)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Same split as cl100k's pre-tokenizer: contractions, words, 1-3 digit groups, punctuation, whitespace
+_PIECES = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+|\d{1,3}| ?[^\s\w]+|\s+", re.IGNORECASE)
+
+
+class TokenBudgetError(Exception):
+    """A call that does not fit its token budget; `status` is the HTTP status to report."""
+    status = 400
+
+
+class PromptTooLarge(TokenBudgetError):
+    status = 413
+
+    def __init__(self, prompt_tokens: int, limit: int):
+        super().__init__(f"Prompt is {prompt_tokens} tokens; at most {limit} fit this model")
+        self.prompt_tokens = prompt_tokens
+        self.limit = limit
+
+
+class TokenRateLimited(TokenBudgetError):
+    status = 429
+
+    def __init__(self, tokens: int, retry_after: float):
+        super().__init__(f"Token limit reached; retry in {retry_after:.0f}s")
+        self.tokens = tokens
+        self.retry_after = retry_after
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None to use the approximation."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Unknown model name: fall back to the encoding current chat models use
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        # Encodings are downloaded on first use; work offline with the approximation
+        logger.warning("tiktoken encoding for %s unavailable (%s); approximating token counts", model, e)
+        return None
+
+
+def _piece_tokens(piece: str) -> int:
+    word = piece.lstrip(' ')
+    if not word:
+        return 1
+    if word[0].isalpha():
+        # Common English words are one token; long or non-ASCII words split further
+        return (len(word) + 5) // 6 if word.isascii() else len(word)
+    if word[0].isspace() or word[0].isdigit() or word[0] == "'":
+        return 1
+    return (len(word) + 1) // 2
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in `text` for `model`."""
+    if not text:
+        return 0
+    encoding = _encoding(model or OPENAI_CONFIG['MODEL'])
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(_piece_tokens(piece) for piece in _PIECES.findall(text))
+
+
+def count_message_tokens(messages: List[Dict], model: Optional[str] = None) -> int:
+    """Prompt tokens for a chat request, including per-message overhead."""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_tokens(message.get('role', ''), model)
+        total += count_tokens(message.get('content') or '', model)
+    return total
+
+
+def truncate_to_tokens(text: str, limit: int, model: Optional[str] = None) -> str:
+    """`text` cut to at most `limit` tokens."""
+    if not text or limit <= 0:
+        return ''
+    encoding = _encoding(model or OPENAI_CONFIG['MODEL'])
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= limit else encoding.decode(tokens[:limit])
+    used = 0
+    for match in _PIECES.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > limit:
+            return text[:match.start()]
+    return text
+
+
+def context_window(model: str) -> int:
+    """Context window of a model, matched by the longest configured name prefix."""
+    windows = TOKEN_BUDGET_CONFIG['CONTEXT_WINDOWS']
+    matches = [prefix for prefix in windows if model.startswith(prefix)]
+    if not matches:
+        return TOKEN_BUDGET_CONFIG['DEFAULT_CONTEXT_WINDOW']
+    return windows[max(matches, key=len)]
+
+
+def fit_max_tokens(prompt_tokens: int, model: str, requested: int) -> int:
+    """The completion budget that fits beside the prompt, raising PromptTooLarge when too little is left."""
+    room = context_window(model) - TOKEN_BUDGET_CONFIG['SAFETY_MARGIN']
+    minimum = min(requested, TOKEN_BUDGET_CONFIG['MIN_COMPLETION_TOKENS'])
+    if room - prompt_tokens < minimum:
+        raise PromptTooLarge(prompt_tokens, room - minimum)
+    return min(requested, room - prompt_tokens)
+
+
+class TokenLimiter:
+    """Per-user moving-window limit on predicted tokens, on the rate limiter's storage."""
+
+    def __init__(self, limit: str, storage_uri: str = 'memory://'):
+        self.item = parse(limit)
+        self.limiter = MovingWindowRateLimiter(storage_from_string(storage_uri))
+
+    def charge(self, user_id, tokens: int) -> None:
+        """Charge `tokens` to a user, raising TokenRateLimited when the window is spent."""
+        if self.limiter.hit(self.item, 'llm-tokens', str(user_id), cost=max(1, tokens)):
+            return
+        reset_time, _ = self.limiter.get_window_stats(self.item, 'llm-tokens', str(user_id))
+        raise TokenRateLimited(tokens, max(0.0, reset_time - time.time()))
+
+
+_limiter: Optional[TokenLimiter] = None
+
+def get_token_limiter() -> Optional[TokenLimiter]:
+    """Get the shared token limiter, or None when no limit is configured."""
+    global _limiter
+    if not TOKEN_BUDGET_CONFIG['USER_LIMIT']:
+        return None
+    if _limiter is None:
+        _limiter = TokenLimiter(TOKEN_BUDGET_CONFIG['USER_LIMIT'], TOKEN_BUDGET_CONFIG['STORAGE_URI'])
+    return _limiter
+
+def set_token_limiter(limiter: Optional[TokenLimiter]) -> None:
+    """Replace the shared token limiter (None rebuilds it from config)."""
+    global _limiter
+    _limiter = limiter
+
+
+def budget_call(messages: List[Dict], model: str, max_tokens: int, user_id=None) -> Dict:
+    """Measure a prompt, fit its completion budget and charge the caller.
+
+    Returns {'prompt_tokens', 'max_tokens', 'predicted_tokens'}; anonymous
+    calls (no `user_id`) are not rate limited.
+    """
+    prompt_tokens = count_message_tokens(messages, model)
+    max_tokens = fit_max_tokens(prompt_tokens, model, max_tokens)
+    predicted = prompt_tokens + max_tokens
+    limiter = get_token_limiter() if user_id is not None else None
+    if limiter is not None:
+        limiter.charge(user_id, predicted)
+    return {'prompt_tokens': prompt_tokens, 'max_tokens': max_tokens, 'predicted_tokens': predicted}
@@ -0,0 +1,173 @@
+"""Topic canonicalization and near-duplicate topic lookup."""
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+# One vowel followed by one consonant: the stem lost a silent "e" (cod -> code)
+_SHORT_STEM_RE = re.compile(r"^[^aeiou]*[aeiou][^aeiouwxy]$")
+
+# Words that describe the shape of a lesson rather than its subject
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'to', 'of', 'in', 'on', 'for', 'and', 'or', 'with', 'into', 'about',
+    'how', 'what', 'is', 'are', 'do', 'does', 'i', 'my', 'your',
+    'intro', 'introduction', 'introductory', 'basic', 'basics', 'fundamental', 'fundamentals',
+    'overview', 'guide', 'tutorial', 'lesson', 'course', 'learn', 'learning', 'understanding',
+    'beginner', 'beginners', '101', 'primer', 'crash', 'getting', 'started',
+})
+
+# Subject-neutral words that still carry a little meaning, weighted down instead of dropped
+GENERIC_TERMS = frozenset({
+    'program', 'language', 'concept', 'theory', 'principle', 'skill', 'topic', 'subject',
+    'method', 'technique', 'study',
+})
+GENERIC_WEIGHT = 0.25
+
+ALIASES = {
+    'py': 'python',
+    'js': 'javascript',
+    'maths': 'math',
+    'mathematics': 'math',
+    'stats': 'statistics',
+}
+
+def stem(word: str) -> str:
+    """Strip common inflectional suffixes (a light Porter step-1 style stemmer)."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            # programm -> program, runn -> run
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            elif _SHORT_STEM_RE.match(word):
+                word += 'e'
+            break
+    return word
+
+def normalize_topic(topic: str) -> Tuple[str, ...]:
+    """Turn a free-text topic into a sorted tuple of distinct stemmed tokens."""
+    tokens = set()
+    for raw in _TOKEN_RE.findall(topic.lower()):
+        raw = ALIASES.get(raw, raw)
+        if raw in STOPWORDS:
+            continue
+        tokens.add(stem(raw))
+    return tuple(sorted(tokens))
+
+def canonical_key(topic: str) -> str:
+    """Canonical string key for exact matching of equivalent topics."""
+    return ' '.join(normalize_topic(topic))
+
+
+class TopicIndex:
+    """In-memory inverted index over normalized topics with IDF-weighted cosine lookup.
+
+    Documents are partitioned (e.g. by difficulty) so lookups only compare
+    like with like. Exact canonical matches are a single dict hit; near
+    matches only score documents sharing at least one token with the query,
+    and very common tokens contribute at most `max_candidates` recent postings
+    so lookups stay bounded as the index grows.
+    """
+
+    def __init__(self, max_candidates: int = 256):
+        self.max_candidates = max_candidates
+        self._lock = threading.RLock()
+        self._docs: Dict[int, Tuple[str, Tuple[str, ...]]] = {}
+        self._exact: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        self._postings: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self._doc_freq: Dict[str, int] = defaultdict(int)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id: int, topic: str, partition: str = '') -> None:
+        """Index a topic under the given document id."""
+        tokens = normalize_topic(topic)
+        if not tokens:
+            return
+        with self._lock:
+            if doc_id in self._docs:
+                return
+            self._docs[doc_id] = (partition, tokens)
+            # Newest document wins exact matches
+            self._exact[(partition, tokens)] = doc_id
+            for token in tokens:
+                self._postings[(partition, token)].append(doc_id)
+                self._doc_freq[token] += 1
+
+    def remove(self, doc_id: int) -> None:
+        """Drop a document from the index."""
+        with self._lock:
+            entry = self._docs.pop(doc_id, None)
+            if entry is None:
+                return
+            partition, tokens = entry
+            if self._exact.get((partition, tokens)) == doc_id:
+                del self._exact[(partition, tokens)]
+            for token in tokens:
+                postings = self._postings.get((partition, token))
+                if postings and doc_id in postings:
+                    postings.remove(doc_id)
+                self._doc_freq[token] -= 1
+
+    def clear(self) -> None:
+        """Remove every document."""
+        with self._lock:
+            self._docs.clear()
+            self._exact.clear()
+            self._postings.clear()
+            self._doc_freq.clear()
+
+    def _weight(self, token: str) -> float:
+        idf = math.log((len(self._docs) + 1) / (self._doc_freq.get(token, 0) + 1)) + 1.0
+        return idf * GENERIC_WEIGHT if token in GENERIC_TERMS else idf
+
+    def lookup(self, topic: str, partition: str = '', threshold: float = 0.85) -> Optional[Tuple[int, float]]:
+        """Return (doc_id, similarity) of the closest indexed topic at or above threshold."""
+        tokens = normalize_topic(topic)
+        if not tokens:
+            return None
+
+        with self._lock:
+            exact = self._exact.get((partition, tokens))
+            if exact is not None:
+                return exact, 1.0
+
+            weights = {token: self._weight(token) for token in tokens}
+            query_norm = math.sqrt(sum(w * w for w in weights.values()))
+
+            # Gather candidates from the rarest tokens first
+            candidates = set()
+            for token in sorted(tokens, key=lambda t: self._doc_freq.get(t, 0)):
+                postings = self._postings.get((partition, token))
+                if postings:
+                    candidates.update(postings[-self.max_candidates:])
+                if len(candidates) >= self.max_candidates:
+                    break
+
+            best = None
+            for doc_id in candidates:
+                doc_tokens = self._docs[doc_id][1]
+                dot = 0.0
+                doc_norm = 0.0
+                for token in doc_tokens:
+                    weight = weights.get(token)
+                    doc_weight = weight if weight is not None else self._weight(token)
+                    doc_norm += doc_weight * doc_weight
+                    if weight is not None:
+                        dot += weight * doc_weight
+                score = dot / (query_norm * math.sqrt(doc_norm))
+                if score >= threshold and (best is None or score > best[1]
+                                           or (score == best[1] and doc_id > best[0])):
+                    best = (doc_id, score)
+            return best
@@ -0,0 +1,131 @@
+"""Delete search history in bounded batches with short transactions.
+
+One DELETE over a large history holds SQLite's write lock until it commits,
+stalling every other writer. Here rows, and the renders, section indexes and
+quiz prefetches that hang off them, are removed BATCH_SIZE at a time, each
+batch in its own transaction, with a BATCH_PAUSE between batches so waiting
+writers get the lock. Retention purges can append the rows to gzip NDJSON
+archives (the history export format, importable as-is) before deleting them.
+"""
+import gzip
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from src.config.settings import HISTORY_DELETION_CONFIG, HISTORY_EXPORT_CONFIG
+from src.core.models.database import db
+from src.core.models.lesson_section import LessonSection
+from src.core.models.prefetched_quiz import PrefetchedQuiz
+from src.core.models.rendered_lesson import RenderedLesson
+from src.core.models.search_history import SearchHistory
+from src.core.services.history_export import EXPORT_FIELDS, export_lines
+from src.core.services.history_version import bump_history_version
+from src.core.services.lesson_sections import delete_unused_blobs
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ('user_id', *EXPORT_FIELDS)
+
+
+def _delete_batch(history_ids: List[int]) -> int:
+    """Delete history rows and everything keyed by them. The caller commits."""
+    RenderedLesson.query.filter(RenderedLesson.history_id.in_(history_ids)).delete(synchronize_session=False)
+    PrefetchedQuiz.query.filter(PrefetchedQuiz.lesson_history_id.in_(history_ids)).delete(synchronize_session=False)
+    hashes = [blob_hash for (blob_hash,) in db.session.query(LessonSection.hash).filter(
+        LessonSection.history_id.in_(history_ids)).distinct()]
+    LessonSection.query.filter(LessonSection.history_id.in_(history_ids)).delete(synchronize_session=False)
+    if hashes:
+        delete_unused_blobs(hashes)
+
+    user_ids = [user_id for (user_id,) in db.session.query(SearchHistory.user_id).filter(
+        SearchHistory.id.in_(history_ids)).distinct()]
+    deleted = SearchHistory.query.filter(SearchHistory.id.in_(history_ids)).delete(synchronize_session=False)
+    # Bulk deletes bypass the ORM hook that bumps history validators
+    for user_id in user_ids:
+        bump_history_version(user_id)
+    return deleted
+
+
+def archive_rows(history_ids: List[int], path: str) -> None:
+    """Append history rows to a gzip NDJSON archive (one gzip member per call)."""
+    columns = [getattr(SearchHistory, field) for field in ARCHIVE_FIELDS]
+    rows = db.session.execute(
+        select(*columns).where(SearchHistory.id.in_(history_ids)).order_by(SearchHistory.id))
+    items = ({**dict(zip(ARCHIVE_FIELDS, row)),
+              'created_at': row.created_at.isoformat() if row.created_at else None} for row in rows)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with gzip.open(path, 'ab', compresslevel=HISTORY_EXPORT_CONFIG['GZIP_LEVEL']) as archive:
+        for block in export_lines(items):
+            archive.write(block)
+
+
+def delete_history_rows(criteria: Iterable, batch_size: Optional[int] = None, pause: Optional[float] = None,
+                        archive_path: Optional[str] = None) -> int:
+    """Delete the history rows matching `criteria` in batches, committing each; returns rows deleted.
+
+    Batches are taken in id order, so rows inserted while the deletion runs
+    are only removed if they match and sort after the current batch.
+    """
+    criteria = list(criteria)
+    batch_size = batch_size or HISTORY_DELETION_CONFIG['BATCH_SIZE']
+    pause = HISTORY_DELETION_CONFIG['BATCH_PAUSE'] if pause is None else pause
+    deleted, last_id = 0, 0
+    while True:
+        history_ids = [history_id for (history_id,) in db.session.query(SearchHistory.id).filter(
+            *criteria, SearchHistory.id > last_id
+        ).order_by(SearchHistory.id).limit(batch_size)]
+        if not history_ids:
+            break
+        try:
+            if archive_path:
+                archive_rows(history_ids, archive_path)
+            deleted += _delete_batch(history_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        last_id = history_ids[-1]
+        if len(history_ids) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def delete_user_history(user_id: int, history_ids: List[int]) -> List[int]:
+    """Delete the listed rows that belong to the user; returns the ids that were deleted."""
+    owned = [history_id for (history_id,) in db.session.query(SearchHistory.id).filter(
+        SearchHistory.user_id == user_id, SearchHistory.id.in_(set(history_ids)))]
+    if owned:
+        delete_history_rows([SearchHistory.id.in_(owned)])
+    return owned
+
+
+def clear_user_history(user_id: int) -> int:
+    """Delete all of a user's history; returns rows deleted."""
+    return delete_history_rows([SearchHistory.user_id == user_id])
+
+
+def purge_expired_history(days: Optional[int] = None, archive: Optional[bool] = None,
+                          now: Optional[datetime] = None) -> Dict:
+    """Delete (or archive, then delete) history older than the retention age.
+
+    Does nothing when the retention age is 0. Archives go to
+    ARCHIVE_DIR/history-<date>.ndjson.gz.
+    """
+    days = HISTORY_DELETION_CONFIG['RETENTION_DAYS'] if days is None else days
+    if archive is None:
+        archive = HISTORY_DELETION_CONFIG['RETENTION_MODE'] == 'archive'
+    if days <= 0:
+        return {'deleted': 0, 'cutoff': None, 'archive': None}
+
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+    archive_path = os.path.join(HISTORY_DELETION_CONFIG['ARCHIVE_DIR'],
+                                f"history-{now:%Y%m%d}.ndjson.gz") if archive else None
+    start = time.perf_counter()
+    deleted = delete_history_rows([SearchHistory.created_at < cutoff], archive_path=archive_path)
+    logger.info("Retention purge removed %d history rows older than %s in %.1f s%s", deleted, cutoff.isoformat(),
+                time.perf_counter() - start, f" (archived to {archive_path})" if archive_path else '')
+    return {'deleted': deleted, 'cutoff': cutoff.isoformat(), 'archive': archive_path if deleted else None}
@@ -0,0 +1,223 @@
+"""Streaming export and batched import of a user's search history as NDJSON.
+
+Export reads rows in id order through a streaming cursor, CHUNK_SIZE rows
+at a time, and yields one JSON object per line in blocks of roughly
+BUFFER_BYTES (gzip-compressed on the fly when asked), so memory stays
+constant however large the history is. Import reads the same format line
+by line and inserts IMPORT_BATCH_SIZE rows per transaction. Rendered lessons and
+section indexes of imported lessons are built lazily on first view.
+"""
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from src.config.settings import HISTORY_EXPORT_CONFIG
+from src.core.models.database import db
+from src.core.models.search_history import SearchHistory
+from src.core.services.history_version import bump_history_version
+from src.core.utils.json_provider import dumps_bytes, loads
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ('id', 'topic', 'difficulty', 'content_type', 'created_at', 'content')
+CONTENT_TYPES = ('lesson', 'quiz')
+MAX_TOPIC_LENGTH = 200
+MAX_DIFFICULTY_LENGTH = 50
+MAX_REPORTED_ERRORS = 20
+
+
+class HistoryImportError(ValueError):
+    """The import body cannot be read (bad compression or an over-long line)."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def iter_history_rows(user_id: int, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """A user's history rows as dicts, oldest first, fetched `chunk_size` rows at a time.
+
+    Plain column rows are streamed, so nothing accumulates in the session's
+    identity map.
+    """
+    chunk_size = chunk_size or HISTORY_EXPORT_CONFIG['CHUNK_SIZE']
+    columns = [getattr(SearchHistory, field) for field in EXPORT_FIELDS]
+    result = db.session.execute(
+        select(*columns).where(SearchHistory.user_id == user_id).order_by(SearchHistory.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    try:
+        for row in result:
+            item = dict(zip(EXPORT_FIELDS, row))
+            item['created_at'] = item['created_at'].isoformat() if item['created_at'] else None
+            yield item
+    finally:
+        result.close()
+
+
+def export_lines(rows: Iterable[Dict], buffer_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """NDJSON for the rows, yielded in blocks of about `buffer_bytes`."""
+    buffer_bytes = buffer_bytes or HISTORY_EXPORT_CONFIG['BUFFER_BYTES']
+    block, size = [], 0
+    for row in rows:
+        line = dumps_bytes(row) + b'\n'
+        block.append(line)
+        size += len(line)
+        if size >= buffer_bytes:
+            yield b''.join(block)
+            block, size = [], 0
+    if block:
+        yield b''.join(block)
+
+
+def gzip_stream(blocks: Iterable[bytes], level: Optional[int] = None) -> Iterator[bytes]:
+    """Gzip-compress a stream of blocks incrementally, yielding only non-empty output."""
+    compressor = zlib.compressobj(
+        HISTORY_EXPORT_CONFIG['GZIP_LEVEL'] if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_history(user_id: int, compress: bool = False) -> Iterator[bytes]:
+    """The whole export body for a user."""
+    blocks = export_lines(iter_history_rows(user_id))
+    return gzip_stream(blocks) if compress else blocks
+
+
+def _read_blocks(stream: IO[bytes], gzipped: bool) -> Iterator[bytes]:
+    """Raw body blocks, gunzipped with bounded output per step when `gzipped`."""
+    size = HISTORY_EXPORT_CONFIG['BUFFER_BYTES']
+    blocks = iter(lambda: stream.read(size), b'')
+    if not gzipped:
+        yield from blocks
+        return
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        for block in blocks:
+            while block:
+                data = decompressor.decompress(block, size)
+                if data:
+                    yield data
+                block = decompressor.unconsumed_tail
+                if decompressor.eof:
+                    # Concatenated gzip members decode as one body
+                    block = decompressor.unused_data
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decompressor.flush()
+    except zlib.error as e:
+        raise HistoryImportError(f"Invalid gzip body: {e}") from e
+
+
+def iter_import_lines(stream: IO[bytes], gzipped: bool = False,
+                      max_line_bytes: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """Numbered non-blank lines of an NDJSON body, decompressing gzip as it is read."""
+    max_line_bytes = max_line_bytes or HISTORY_EXPORT_CONFIG['MAX_LINE_BYTES']
+    pending, pending_size, number = [], 0, 0
+    for data in _read_blocks(stream, gzipped):
+        lines = data.split(b'\n')
+        if len(lines) > 1:
+            lines[0] = b''.join(pending) + lines[0]
+            pending, pending_size = [], 0
+            for line in lines[:-1]:
+                number += 1
+                if line.strip():
+                    yield number, line
+        pending.append(lines[-1])
+        pending_size += len(lines[-1])
+        if pending_size > max_line_bytes:
+            raise HistoryImportError(f"Line {number + 1} is longer than {max_line_bytes} bytes", status=413)
+    line = b''.join(pending)
+    if line.strip():
+        yield number + 1, line
+
+
+def validate_history_record(record) -> Tuple[Optional[Dict], List[str]]:
+    """Check one imported history record. Returns (clean values, errors)."""
+    if not isinstance(record, dict):
+        return None, ['Record must be an object']
+
+    errors = []
+    topic = record.get('topic')
+    if not isinstance(topic, str) or not topic.strip() or len(topic) > MAX_TOPIC_LENGTH:
+        errors.append(f"topic must be a non-empty string of at most {MAX_TOPIC_LENGTH} characters")
+
+    difficulty = record.get('difficulty')
+    if difficulty is not None and (not isinstance(difficulty, str) or len(difficulty) > MAX_DIFFICULTY_LENGTH):
+        errors.append(f"difficulty must be a string of at most {MAX_DIFFICULTY_LENGTH} characters")
+
+    content = record.get('content')
+    if content is not None and not isinstance(content, str):
+        errors.append('content must be a string')
+
+    content_type = record.get('content_type')
+    if content_type not in CONTENT_TYPES:
+        errors.append(f"content_type must be one of: {', '.join(CONTENT_TYPES)}")
+
+    created_at = record.get('created_at')
+    if created_at is not None:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            if created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            errors.append('created_at must be an ISO 8601 timestamp')
+
+    if errors:
+        return None, errors
+    return {
+        'topic': topic,
+        'difficulty': difficulty,
+        'content': content,
+        'content_type': content_type,
+        'created_at': created_at or datetime.utcnow(),
+    }, []
+
+
+def _insert_batch(user_id: int, batch: List[Dict]) -> None:
+    db.session.execute(insert(SearchHistory), [{'user_id': user_id, **values} for values in batch])
+    # Core inserts bypass the ORM hook that bumps history validators
+    bump_history_version(user_id)
+    db.session.commit()
+
+
+def import_history(user_id: int, stream: IO[bytes], gzipped: bool = False,
+                   batch_size: Optional[int] = None) -> Dict:
+    """Insert the records of an NDJSON body, committing every `batch_size` rows.
+
+    Invalid lines are skipped and reported (the first MAX_REPORTED_ERRORS
+    of them); a body that cannot be read stops the import with
+    `HistoryImportError`, keeping the batches already committed.
+    """
+    batch_size = batch_size or HISTORY_EXPORT_CONFIG['IMPORT_BATCH_SIZE']
+    counts = {'imported': 0, 'invalid': 0}
+    errors = []
+    batch = []
+    try:
+        for number, line in iter_import_lines(stream, gzipped):
+            try:
+                values, record_errors = validate_history_record(loads(line))
+            except ValueError:
+                values, record_errors = None, ['Line is not valid JSON']
+            if record_errors:
+                counts['invalid'] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': number, 'errors': record_errors})
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                _insert_batch(user_id, batch)
+                counts['imported'] += len(batch)
+                batch = []
+        if batch:
+            _insert_batch(user_id, batch)
+            counts['imported'] += len(batch)
+    except HistoryImportError:
+        db.session.rollback()
+        logger.warning("History import for user %s stopped after %d rows", user_id, counts['imported'])
+        raise
+    return {**counts, 'errors': errors}
@@ -0,0 +1,48 @@
+"""Per-user search history versions used as HTTP cache validators."""
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+from src.core.models.database import db
+from src.core.models.search_history import HistoryVersion, SearchHistory
+
+def _bump(connection, user_ids: Iterable[int]) -> None:
+    now = datetime.utcnow()
+    table = HistoryVersion.__table__
+    for user_id in sorted(set(user_ids)):
+        # Atomic increment, so concurrent writers never share a version
+        result = connection.execute(
+            update(table).where(table.c.user_id == user_id).values(
+                version=table.c.version + 1, updated_at=now
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(user_id=user_id, version=1, updated_at=now))
+
+def bump_history_version(user_id: int) -> None:
+    """Bump a user's version for changes that bypass the ORM unit of work (bulk deletes)."""
+    _bump(db.session.connection(), [user_id])
+
+def get_history_version(user_id: int) -> Tuple[int, Optional[datetime]]:
+    """Current (version, updated_at) for a user; (0, None) before any history exists."""
+    row = db.session.query(HistoryVersion.version, HistoryVersion.updated_at).filter(
+        HistoryVersion.user_id == user_id
+    ).first()
+    return (row[0], row[1]) if row else (0, None)
+
+def history_etag(user_id: int, version: int, variant: str) -> str:
+    """Opaque validator for one representation of a user's history."""
+    return hashlib.sha1(f"{user_id}:{version}:{variant}".encode('utf-8')).hexdigest()[:24]
+
+@event.listens_for(Session, 'before_flush')
+def _bump_on_history_change(session, flush_context, instances):
+    """Bump versions for every user whose history rows are inserted, changed or deleted."""
+    user_ids = [
+        obj.user_id
+        for obj in (*session.new, *session.deleted, *session.dirty)
+        if isinstance(obj, SearchHistory) and obj.user_id is not None
+        and (obj not in session.dirty or session.is_modified(obj))
+    ]
+    if user_ids:
+        _bump(session.connection(), user_ids)
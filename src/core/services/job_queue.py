@@ -0,0 +1,239 @@
+"""SQLite-backed job queue with visibility timeouts and deduplication.
+
+Jobs live in their own SQLite file (stdlib sqlite3) so any number of worker
+processes can share them. A claimed job is invisible to other workers until
+its lease expires; a worker that dies mid-job therefore only delays it. Jobs
+with the same dedupe key share one in-flight job, and every requesting user
+is recorded as a waiter with their own result.
+"""
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from typing import Dict, List, Optional, Tuple
+from src.core.utils.json_provider import dumps_bytes, loads
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+# Returned by complete() when another worker has taken over the job
+LEASE_LOST = 'lease_lost'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at REAL NOT NULL,
+    lease_owner TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (status, visible_at);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_inflight_dedupe
+    ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+CREATE TABLE IF NOT EXISTS job_waiters (
+    job_id TEXT NOT NULL REFERENCES jobs (id),
+    user_id INTEGER NOT NULL,
+    result TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, user_id)
+);
+"""
+
+
+class JobQueue:
+    """Durable queue of generation jobs shared across processes."""
+
+    def __init__(self, path: str, visibility_timeout: float = 300.0, max_attempts: int = 3,
+                 retry_delay: float = 5.0):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front."""
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def enqueue(self, kind: str, payload: Dict, user_id: int, dedupe_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Queue a job for a user, joining an identical in-flight job if there is one.
+
+        Returns (job_id, deduplicated).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = None
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)",
+                    (dedupe_key, QUEUED, RUNNING)
+                ).fetchone()
+            if row is not None:
+                job_id = row['id']
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, dedupe_key, payload, status, visible_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, dedupe_key, dumps_bytes(payload).decode('utf-8'), QUEUED, now, now, now)
+                )
+            conn.execute(
+                "INSERT OR IGNORE INTO job_waiters (job_id, user_id, created_at) VALUES (?, ?, ?)",
+                (job_id, user_id, now)
+            )
+        return job_id, row is not None
+
+    def claim(self, owner: str) -> Optional[Dict]:
+        """Lease the oldest visible job, including running jobs whose lease expired."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) AND visible_at <= ? ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            if row['attempts'] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated_at = ? WHERE id = ?",
+                    (FAILED, row['error'] or 'Job exceeded its attempts', now, row['id'])
+                )
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, visible_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, owner, now + self.visibility_timeout, now, row['id'])
+            )
+        job = dict(row)
+        job['payload'] = loads(job['payload'])
+        job['attempts'] += 1
+        return job
+
+    def pending_waiters(self, job_id: str) -> List[int]:
+        """Users still waiting for their result of this job."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT user_id FROM job_waiters WHERE job_id = ? AND result IS NULL ORDER BY created_at",
+                (job_id,)
+            ).fetchall()
+        return [row['user_id'] for row in rows]
+
+    def renew_lease(self, job_id: str, owner: str) -> bool:
+        """Extend the owner's lease by the visibility timeout; False once another worker has the job."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET visible_at = ?, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + self.visibility_timeout, time.time(), job_id, owner, RUNNING)
+            )
+        return cursor.rowcount > 0
+
+    def record_result(self, job_id: str, owner: str, user_id: int, result: Dict) -> bool:
+        """Store one waiter's result if `owner` still holds the lease. Returns whether it was stored."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE job_waiters SET result = ? WHERE job_id = ? AND user_id = ? AND result IS NULL "
+                "AND EXISTS (SELECT 1 FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?)",
+                (dumps_bytes(result).decode('utf-8'), job_id, user_id, job_id, owner, RUNNING)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, owner: str) -> str:
+        """Mark the job succeeded.
+
+        Returns SUCCEEDED, RUNNING when waiters joined after the last pass (save
+        their results and call again), or LEASE_LOST when `owner` no longer
+        holds the job.
+        """
+        with self._transaction() as conn:
+            pending = conn.execute(
+                "SELECT 1 FROM job_waiters WHERE job_id = ? AND result IS NULL LIMIT 1", (job_id,)
+            ).fetchone()
+            if pending is not None:
+                held = conn.execute(
+                    "SELECT 1 FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?", (job_id, owner, RUNNING)
+                ).fetchone()
+                return RUNNING if held is not None else LEASE_LOST
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = ?",
+                (SUCCEEDED, time.time(), job_id, owner, RUNNING)
+            )
+        return SUCCEEDED if cursor.rowcount > 0 else LEASE_LOST
+
+    def fail(self, job_id: str, owner: str, error: str, retry: bool = True) -> None:
+        """Record a failure; retryable jobs become visible again after `retry_delay`."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            if retry and row['attempts'] < self.max_attempts:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, visible_at = ?, updated_at = ? "
+                    "WHERE id = ? AND lease_owner = ?",
+                    (QUEUED, error, now + self.retry_delay * row['attempts'], now, job_id, owner)
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated_at = ? "
+                    "WHERE id = ? AND lease_owner = ?",
+                    (FAILED, error, now, job_id, owner)
+                )
+
+    def get(self, job_id: str, user_id: int) -> Optional[Dict]:
+        """Job status and this user's result, or None if the user is not a waiter."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT j.id, j.kind, j.status, j.attempts, j.error, j.created_at, j.updated_at, w.result "
+                "FROM jobs j JOIN job_waiters w ON w.job_id = j.id WHERE j.id = ? AND w.user_id = ?",
+                (job_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+        if row['result'] is not None:
+            # A user's result is final once stored, even while other waiters are pending
+            job['status'] = SUCCEEDED
+            job['result'] = loads(row['result'])
+        elif row['status'] == FAILED:
+            job['error'] = row['error']
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
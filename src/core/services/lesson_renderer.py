@@ -0,0 +1,261 @@
+"""Render lesson markdown to a normalized AST and sanitized, KaTeX-ready HTML."""
+import hashlib
+import html
+import re
+from typing import Dict, List, Optional
+from src.core.models.database import db
+from src.core.models.rendered_lesson import RenderedLesson
+from src.core.models.search_history import SearchHistory
+from src.core.utils.json_provider import dumps_bytes
+
+# Bump when the AST or HTML output changes so stored renders are rebuilt on read
+RENDERER_VERSION = 1
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+_LIST_RE = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+_HR_RE = re.compile(r'^(\*{3,}|-{3,}|_{3,})$')
+_INLINE_RE = re.compile(
+    r'(?P<display>\$\$.+?\$\$)'
+    r'|(?P<math>\$[^$\n]+?\$)'
+    r'|(?P<code>`[^`\n]+`)'
+    r'|(?P<strong>\*\*.+?\*\*|__.+?__)'
+    r'|(?P<em>\*[^*\s][^*\n]*?\*|_[^_\s][^_\n]*?_)'
+    r'|(?P<link>\[[^\]\n]+\]\([^)\s]+\))'
+)
+_SAFE_URL_RE = re.compile(r'^(https?://|mailto:)', re.IGNORECASE)
+
+def parse_inline(text: str) -> List[Dict]:
+    """Split a line of markdown into inline nodes."""
+    nodes = []
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > position:
+            nodes.append({'type': 'text', 'text': text[position:match.start()]})
+        kind = match.lastgroup
+        token = match.group()
+        if kind == 'display':
+            nodes.append({'type': 'math', 'display': True, 'tex': token[2:-2].strip()})
+        elif kind == 'math':
+            nodes.append({'type': 'math', 'display': False, 'tex': token[1:-1].strip()})
+        elif kind == 'code':
+            nodes.append({'type': 'code', 'text': token[1:-1]})
+        elif kind == 'strong':
+            nodes.append({'type': 'strong', 'children': parse_inline(token[2:-2])})
+        elif kind == 'em':
+            nodes.append({'type': 'em', 'children': parse_inline(token[1:-1])})
+        else:
+            label, url = token[1:-1].split('](', 1)
+            nodes.append({'type': 'link', 'href': url, 'children': parse_inline(label)})
+        position = match.end()
+    if position < len(text):
+        nodes.append({'type': 'text', 'text': text[position:]})
+    return nodes
+
+def _starts_block(stripped: str) -> bool:
+    return (
+        stripped.startswith(('#', '```', '$$', '>'))
+        or bool(_LIST_RE.match(stripped))
+        or bool(_HR_RE.match(stripped))
+    )
+
+def parse_markdown(text: str) -> List[Dict]:
+    """Parse lesson markdown into a list of block nodes."""
+    blocks: List[Dict] = []
+    lines = text.replace('\r\n', '\n').split('\n')
+    i = 0
+    while i < len(lines):
+        stripped = lines[i].strip()
+        if not stripped:
+            i += 1
+            continue
+
+        if stripped.startswith('```'):
+            lang = stripped[3:].strip()
+            body = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                body.append(lines[i])
+                i += 1
+            blocks.append({'type': 'code', 'lang': lang, 'text': '\n'.join(body)})
+            i += 1
+            continue
+
+        if stripped.startswith('$$'):
+            if len(stripped) > 4 and stripped.endswith('$$'):
+                blocks.append({'type': 'math', 'display': True, 'tex': stripped[2:-2].strip()})
+                i += 1
+                continue
+            body = [stripped[2:]] if stripped[2:] else []
+            i += 1
+            while i < len(lines) and not lines[i].strip().endswith('$$'):
+                body.append(lines[i])
+                i += 1
+            if i < len(lines):
+                body.append(lines[i].strip()[:-2])
+            blocks.append({'type': 'math', 'display': True, 'tex': '\n'.join(body).strip()})
+            i += 1
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            blocks.append({
+                'type': 'heading',
+                'level': len(heading.group(1)),
+                'children': parse_inline(heading.group(2))
+            })
+            i += 1
+            continue
+
+        if _HR_RE.match(stripped):
+            blocks.append({'type': 'hr'})
+            i += 1
+            continue
+
+        item = _LIST_RE.match(lines[i])
+        if item:
+            ordered = item.group(2)[0].isdigit()
+            items = []
+            while i < len(lines):
+                line = lines[i]
+                item = _LIST_RE.match(line)
+                if item and item.group(2)[0].isdigit() == ordered:
+                    items.append(item.group(3).strip())
+                elif item or not line.strip():
+                    # Blank lines between items keep the list going; a different list type ends it
+                    if item:
+                        break
+                    following = next((candidate for candidate in lines[i + 1:] if candidate.strip()), '')
+                    next_item = _LIST_RE.match(following)
+                    if not next_item or next_item.group(2)[0].isdigit() != ordered:
+                        break
+                elif line.startswith((' ', '\t')) and items:
+                    items[-1] += ' ' + line.strip()
+                else:
+                    break
+                i += 1
+            blocks.append({
+                'type': 'list',
+                'ordered': ordered,
+                'items': [parse_inline(text) for text in items]
+            })
+            continue
+
+        if stripped.startswith('>'):
+            body = []
+            while i < len(lines) and lines[i].strip().startswith('>'):
+                body.append(lines[i].strip()[1:].strip())
+                i += 1
+            blocks.append({'type': 'blockquote', 'children': parse_inline(' '.join(body))})
+            continue
+
+        body = [stripped]
+        i += 1
+        while i < len(lines) and lines[i].strip() and not _starts_block(lines[i].strip()):
+            body.append(lines[i].strip())
+            i += 1
+        blocks.append({'type': 'paragraph', 'children': parse_inline(' '.join(body))})
+    return blocks
+
+def _render_inline(nodes: List[Dict]) -> str:
+    parts = []
+    for node in nodes:
+        kind = node['type']
+        if kind == 'text':
+            parts.append(html.escape(node['text'], quote=False))
+        elif kind == 'math':
+            css = 'math math-display' if node['display'] else 'math math-inline'
+            parts.append(f'<span class="{css}">{html.escape(node["tex"], quote=False)}</span>')
+        elif kind == 'code':
+            parts.append(f'<code>{html.escape(node["text"], quote=False)}</code>')
+        elif kind == 'strong':
+            parts.append(f'<strong>{_render_inline(node["children"])}</strong>')
+        elif kind == 'em':
+            parts.append(f'<em>{_render_inline(node["children"])}</em>')
+        elif kind == 'link':
+            label = _render_inline(node['children'])
+            if _SAFE_URL_RE.match(node['href']):
+                href = html.escape(node['href'], quote=True)
+                parts.append(f'<a href="{href}" rel="noopener noreferrer nofollow">{label}</a>')
+            else:
+                parts.append(label)
+    return ''.join(parts)
+
+def render_html(blocks: List[Dict]) -> str:
+    """Render parsed blocks as HTML. All text is escaped; math is left as TeX for KaTeX."""
+    parts = []
+    for block in blocks:
+        kind = block['type']
+        if kind == 'heading':
+            parts.append(f'<h{block["level"]}>{_render_inline(block["children"])}</h{block["level"]}>')
+        elif kind == 'paragraph':
+            parts.append(f'<p>{_render_inline(block["children"])}</p>')
+        elif kind == 'list':
+            tag = 'ol' if block['ordered'] else 'ul'
+            items = ''.join(f'<li>{_render_inline(item)}</li>' for item in block['items'])
+            parts.append(f'<{tag}>{items}</{tag}>')
+        elif kind == 'code':
+            lang = re.sub(r'[^A-Za-z0-9_+-]', '', block['lang'])
+            css = f' class="language-{lang}"' if lang else ''
+            parts.append(f'<pre><code{css}>{html.escape(block["text"], quote=False)}</code></pre>')
+        elif kind == 'math':
+            parts.append(f'<div class="math math-display">{html.escape(block["tex"], quote=False)}</div>')
+        elif kind == 'blockquote':
+            parts.append(f'<blockquote>{_render_inline(block["children"])}</blockquote>')
+        elif kind == 'hr':
+            parts.append('<hr>')
+    return '\n'.join(parts)
+
+def content_etag(markdown: str) -> str:
+    """Strong validator shared by every rendered representation of a lesson."""
+    digest = hashlib.sha256(f"{RENDERER_VERSION}\x00{markdown}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def render_lesson(markdown: str) -> Dict:
+    """Render formatted lesson markdown into every stored representation."""
+    blocks = parse_markdown(markdown)
+    return {
+        'markdown': markdown,
+        'ast': dumps_bytes(blocks).decode('utf-8'),
+        'html': render_html(blocks),
+        'etag': content_etag(markdown),
+        'version': RENDERER_VERSION,
+    }
+
+def rendered_from_row(row: RenderedLesson) -> Dict:
+    """Stored representations of a lesson in the shape returned by render_lesson."""
+    return {
+        'markdown': row.markdown,
+        'ast': row.ast,
+        'html': row.html,
+        'etag': row.etag,
+        'version': row.version,
+    }
+
+def get_rendered_lesson(history_id: int) -> Optional[RenderedLesson]:
+    """Stored render for a history row, or None if missing or from an older renderer."""
+    row = db.session.get(RenderedLesson, history_id)
+    if row is None or row.version != RENDERER_VERSION:
+        return None
+    return row
+
+def save_rendered_lesson(history_id: int, rendered: Dict) -> RenderedLesson:
+    """Store (or replace) the render for a history row. The caller commits."""
+    row = db.session.get(RenderedLesson, history_id)
+    if row is None:
+        row = RenderedLesson(history_id=history_id)
+        db.session.add(row)
+    row.markdown = rendered['markdown']
+    row.ast = rendered['ast']
+    row.html = rendered['html']
+    row.etag = rendered['etag']
+    row.version = rendered['version']
+    return row
+
+def delete_rendered_lessons(user_id: int, history_id: Optional[int] = None) -> int:
+    """Remove stored renders for one history row or all of a user's rows. The caller commits."""
+    history_ids = db.session.query(SearchHistory.id).filter(SearchHistory.user_id == user_id)
+    if history_id is not None:
+        history_ids = history_ids.filter(SearchHistory.id == history_id)
+    return RenderedLesson.query.filter(
+        RenderedLesson.history_id.in_(history_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
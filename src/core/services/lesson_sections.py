@@ -0,0 +1,129 @@
+"""Split lessons into addressable sections with content-hashed, shared storage.
+
+At save time a lesson's markdown is cut at its section headings into an
+ordered index (heading, offset, length, hash); the text of each section is
+stored once per distinct hash in `section_blob`, so a lesson saved for
+several users (or regenerated identically) shares its section bodies.
+Clients can then fetch one section, or a range, instead of the whole lesson.
+Sections tile the content exactly: joining them in order gives it back.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.core.models.database import db
+from src.core.models.lesson_section import LessonSection, SectionBlob
+from src.core.models.search_history import SearchHistory
+
+_HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+
+def section_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def split_sections(content: str) -> List[Dict]:
+    """Ordered sections of a lesson, split at the shallowest heading level that repeats.
+
+    Text before the first section heading (usually the lesson title) becomes
+    its own section. Returns dicts with heading, offset, length, hash and text.
+    """
+    headings = [(len(m.group(1)), m.start(), m.group(2).strip()) for m in _HEADING_RE.finditer(content)]
+    levels = [level for level, _, _ in headings]
+    repeated = [level for level in set(levels) if levels.count(level) > 1]
+    split_level = min(repeated or levels or [0])
+    starts = [(start, title) for level, start, title in headings if level == split_level]
+
+    if not starts:
+        bounds = [(0, headings[0][2] if headings else None)]
+    else:
+        preamble = content[:starts[0][0]]
+        if preamble.strip():
+            titles = [title for level, start, title in headings if start < starts[0][0]]
+            bounds = [(0, titles[0] if titles else None)] + starts
+        else:
+            # Leading blank lines belong to the first section
+            bounds = [(0, starts[0][1])] + starts[1:]
+
+    sections = []
+    for index, (start, heading) in enumerate(bounds):
+        end = bounds[index + 1][0] if index + 1 < len(bounds) else len(content)
+        text = content[start:end]
+        sections.append({
+            'heading': heading[:500] if heading else None,
+            'offset': start,
+            'length': end - start,
+            'hash': section_hash(text),
+            'text': text,
+        })
+    return sections
+
+def save_lesson_sections(history_id: int, content: str) -> List[Dict]:
+    """Index a lesson's sections, storing only section bodies not seen before. The caller commits."""
+    sections = split_sections(content or '')
+    LessonSection.query.filter_by(history_id=history_id).delete(synchronize_session=False)
+    bodies = {section['hash']: section['text'] for section in sections}
+    # Bodies another save (or this one's earlier copy) already stored are skipped by the database,
+    # so concurrent saves of the same content cannot collide
+    db.session.execute(sqlite_insert(SectionBlob).on_conflict_do_nothing(index_elements=['hash']),
+                       [{'hash': blob_hash, 'content': text} for blob_hash, text in bodies.items()])
+    db.session.execute(insert(LessonSection), [{
+        'history_id': history_id,
+        'position': position,
+        'heading': section['heading'],
+        'offset': section['offset'],
+        'length': section['length'],
+        'hash': section['hash'],
+    } for position, section in enumerate(sections)])
+    return sections
+
+def get_section_index(history_id: int) -> List[LessonSection]:
+    """Section metadata for a lesson, in order."""
+    return LessonSection.query.filter_by(history_id=history_id).order_by(LessonSection.position).all()
+
+def get_section(history_id: int, position: int) -> Optional[LessonSection]:
+    """Metadata for one section, without loading the rest of the index."""
+    return db.session.get(LessonSection, (history_id, position))
+
+def ensure_section_index(history_id: int) -> List[LessonSection]:
+    """The section index, built on first use for lessons saved before sections were stored."""
+    index = get_section_index(history_id)
+    if not index:
+        history_item = db.session.get(SearchHistory, history_id)
+        save_lesson_sections(history_id, history_item.content or '')
+        db.session.commit()
+        index = get_section_index(history_id)
+    return index
+
+def get_section_contents(history_id: int, first: int, last: int) -> List[Tuple[LessonSection, str]]:
+    """Sections `first`..`last` (inclusive) with their text, read from the shared blobs."""
+    return db.session.query(LessonSection, SectionBlob.content).join(
+        SectionBlob, SectionBlob.hash == LessonSection.hash
+    ).filter(
+        LessonSection.history_id == history_id,
+        LessonSection.position.between(first, last)
+    ).order_by(LessonSection.position).all()
+
+def parse_section_range(spec: str, count: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (first, last) from "2", "1-3" or "2-"; None when no section is in range.
+
+    Raises ValueError for anything else.
+    """
+    match = re.fullmatch(r'(\d+)(?:(-)(\d*))?', spec.strip())
+    if not match:
+        raise ValueError(f"Invalid section range: {spec!r}")
+    first = int(match.group(1))
+    last = first if not match.group(2) else int(match.group(3)) if match.group(3) else count - 1
+    if first > last or first >= count:
+        return None
+    return first, min(last, count - 1)
+
+def delete_unused_blobs(hashes: Optional[Iterable[str]] = None) -> int:
+    """Drop section bodies no lesson refers to any more, checking only `hashes` when given.
+
+    The caller commits.
+    """
+    used = db.session.query(LessonSection.hash).distinct()
+    query = SectionBlob.query.filter(~SectionBlob.hash.in_(used.scalar_subquery()))
+    if hashes is not None:
+        query = query.filter(SectionBlob.hash.in_(list(hashes)))
+    return query.delete(synchronize_session=False)
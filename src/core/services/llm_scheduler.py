@@ -0,0 +1,253 @@
+"""Priority scheduling and per-user fair queuing of LLM calls.
+
+Every OpenAI call takes a slot from a process-wide scheduler capped at
+MAX_CONCURRENCY. When all slots are busy, callers queue by priority class
+(interactive > feedback > background) and, within a class, are served by
+deficit round robin across users: each user's backlog earns QUANTUM tokens
+per turn and a call costs its estimated tokens, so one user's batch cannot
+starve everyone else. Classes are strict: background work only runs when no
+interactive or feedback call is waiting.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Deque, Dict, Hashable, Optional
+from src.config.settings import LLM_SCHEDULER_CONFIG
+from src.core.utils.profiling import span
+
+WAIT_SAMPLES = 1000
+
+
+class Priority(IntEnum):
+    """Priority classes, most urgent first."""
+    INTERACTIVE = 0
+    FEEDBACK = 1
+    BACKGROUND = 2
+
+
+class LLMQueueTimeout(Exception):
+    """A call waited longer than the queue timeout for a slot."""
+
+
+class _Waiter:
+    __slots__ = ('flow', 'cost', 'priority', 'event', 'enqueued_at', 'granted')
+
+    def __init__(self, flow: Hashable, cost: float, priority: Priority):
+        self.flow = flow
+        self.cost = cost
+        self.priority = priority
+        self.event = threading.Event()
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+
+
+class FairQueue:
+    """Deficit round robin over per-user FIFO queues. Not thread-safe on its own."""
+
+    def __init__(self, quantum: float):
+        self.quantum = quantum
+        self.flows: Dict[Hashable, Deque[_Waiter]] = {}
+        self.deficit: Dict[Hashable, float] = {}
+        self.active: Deque[Hashable] = deque()
+        self.size = 0
+
+    def push(self, waiter: _Waiter) -> None:
+        flow = self.flows.get(waiter.flow)
+        if flow is None:
+            flow = self.flows[waiter.flow] = deque()
+            self.deficit[waiter.flow] = 0.0
+            self.active.append(waiter.flow)
+        flow.append(waiter)
+        self.size += 1
+
+    def pop(self) -> Optional[_Waiter]:
+        while self.active:
+            key = self.active[0]
+            flow = self.flows[key]
+            if self.deficit[key] < flow[0].cost:
+                # Not enough credit yet: top up and move to the back of the round
+                self.deficit[key] += self.quantum
+                self.active.rotate(-1)
+                continue
+            waiter = flow.popleft()
+            self.deficit[key] -= waiter.cost
+            self.size -= 1
+            if not flow:
+                self._drop(key)
+            return waiter
+        return None
+
+    def remove(self, waiter: _Waiter) -> None:
+        flow = self.flows.get(waiter.flow)
+        if flow is None or waiter not in flow:
+            return
+        flow.remove(waiter)
+        self.size -= 1
+        if not flow:
+            self._drop(waiter.flow)
+
+    def _drop(self, key: Hashable) -> None:
+        # An idle user keeps no credit, as in classic DRR
+        del self.flows[key]
+        del self.deficit[key]
+        self.active.remove(key)
+
+
+class _WaitStats:
+    """Queue-wait counters plus a window of recent waits for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def add(self, wait_ms: float, queued: bool) -> None:
+        self.count += 1
+        self.queued += queued
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+        self.recent.append(wait_ms)
+
+    def summary(self) -> Dict:
+        recent = sorted(self.recent)
+
+        def pct(fraction):
+            return round(recent[min(len(recent) - 1, int(fraction * len(recent)))], 3) if recent else 0.0
+        return {
+            'calls': self.count,
+            'queued': self.queued,
+            'timeouts': self.timeouts,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class LLMScheduler:
+    """Global concurrency cap with priority classes and per-user fairness."""
+
+    def __init__(self, max_concurrency: int = 8, quantum: float = 2000.0, queue_timeout: Optional[float] = 30.0):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queues = {priority: FairQueue(quantum) for priority in Priority}
+        self._stats = {priority: _WaitStats() for priority in Priority}
+
+    def _queued(self) -> int:
+        return sum(queue.size for queue in self._queues.values())
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the next waiters. Caller holds the lock."""
+        while self._in_flight < self.max_concurrency:
+            waiter = None
+            for priority in Priority:
+                waiter = self._queues[priority].pop()
+                if waiter is not None:
+                    break
+            if waiter is None:
+                return
+            self._in_flight += 1
+            waiter.granted = True
+            self._stats[waiter.priority].add((time.perf_counter() - waiter.enqueued_at) * 1e3, True)
+            waiter.event.set()
+
+    def acquire(self, user: Hashable, priority: Priority = Priority.INTERACTIVE, cost: float = 1.0,
+                timeout: Optional[float] = None) -> None:
+        """Block until a slot is granted; raises LLMQueueTimeout after `timeout` seconds."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._queued():
+                self._in_flight += 1
+                self._stats[priority].add(0.0, False)
+                return
+            waiter = _Waiter(user, cost, priority)
+            self._queues[priority].push(waiter)
+
+        if waiter.event.wait(timeout):
+            return
+        with self._lock:
+            if waiter.granted:
+                return
+            self._queues[priority].remove(waiter)
+            self._stats[priority].timeouts += 1
+        raise LLMQueueTimeout(f"LLM queue is full, waited {timeout:.0f}s for a slot")
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free and nobody is waiting (for optional extra calls)."""
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._queued():
+                self._in_flight += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, user: Hashable, priority: Priority = Priority.INTERACTIVE, cost: float = 1.0,
+             timeout: Optional[float] = None):
+        """Hold one concurrency slot for the duration of the block."""
+        self.acquire(user, priority, cost, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict:
+        """Queue depth and wait metrics, e.g. for autoscaling."""
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'queued': self._queued(),
+                'queued_users': len({key for queue in self._queues.values() for key in queue.flows}),
+                'queued_by_priority': {p.name.lower(): self._queues[p].size for p in Priority},
+                'wait': {p.name.lower(): self._stats[p].summary() for p in Priority},
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> Optional[LLMScheduler]:
+    """Get the process-wide scheduler, or None when scheduling is disabled."""
+    global _scheduler
+    if not LLM_SCHEDULER_CONFIG['ENABLED']:
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    LLM_SCHEDULER_CONFIG['MAX_CONCURRENCY'],
+                    LLM_SCHEDULER_CONFIG['QUANTUM_TOKENS'],
+                    LLM_SCHEDULER_CONFIG['QUEUE_TIMEOUT'],
+                )
+    return _scheduler
+
+def set_scheduler(scheduler: Optional[LLMScheduler]) -> None:
+    """Replace the process-wide scheduler (None rebuilds it from config)."""
+    global _scheduler
+    _scheduler = scheduler
+
+@contextmanager
+def llm_slot(cost: float, user_id: Optional[int] = None, priority: Priority = Priority.INTERACTIVE):
+    """Hold a scheduler slot for a call costing `cost` predicted tokens (a no-op when scheduling is disabled)."""
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield
+        return
+    with span('llm.queue_wait', priority=priority.name.lower()):
+        scheduler.acquire(user_id if user_id is not None else 'anonymous', priority, cost)
+    try:
+        yield
+    finally:
+        scheduler.release()
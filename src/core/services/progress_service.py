@@ -0,0 +1,381 @@
+"""Progress recording and incrementally maintained analytics."""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from src.config.settings import PROGRESS_CONFIG
+from src.core.models.database import db
+from src.core.models.progress_summary import ProgressSummary, ProgressWeekly
+from src.core.models.user import Progress, ProgressIngestKey
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = (
+    'attempts', 'total_score', 'best_score', 'last_score', 'time_spent',
+    'current_streak', 'best_streak', 'first_completed_at', 'last_completed_at',
+)
+WEEKLY_FIELDS = ('attempts', 'total_score', 'time_spent')
+MAX_TOPIC_LENGTH = 200
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+
+def week_start(moment: datetime):
+    """Monday of the week containing the given moment."""
+    day = moment.date()
+    return day - timedelta(days=day.weekday())
+
+def _apply_to_summary(summary: ProgressSummary, progress: Progress) -> None:
+    """Fold one attempt into a topic summary.
+
+    Attempts are folded in insertion order, so "last" and streaks follow the
+    order results were recorded, not their reported completion time.
+    """
+    score = progress.score or 0.0
+    completed_at = progress.completed_at
+    summary.attempts = (summary.attempts or 0) + 1
+    summary.total_score = (summary.total_score or 0.0) + score
+    summary.best_score = score if summary.best_score is None else max(summary.best_score, score)
+    summary.last_score = score
+    summary.time_spent = (summary.time_spent or 0) + (progress.time_spent or 0)
+    if score >= PROGRESS_CONFIG['PASSING_SCORE']:
+        summary.current_streak = (summary.current_streak or 0) + 1
+    else:
+        summary.current_streak = 0
+    summary.best_streak = max(summary.best_streak or 0, summary.current_streak)
+    if summary.first_completed_at is None or completed_at < summary.first_completed_at:
+        summary.first_completed_at = completed_at
+    if summary.last_completed_at is None or completed_at > summary.last_completed_at:
+        summary.last_completed_at = completed_at
+
+def _apply_to_weekly(weekly: ProgressWeekly, progress: Progress) -> None:
+    """Fold one attempt into a weekly bucket."""
+    weekly.attempts = (weekly.attempts or 0) + 1
+    weekly.total_score = (weekly.total_score or 0.0) + (progress.score or 0.0)
+    weekly.time_spent = (weekly.time_spent or 0) + (progress.time_spent or 0)
+
+def apply_progress(progress: Progress) -> None:
+    """Update the summary tables for a new Progress row within the current session."""
+    apply_progress_batch([progress])
+
+def _summary_delta(user_id: int, topic: str, records: List[Progress]) -> Tuple[Dict, int]:
+    """Aggregates of one topic's new attempts (in insertion order) as a fresh summary row.
+
+    Also returns how many attempts pass before the first failing one, which
+    extends the stored streak.
+    """
+    passing = PROGRESS_CONFIG['PASSING_SCORE']
+    scores = [progress.score or 0.0 for progress in records]
+    runs, run = [], 0
+    for score in scores:
+        run = run + 1 if score >= passing else 0
+        runs.append(run)
+    leading = next((i for i, score in enumerate(scores) if score < passing), len(scores))
+    return {
+        'user_id': user_id,
+        'topic': topic,
+        'attempts': len(records),
+        'total_score': sum(scores),
+        'best_score': max(scores),
+        'last_score': scores[-1],
+        'time_spent': sum(progress.time_spent or 0 for progress in records),
+        'current_streak': runs[-1],
+        'best_streak': max(runs),
+        'first_completed_at': min(progress.completed_at for progress in records),
+        'last_completed_at': max(progress.completed_at for progress in records),
+    }, leading
+
+def _upsert_summary(delta: Dict, leading: int) -> None:
+    """Fold a topic delta into its summary row with one INSERT ... ON CONFLICT DO UPDATE.
+
+    Every counter is computed from the stored row inside the statement, so
+    concurrent requests for the same topic neither lose updates nor race to
+    create the row.
+    """
+    stored = ProgressSummary.__table__.c
+    statement = sqlite_insert(ProgressSummary).values(**delta)
+    new = statement.excluded
+    all_passing = leading == delta['attempts']
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['user_id', 'topic'],
+        set_={
+            'attempts': stored.attempts + new.attempts,
+            'total_score': stored.total_score + new.total_score,
+            'best_score': func.max(func.coalesce(stored.best_score, new.best_score), new.best_score),
+            'last_score': new.last_score,
+            'time_spent': stored.time_spent + new.time_spent,
+            # A batch of only passing attempts extends the stored streak; otherwise its trailing run wins
+            'current_streak': stored.current_streak + new.current_streak if all_passing else new.current_streak,
+            'best_streak': func.max(stored.best_streak, new.best_streak, stored.current_streak + leading),
+            'first_completed_at': func.min(func.coalesce(stored.first_completed_at, new.first_completed_at),
+                                           new.first_completed_at),
+            'last_completed_at': func.max(func.coalesce(stored.last_completed_at, new.last_completed_at),
+                                          new.last_completed_at),
+        }
+    ))
+
+def _upsert_weekly(user_id: int, start, records: List[Progress]) -> None:
+    stored = ProgressWeekly.__table__.c
+    statement = sqlite_insert(ProgressWeekly).values(
+        user_id=user_id,
+        week_start=start,
+        attempts=len(records),
+        total_score=sum(progress.score or 0.0 for progress in records),
+        time_spent=sum(progress.time_spent or 0 for progress in records),
+    )
+    new = statement.excluded
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['user_id', 'week_start'],
+        set_={
+            'attempts': stored.attempts + new.attempts,
+            'total_score': stored.total_score + new.total_score,
+            'time_spent': stored.time_spent + new.time_spent,
+        }
+    ))
+
+def apply_progress_batch(records: List[Progress]) -> None:
+    """Update the summary tables for new Progress rows of one user, in insertion order.
+
+    One upsert per touched topic and week; the caller commits.
+    """
+    if not records:
+        return
+    user_id = records[0].user_id
+    for progress in records:
+        if progress.completed_at is None:
+            progress.completed_at = datetime.utcnow()
+
+    by_topic: Dict[str, List[Progress]] = {}
+    by_week: Dict[object, List[Progress]] = {}
+    for progress in records:
+        by_topic.setdefault(progress.topic, []).append(progress)
+        by_week.setdefault(week_start(progress.completed_at), []).append(progress)
+    for topic, topic_records in by_topic.items():
+        _upsert_summary(*_summary_delta(user_id, topic, topic_records))
+    for start, week_records in by_week.items():
+        _upsert_weekly(user_id, start, week_records)
+    # Summary rows already loaded in this session are stale now
+    for stale in [obj for obj in db.session.identity_map.values()
+                  if isinstance(obj, (ProgressSummary, ProgressWeekly)) and obj.user_id == user_id]:
+        db.session.expire(stale)
+
+def record_progress(user_id: int, topic: str, score: float, time_spent: Optional[int] = None,
+                    difficulty_level: Optional[str] = None) -> Progress:
+    """Add a Progress row and update its aggregates. The caller commits."""
+    progress = Progress(
+        user_id=user_id,
+        topic=topic,
+        score=score,
+        time_spent=time_spent,
+        difficulty_level=difficulty_level,
+        completed_at=datetime.utcnow()
+    )
+    db.session.add(progress)
+    apply_progress(progress)
+    return progress
+
+def validate_progress_record(record) -> Tuple[Optional[Dict], List[str]]:
+    """Check one bulk progress record. Returns (clean values, errors)."""
+    if not isinstance(record, dict):
+        return None, ['Record must be an object']
+
+    errors = []
+    topic = record.get('topic')
+    if not isinstance(topic, str) or not topic.strip() or len(topic) > MAX_TOPIC_LENGTH:
+        errors.append(f"topic must be a non-empty string of at most {MAX_TOPIC_LENGTH} characters")
+
+    score = record.get('score')
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        errors.append('score must be a number')
+
+    time_spent = record.get('time_spent')
+    if time_spent is not None and (isinstance(time_spent, bool) or not isinstance(time_spent, int) or time_spent < 0):
+        errors.append('time_spent must be a non-negative integer')
+
+    difficulty_level = record.get('difficulty_level')
+    if difficulty_level is not None and (not isinstance(difficulty_level, str) or len(difficulty_level) > 20):
+        errors.append('difficulty_level must be a string of at most 20 characters')
+
+    key = record.get('idempotency_key')
+    if key is not None and (not isinstance(key, str) or not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH):
+        errors.append(f"idempotency_key must be a string of at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+
+    completed_at = record.get('completed_at')
+    if completed_at is not None:
+        try:
+            completed_at = datetime.fromisoformat(completed_at)
+            if completed_at.tzinfo is not None:
+                completed_at = completed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            errors.append('completed_at must be an ISO 8601 timestamp')
+
+    if errors:
+        return None, errors
+    return {
+        'topic': topic,
+        'score': float(score),
+        'time_spent': time_spent,
+        'difficulty_level': difficulty_level,
+        'completed_at': completed_at or datetime.utcnow(),
+        'idempotency_key': key,
+    }, []
+
+def ingest_progress_batch(user_id: int, records: List) -> List[Dict]:
+    """Validate and insert many progress records in a single transaction.
+
+    Records carrying an idempotency key that was already recorded (in an
+    earlier request or earlier in the same batch) are reported as
+    duplicates instead of being inserted again. Returns one status dict per
+    input record, in order.
+    """
+    for attempt in range(2):
+        try:
+            return _ingest_progress_batch(user_id, records)
+        except IntegrityError:
+            # A concurrent retry recorded one of our keys first; the second pass sees it as a duplicate
+            db.session.rollback()
+            if attempt:
+                raise
+
+def _ingest_progress_batch(user_id: int, records: List) -> List[Dict]:
+    results: List[Optional[Dict]] = [None] * len(records)
+    pending = []  # (index, values)
+
+    keys = {r['idempotency_key'] for r in records
+            if isinstance(r, dict) and isinstance(r.get('idempotency_key'), str)}
+    known_keys = {}
+    if keys:
+        known_keys = dict(db.session.query(ProgressIngestKey.key, ProgressIngestKey.progress_id).filter(
+            ProgressIngestKey.user_id == user_id, ProgressIngestKey.key.in_(keys)
+        ))
+
+    batch_keys = {}
+    for index, record in enumerate(records):
+        values, errors = validate_progress_record(record)
+        if errors:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+            continue
+        key = values['idempotency_key']
+        if key in known_keys:
+            results[index] = {'index': index, 'status': 'duplicate', 'id': known_keys[key]}
+            continue
+        if key is not None:
+            if key in batch_keys:
+                results[index] = {'index': index, 'status': 'duplicate', 'duplicate_of': batch_keys[key]}
+                continue
+            batch_keys[key] = index
+        pending.append((index, values))
+
+    if pending:
+        rows = [{
+            'user_id': user_id,
+            'topic': values['topic'],
+            'score': values['score'],
+            'time_spent': values['time_spent'],
+            'difficulty_level': values['difficulty_level'],
+            'completed_at': values['completed_at'],
+        } for _, values in pending]
+        inserted = db.session.execute(
+            insert(Progress).returning(Progress.id, sort_by_parameter_order=True), rows
+        )
+        ids = [row[0] for row in inserted]
+
+        key_rows = [
+            {'user_id': user_id, 'key': values['idempotency_key'], 'progress_id': progress_id,
+             'created_at': datetime.utcnow()}
+            for (_, values), progress_id in zip(pending, ids) if values['idempotency_key']
+        ]
+        if key_rows:
+            db.session.execute(insert(ProgressIngestKey), key_rows)
+
+        apply_progress_batch([Progress(id=progress_id, **row) for progress_id, row in zip(ids, rows)])
+        for (index, _), progress_id in zip(pending, ids):
+            results[index] = {'index': index, 'status': 'created', 'id': progress_id}
+
+    db.session.commit()
+
+    for result in results:
+        if 'duplicate_of' in result:
+            result['id'] = results[result.pop('duplicate_of')].get('id')
+    return results
+
+def get_topic_summaries(user_id: int) -> List[ProgressSummary]:
+    """Per-topic aggregates for a user, most recently active first."""
+    return ProgressSummary.query.filter_by(user_id=user_id).order_by(
+        ProgressSummary.last_completed_at.desc()
+    ).all()
+
+def get_weekly_summaries(user_id: int, weeks: Optional[int] = None) -> List[ProgressWeekly]:
+    """Weekly activity for a user, most recent week first."""
+    query = ProgressWeekly.query.filter_by(user_id=user_id).order_by(ProgressWeekly.week_start.desc())
+    if weeks:
+        query = query.limit(weeks)
+    return query.all()
+
+def compute_aggregates(user_id: int) -> Tuple[Dict[str, ProgressSummary], Dict[object, ProgressWeekly]]:
+    """Recompute a user's aggregates from scratch as transient (unsaved) objects."""
+    summaries: Dict[str, ProgressSummary] = {}
+    weeklies: Dict[object, ProgressWeekly] = {}
+    rows = Progress.query.filter_by(user_id=user_id).order_by(Progress.id).yield_per(1000)
+    for progress in rows:
+        summary = summaries.get(progress.topic)
+        if summary is None:
+            summary = summaries[progress.topic] = ProgressSummary(user_id=user_id, topic=progress.topic)
+        _apply_to_summary(summary, progress)
+
+        start = week_start(progress.completed_at)
+        weekly = weeklies.get(start)
+        if weekly is None:
+            weekly = weeklies[start] = ProgressWeekly(user_id=user_id, week_start=start)
+        _apply_to_weekly(weekly, progress)
+    return summaries, weeklies
+
+def _user_ids(user_id: Optional[int]) -> List[int]:
+    if user_id is not None:
+        return [user_id]
+    return [row[0] for row in db.session.query(Progress.user_id).distinct()]
+
+def backfill_summaries(user_id: Optional[int] = None) -> int:
+    """Rebuild summary tables from Progress for one user or everyone. Returns users processed."""
+    user_ids = _user_ids(user_id)
+    for uid in user_ids:
+        summaries, weeklies = compute_aggregates(uid)
+        ProgressSummary.query.filter_by(user_id=uid).delete()
+        ProgressWeekly.query.filter_by(user_id=uid).delete()
+        db.session.add_all(summaries.values())
+        db.session.add_all(weeklies.values())
+        db.session.commit()
+    logger.info("Backfilled progress summaries for %d users", len(user_ids))
+    return len(user_ids)
+
+def _differences(label, stored, expected, fields):
+    if stored is None:
+        return [f"{label}: missing summary row"]
+    if expected is None:
+        return [f"{label}: unexpected summary row"]
+    problems = []
+    for field in fields:
+        stored_value, expected_value = getattr(stored, field), getattr(expected, field)
+        if isinstance(expected_value, float) and stored_value is not None:
+            if abs(stored_value - expected_value) > 1e-6:
+                problems.append(f"{label}: {field} is {stored_value}, expected {expected_value}")
+        elif stored_value != expected_value:
+            problems.append(f"{label}: {field} is {stored_value}, expected {expected_value}")
+    return problems
+
+def check_consistency(user_id: Optional[int] = None) -> List[str]:
+    """Compare stored aggregates with a full recomputation. Returns a list of discrepancies."""
+    problems = []
+    for uid in _user_ids(user_id):
+        summaries, weeklies = compute_aggregates(uid)
+        stored_summaries = {s.topic: s for s in ProgressSummary.query.filter_by(user_id=uid)}
+        stored_weeklies = {w.week_start: w for w in ProgressWeekly.query.filter_by(user_id=uid)}
+        for topic in set(summaries) | set(stored_summaries):
+            problems.extend(_differences(
+                f"user {uid} topic {topic!r}", stored_summaries.get(topic), summaries.get(topic), SUMMARY_FIELDS
+            ))
+        for start in set(weeklies) | set(stored_weeklies):
+            problems.extend(_differences(
+                f"user {uid} week {start}", stored_weeklies.get(start), weeklies.get(start), WEEKLY_FIELDS
+            ))
+    return problems
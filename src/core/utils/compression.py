@@ -0,0 +1,71 @@
+"""Response compression (gzip, and brotli when installed)."""
+import gzip
+import logging
+from flask import request
+from src.config.settings import COMPRESSION_CONFIG
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Each encoding is a distinct representation, so it gets its own strong ETag
+ENCODING_ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/html',
+    'text/plain',
+    'text/event-stream',
+}
+
+def choose_encoding(accept_encodings) -> str:
+    """Best encoding the client accepts, or '' for identity."""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return ''
+
+def compress(data: bytes, encoding: str, config=None) -> bytes:
+    """Compress a body with the given content coding."""
+    config = config or COMPRESSION_CONFIG
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+def compress_response(response, config=None):
+    """Compress a buffered response in place when it is large enough to benefit."""
+    config = config or COMPRESSION_CONFIG
+    if (
+        not config['ENABLED']
+        or response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < config['MIN_SIZE']:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+
+    response.set_data(compress(data, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ENCODING_ETAG_SUFFIXES[encoding], weak=weak)
+    return response
+
+def init_compression(app) -> None:
+    """Compress eligible responses for the whole app."""
+    app.after_request(compress_response)
+    logger.info("Response compression: %s", 'gzip+br' if brotli is not None else 'gzip')
@@ -0,0 +1,33 @@
+"""Conditional request helpers (ETag / Last-Modified)."""
+from datetime import datetime
+from typing import Optional
+from flask import current_app, request
+from src.core.utils.compression import ENCODING_ETAG_SUFFIXES
+
+def is_not_modified(etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy is still current.
+
+    If-None-Match takes precedence over If-Modified-Since. Compressed responses
+    carry a suffixed ETag, so those variants count as matches too.
+    """
+    if request.if_none_match:
+        return any(
+            request.if_none_match.contains_weak(etag + suffix)
+            for suffix in ('', *ENCODING_ETAG_SUFFIXES.values())
+        )
+    if last_modified is not None and request.if_modified_since is not None:
+        # HTTP dates have second resolution
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def with_validators(response, etag: str, last_modified: Optional[datetime] = None):
+    """Attach cache validators; clients must revalidate before reusing the body."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None):
+    """Empty 304 carrying the current validators."""
+    return with_validators(current_app.response_class(status=304), etag, last_modified)
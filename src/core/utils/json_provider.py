@@ -0,0 +1,88 @@
+"""Fast JSON encoding for API responses (orjson when installed, stdlib otherwise)."""
+import json
+import logging
+from typing import Any, Union
+from flask.json.provider import DefaultJSONProvider, _default
+from src.config.settings import JSON_CONFIG
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+USE_ORJSON = orjson is not None and JSON_CONFIG['BACKEND'] != 'stdlib'
+if JSON_CONFIG['BACKEND'] == 'orjson' and orjson is None:
+    logger.warning("JSON_BACKEND=orjson but orjson is not installed; using the stdlib encoder")
+
+if orjson is not None:
+    # Hand datetimes and dataclasses to Flask's default so output matches the stdlib provider
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class RawJSON:
+    """Already-serialized JSON that is spliced into the output without re-encoding."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Union[bytes, str]):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+
+def _encode_default(obj: Any) -> Any:
+    if isinstance(obj, RawJSON):
+        # Nested raw values are rare; only top-level dict values are spliced
+        return loads(obj.data)
+    return _default(obj)
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes."""
+    if isinstance(obj, dict) and any(isinstance(value, RawJSON) for value in obj.values()):
+        items = sorted(obj.items()) if sort_keys else obj.items()
+        return b'{' + b','.join(
+            dumps_bytes(str(key)) + b':' + (value.data if isinstance(value, RawJSON) else dumps_bytes(value, sort_keys))
+            for key, value in items
+        ) + b'}'
+    if USE_ORJSON:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        try:
+            return orjson.dumps(obj, default=_encode_default, option=options)
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; the stdlib encoder handles them
+    return json.dumps(
+        obj, default=_encode_default, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON text or UTF-8 bytes."""
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that writes response bodies as bytes in one pass.
+
+    Keys are not sorted by default (set `sort_keys` to restore Flask's
+    behaviour), and `RawJSON` values in a top-level dict are spliced in as-is.
+    """
+
+    default = staticmethod(_encode_default)
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, self.sort_keys).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return self._app.response_class(f"{self.dumps(obj, indent=2)}\n", mimetype=self.mimetype)
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys) + b'\n', mimetype=self.mimetype)
@@ -1,63 +1,81 @@
 """OpenAI client utilities."""
 from openai import OpenAI
-import os
 import logging
 from flask import current_app
-from dotenv import load_dotenv
+from src.core.utils.structured_logging import log_payload
+from src.core.utils.profiling import span
+from src.core.services.llm_scheduler import Priority, llm_slot
+from src.core.services.ai.model_router import DEFAULT, get_router
+from src.core.services.ai.hedging import get_hedger, is_hedged
+from src.core.services.ai.token_budget import budget_call
 
 logger = logging.getLogger(__name__)
 
 def get_openai_client():
     """Get OpenAI client instance."""
-    # Reload environment variables
-    load_dotenv()
-    
-    # Debug: print environment variable
-    logger.info(f"Environment OPENAI_API_KEY: {os.getenv('OPENAI_API_KEY')[:10]}...")
-    
     api_key = current_app.config.get('OPENAI_API_KEY')
     if not api_key:
         raise ValueError("OpenAI API key not found in app configuration")
-    
-    # Debug: print config key
-    logger.info(f"Config OPENAI_API_KEY: {api_key[:10]}...")
-    
-    logger.info("Setting up OpenAI client...")
-    client = OpenAI(api_key=api_key)
-    logger.info("OpenAI client setup successfully")
-    return client
-
-def get_openai_response(messages, model="gpt-3.5-turbo"):
-    """Get response from OpenAI API."""
+
+    logger.debug("Setting up OpenAI client")
+    return OpenAI(api_key=api_key, base_url=current_app.config.get('OPENAI_BASE_URL'))
+
+def get_openai_response(messages, model=None, user_id=None, priority=Priority.INTERACTIVE,
+                        route=DEFAULT, difficulty=None):
+    """Get response from OpenAI API.
+
+    Model, token limit, temperature and timeout come from the model router
+    for `route` (and `difficulty`); an explicit `model` wins. The prompt is
+    measured first: `max_tokens` shrinks to fit the context window, and
+    oversized prompts or users over their token limit raise a
+    TokenBudgetError. The call then waits for a slot from the LLM scheduler,
+    queued fairly per `user_id` within its `priority` class.
+    """
     try:
-        logger.info(f"Getting OpenAI response with model {model}")
-        logger.info(f"Messages: {messages}")
+        params = get_router().resolve(route, difficulty)
+        model = model or params['model']
+        logger.debug("Getting OpenAI response with model %s (route %s)", model, route)
+        log_payload(logger, "OpenAI request messages", messages, model=model)
         client = get_openai_client()
-        
+
         # Check if we need JSON response
         needs_json = any("JSON" in msg["content"] for msg in messages if msg["role"] == "system")
-        
+
         # Add system message for JSON responses
         if needs_json:
             messages = [
                 {"role": "system", "content": "You are a helpful assistant that always responds in valid JSON format."},
                 *messages
             ]
-        
+
+        budget = budget_call(messages, model, params['max_tokens'], user_id)
+
         # Create completion with appropriate format
-        response = client.chat.completions.create(
+        request = dict(
             model=model,
             messages=messages,
-            temperature=0.7,
-            max_tokens=2000,
-            response_format={"type": "json_object"} if needs_json else None
+            temperature=params['temperature'],
+            max_tokens=budget['max_tokens'],
+            response_format={"type": "json_object"} if needs_json else None,
+            timeout=params.get('timeout')
         )
-        
-        logger.info("Successfully received OpenAI response")
+        hedger = get_hedger() if is_hedged(route) else None
+        with llm_slot(budget['predicted_tokens'], user_id, priority), \
+                span('openai.chat_completions', model=model, route=route, prompt_tokens=budget['prompt_tokens']):
+            if hedger is None:
+                response = client.chat.completions.create(**request)
+            else:
+                clients = iter([client])
+
+                def start_attempt():
+                    # Each attempt gets its own client so the loser can be closed
+                    attempt_client = next(clients, None) or get_openai_client()
+                    return (lambda: attempt_client.chat.completions.create(**request)), attempt_client.close
+                response = hedger.call(route, start_attempt)
+
         content = response.choices[0].message.content
-        logger.info(f"Response content: {content[:200]}...")  # Log first 200 chars
+        log_payload(logger, "OpenAI response content", content, model=model)
         return content
     except Exception as e:
-        logger.error(f"Error getting OpenAI response: {str(e)}")
-        logger.error(f"Error type: {type(e)}")
+        logger.error("Error getting OpenAI response (%s): %s", type(e).__name__, e)
         raise
@@ -0,0 +1,284 @@
+"""Opt-in per-request profiling: stack samples, CPU time, SQL timings and upstream spans.
+
+A request is profiled when it is sampled (PROFILING_SAMPLE_RATE) or carries
+the debug header with the configured token. Results are written as JSON to a
+rotating directory and listed through the admin blueprint. When profiling is
+disabled no hooks are installed; when enabled, unprofiled requests cost one
+branch.
+"""
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from flask import g, request
+from sqlalchemy import event
+from src.config.settings import PROFILING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HEADER = 'X-Debug-Profile'
+MAX_STACK_DEPTH = 64
+MAX_STATEMENT_CHARS = 300
+
+_active: ContextVar[Optional['RequestProfile']] = ContextVar('active_profile', default=None)
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack at a fixed interval and count folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name=f"profiler-{thread_id}")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfile:
+    """Everything captured for one profiled request."""
+
+    def __init__(self, method: str, path: str, reason: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.queries: List[Dict] = []
+        self.spans: List[Dict] = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._sampler = StackSampler(threading.get_ident(), interval)
+        self._sampler.start()
+
+    def offset_ms(self) -> float:
+        return (time.perf_counter() - self._wall_start) * 1e3
+
+    def add_query(self, statement: str, start_ms: float, duration_ms: float) -> None:
+        self.queries.append({
+            'statement': statement[:MAX_STATEMENT_CHARS],
+            'start_ms': round(start_ms, 3),
+            'duration_ms': round(duration_ms, 3),
+        })
+
+    def add_span(self, name: str, start_ms: float, duration_ms: float, error: Optional[str], attrs: Dict) -> None:
+        self.spans.append({
+            'name': name,
+            'start_ms': round(start_ms, 3),
+            'duration_ms': round(duration_ms, 3),
+            'error': error,
+            **attrs,
+        })
+
+    def finish(self, status: int) -> Dict:
+        wall_ms = self.offset_ms()
+        cpu_ms = (time.thread_time() - self._cpu_start) * 1e3
+        self._sampler.stop()
+        by_statement: Dict[str, Dict] = {}
+        for query in self.queries:
+            entry = by_statement.setdefault(query['statement'], {'statement': query['statement'], 'count': 0, 'total_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + query['duration_ms'], 3)
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': status,
+            'reason': self.reason,
+            'started_at': self.started_at,
+            'wall_ms': round(wall_ms, 3),
+            'cpu_ms': round(cpu_ms, 3),
+            'sql': {
+                'count': len(self.queries),
+                'total_ms': round(sum(q['duration_ms'] for q in self.queries), 3),
+                'by_statement': sorted(by_statement.values(), key=lambda e: e['total_ms'], reverse=True),
+                'queries': self.queries,
+            },
+            'spans': self.spans,
+            'samples': {
+                'interval_ms': self._sampler.interval * 1e3,
+                'count': self._sampler.samples,
+                'stacks': dict(self._sampler.stacks.most_common()),
+            },
+        }
+
+
+class ProfileStore:
+    """Keep the most recent profiles as JSON files in one directory."""
+
+    def __init__(self, directory: str, max_profiles: int = 200):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _files(self) -> List[str]:
+        # Names start with a zero-padded timestamp, so lexical order is age order
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def save(self, profile: Dict) -> None:
+        name = f"{int(profile['started_at'] * 1e6):020d}-{profile['id']}.json"
+        path = os.path.join(self.directory, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(profile, f)
+        os.replace(path + '.tmp', path)
+        with self._lock:
+            files = self._files()
+            for old in files[:max(0, len(files) - self.max_profiles)]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        for name in self._files():
+            if name[:-5].endswith(f"-{profile_id}"):
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        """Newest first, without samples or individual queries."""
+        summaries = []
+        for name in reversed(self._files()[-limit:]):
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            summaries.append({
+                'id': profile['id'],
+                'method': profile['method'],
+                'path': profile['path'],
+                'status': profile['status'],
+                'reason': profile['reason'],
+                'started_at': profile['started_at'],
+                'wall_ms': profile['wall_ms'],
+                'cpu_ms': profile['cpu_ms'],
+                'sql_count': profile['sql']['count'],
+                'sql_ms': profile['sql']['total_ms'],
+                'span_count': len(profile['spans']),
+            })
+        return summaries
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time an upstream call inside the active profile; a no-op otherwise."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    start_ms = profile.offset_ms()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        profile.add_span(name, start_ms, profile.offset_ms() - start_ms, error, attrs)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is not None:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    starts = conn.info.get('profile_query_start')
+    if profile is None or not starts:
+        return
+    start = starts.pop()
+    duration_ms = (time.perf_counter() - start) * 1e3
+    profile.add_query(statement, profile.offset_ms() - duration_ms, duration_ms)
+
+
+def init_profiling(app, config=None, engine=None) -> Optional[ProfileStore]:
+    """Install profiling hooks on the app if enabled. Returns the store, or None."""
+    config = config or PROFILING_CONFIG
+    if not config['ENABLED']:
+        return None
+
+    store = ProfileStore(config['STORE_DIR'], config['MAX_PROFILES'])
+    app.extensions['profile_store'] = store
+    sample_rate = config['SAMPLE_RATE']
+    debug_token = config['DEBUG_TOKEN']
+    interval = config['SAMPLE_INTERVAL_MS'] / 1000.0
+
+    if engine is None:
+        from src.core.models.database import db
+        with app.app_context():
+            engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_profile():
+        if random.random() >= sample_rate and DEBUG_HEADER not in request.headers:
+            return
+        header = request.headers.get(DEBUG_HEADER)
+        if header is not None:
+            if not debug_token or not hmac.compare_digest(header, debug_token):
+                return
+            reason = 'header'
+        else:
+            reason = 'sampled'
+        profile = RequestProfile(request.method, request.path, reason, interval)
+        g.profile_token = _active.set(profile)
+
+    def finish_profile(status: int) -> None:
+        token = g.pop('profile_token', None)
+        if token is None:
+            return
+        profile = _active.get()
+        _active.reset(token)
+        try:
+            result = profile.finish(status)
+            store.save(result)
+            logger.info("Profiled %s %s: %.1f ms wall, %.1f ms CPU, %d queries (profile %s)",
+                        result['method'], result['path'], result['wall_ms'], result['cpu_ms'],
+                        result['sql']['count'], result['id'])
+        except Exception as e:
+            logger.error("Failed to store request profile: %s", e)
+
+    @app.after_request
+    def end_profile(response):
+        if 'profile_token' in g:
+            response.headers['X-Profile-Id'] = _active.get().id
+            finish_profile(response.status_code)
+        return response
+
+    @app.teardown_request
+    def abort_profile(exc):
+        if 'profile_token' in g:
+            finish_profile(500)
+
+    logger.info("Request profiling enabled (sample rate %s, store %s)", sample_rate, config['STORE_DIR'])
+    return store
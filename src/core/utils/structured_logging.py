@@ -0,0 +1,135 @@
+"""Structured, non-blocking logging setup and sampled payload logging."""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Any, Dict, Optional
+
+from src.config.settings import LOGGING_CONFIG
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes present on every LogRecord; anything else came in through `extra`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_payload_settings = {
+    'sample_rate': LOGGING_CONFIG['PAYLOAD_SAMPLE_RATE'],
+    'max_chars': LOGGING_CONFIG['PAYLOAD_MAX_CHARS'],
+}
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['NonBlockingQueueHandler'] = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render log records as single-line JSON objects, including `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the caller and drops records when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only merge the message arguments here; formatting and I/O happen on the listener thread.
+        # The queue is in-process, so exc_info can be handed over as-is.
+        message = record.getMessage()
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(config: Optional[Dict[str, Any]] = None) -> NonBlockingQueueHandler:
+    """Route all logging through a background queue listener and apply configured levels."""
+    global _listener, _queue_handler
+    config = {**LOGGING_CONFIG, **(config or {})}
+
+    shutdown_logging()
+
+    if config['FORMAT'] == 'json':
+        formatter = StructuredFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=config['QUEUE_SIZE']))
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, stream_handler, respect_handler_level=True
+    )
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(config['LEVEL'])
+    for name, level in config['LOGGER_LEVELS'].items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _payload_settings['sample_rate'] = config['PAYLOAD_SAMPLE_RATE']
+    _payload_settings['max_chars'] = config['PAYLOAD_MAX_CHARS']
+
+    _listener.start()
+    return _queue_handler
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def truncate(text: str, max_chars: Optional[int] = None) -> str:
+    """Cut text down to the configured payload size, noting how much was dropped."""
+    if max_chars is None:
+        max_chars = _payload_settings['max_chars']
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, level: int = logging.INFO,
+                sampled: bool = True, **fields) -> bool:
+    """Log a prompt or response payload for a sampled fraction of calls.
+
+    Nothing is formatted unless the record is actually going to be emitted.
+    Returns True when the payload was logged.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    if sampled and random.random() >= _payload_settings['sample_rate']:
+        return False
+
+    text = payload if isinstance(payload, str) else repr(payload)
+    logger.log(level, "%s: %s", label, truncate(text),
+               extra={'payload_chars': len(text), **fields})
+    return True
@@ -4,6 +4,7 @@ import pytest
 from src.app import create_app
 from src.core.models.database import db as _db
 from src.core.models.user import User
+from src.core.services.ai.adaptive_difficulty import get_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 @pytest.fixture(scope='session')
@@ -54,6 +55,8 @@ def session(db):
     transaction.rollback()
     connection.close()
     session.remove()
+    # Unsaved skill estimates belong to the rolled-back test data
+    get_engine().clear()
     
     # Drop all tables
     db.drop_all()
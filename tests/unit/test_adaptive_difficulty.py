@@ -0,0 +1,121 @@
+"""Test the adaptive difficulty engine."""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from src.core.models.progress_summary import SkillEstimate
+from src.core.services.ai.adaptive_difficulty import (
+    INITIAL_RATING, AdaptiveDifficultyEngine, get_engine, load_skill_estimate, save_skill_estimates,
+)
+
+def test_recommendation_follows_results():
+    """Test that strong results raise and weak results lower the difficulty."""
+    engine = AdaptiveDifficultyEngine()
+    assert engine.recommend(1, 'Intro to Python') == 'beginner'
+
+    for _ in range(10):
+        engine.record_result(1, 'python intro', 100, 'intermediate')
+    assert engine.recommend(1, 'Intro to Python') in ('intermediate', 'advanced')
+    assert engine.estimate(1, 'Python')[1] == 10
+
+    for _ in range(20):
+        engine.record_result(1, 'Python', 0.1, 'beginner')
+    assert engine.recommend(1, 'Python') == 'beginner'
+    assert engine.recommend(2, 'Python') == 'beginner'
+
+def test_changes_survive_eviction_until_flushed():
+    """Test batched persistence with a tiny in-memory table."""
+    saved = {}
+
+    def saver(changes):
+        for key, (change, attempts) in changes.items():
+            rating, total = saved.get(key, (INITIAL_RATING, 0))
+            saved[key] = (rating + change, total + attempts)
+
+    engine = AdaptiveDifficultyEngine(capacity=1, flush_interval=3600, saver=saver,
+                                      loader=lambda key: saved.get(key))
+    engine.record_result(1, 'Algebra', 90, 'beginner')
+    rating = engine.estimate(1, 'Algebra')[0]
+    engine.record_result(2, 'Algebra', 10, 'beginner')  # evicts user 1
+    assert saved == {}
+
+    assert engine.estimate(1, 'Algebra')[0] == rating
+    assert engine.flush() == 2
+    assert saved[(1, 'algebra')] == (rating, 1)
+
+    engine.clear()
+    assert engine.estimate(1, 'Algebra') == (rating, 1)
+
+def test_workers_add_to_the_stored_estimate(session, test_user):
+    """Test that two processes saving the same estimate both keep their attempts."""
+    workers = [AdaptiveDifficultyEngine(flush_interval=3600, loader=load_skill_estimate, saver=save_skill_estimates)
+               for _ in range(2)]
+    for worker in workers:
+        worker.record_result(test_user.id, 'Algebra', 100, 'intermediate')
+    gains = [worker.estimate(test_user.id, 'Algebra')[0] - INITIAL_RATING for worker in workers]
+    for worker in workers:
+        assert worker.flush() == 1
+
+    rating, attempts = load_skill_estimate((test_user.id, 'algebra'))
+    assert attempts == 2
+    assert rating == pytest.approx(INITIAL_RATING + sum(gains))
+
+def test_pending_changes_are_saved_on_exit(app):
+    """Test that the exit hook flushes inside the app the engine was created in."""
+    saved = {}
+    engine = AdaptiveDifficultyEngine(flush_interval=3600, saver=saved.update)
+    engine.record_result(1, 'Algebra', 90, 'beginner')
+    with patch('src.core.services.ai.adaptive_difficulty.has_app_context', return_value=True), \
+            patch('src.core.services.ai.adaptive_difficulty.AdaptiveDifficultyEngine', return_value=engine), \
+            patch('src.core.services.ai.adaptive_difficulty._engine', None), \
+            patch('atexit.register') as register:
+        assert get_engine() is engine
+    hook, *args = register.call_args.args
+    hook(*args)
+    assert list(saved) == [(1, 'algebra')]
+
+def test_recommendation_endpoint(test_client, test_user):
+    """Test that posted progress feeds the recommendation endpoint."""
+    get_engine().clear()
+    response = test_client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpass123'
+    })
+    headers = {'Authorization': f"Bearer {response.json['token']}"}
+
+    for _ in range(8):
+        test_client.post('/api/learning/progress', json={
+            'topic': 'Calculus', 'score': 100, 'difficulty_level': 'intermediate'
+        }, headers=headers)
+
+    response = test_client.get('/api/learning/recommendation?topic=calculus', headers=headers)
+    assert response.status_code == 200
+    assert response.json['attempts'] == 8
+    assert response.json['difficulty'] in ('intermediate', 'advanced')
+
+def test_slow_load_does_not_block_other_keys():
+    """Test that a cache miss queries the loader without holding the engine lock."""
+    release = threading.Event()
+
+    def loader(key):
+        if key[0] == 1:
+            release.wait(5)
+        return (1500.0, 3)
+
+    engine = AdaptiveDifficultyEngine(loader=loader)
+    slow = threading.Thread(target=engine.estimate, args=(1, 'Algebra'))
+    slow.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    assert engine.estimate(2, 'Algebra') == (1500.0, 3)
+    assert time.perf_counter() - start < 1
+    release.set()
+    slow.join()
+
+def test_failed_save_leaves_session_usable(session, test_user):
+    """Test that a failed flush rolls back so the request can keep using the session."""
+    with pytest.raises(IntegrityError):
+        save_skill_estimates({(test_user.id, None): (1000.0, 1)})
+    assert session.execute(select(SkillEstimate)).all() == []
@@ -0,0 +1,83 @@
+"""Test local answer grading, the get_feedback fast path and quiz submission."""
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.core.models.search_history import SearchHistory
+from src.core.models.user import Progress
+from src.core.services.ai.answer_grading import AMBIGUOUS, CORRECT, INCORRECT, grade_answer
+
+@pytest.mark.parametrize('answer, correct_answer, options, verdict', [
+    (' Paris. ', 'paris', None, CORRECT),
+    ('$x = 2$', 'x=2', None, CORRECT),
+    ('x = 2', '2', None, CORRECT),
+    ('\\frac{1}{2}', '0.5', None, CORRECT),
+    ('2\\sqrt{3}', 'sqrt(12)', None, CORRECT),
+    ('(x+1)^2', 'x^2 + 2x + 1', None, CORRECT),
+    ('3.14', '\\pi', None, CORRECT),
+    ('b', '42', ['41', '42', '43'], CORRECT),
+    ('B)', 'C', ['1', '2', '3'], INCORRECT),
+    ('7', '8', None, INCORRECT),
+    ('2x + 1', 'x^2 + 1', None, INCORRECT),
+    ('', 'x', None, INCORRECT),
+    ('3.13', '3.14159', None, AMBIGUOUS),
+    ('x = 3', 'y = 3', None, AMBIGUOUS),
+    ('the mitochondria', 'The powerhouse of the cell', None, AMBIGUOUS),
+    ("__import__('os')", '1', None, AMBIGUOUS),
+    ('10^1000', '1', None, AMBIGUOUS),
+])
+def test_grade_answer(answer, correct_answer, options, verdict):
+    """Test equivalence and clear-mismatch detection."""
+    assert grade_answer(answer, correct_answer, options)['verdict'] == verdict
+
+def test_feedback_escalates_only_ambiguous_answers(test_client, test_user):
+    """Test that get_feedback answers clear cases locally and asks the LLM otherwise."""
+    token = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'}).json['token']
+    headers = {'Authorization': f"Bearer {token}"}
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = "Close, but think about energy."
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+        local = test_client.post('/api/ai/get-feedback', headers=headers,
+                                 json={'answer': '1/2', 'correct_answer': '$0.5$'})
+        escalated = test_client.post('/api/ai/get-feedback', headers=headers,
+                                     json={'answer': 'It makes food', 'correct_answer': 'It produces ATP'})
+
+    assert local.json['graded_by'] == 'local' and local.json['correct'] is True
+    assert escalated.json == {'feedback': "Close, but think about energy.", 'correct': None, 'graded_by': 'llm'}
+    assert client.chat.completions.create.call_count == 1
+
+def test_quiz_submit_grades_and_records_progress(test_client, test_user, session):
+    """Test that a submitted quiz is graded in one pass, recorded, and gets one batched feedback call."""
+    questions = [
+        {'question': 'What is 2 + 2?', 'options': ['3', '4', '5', '6'], 'correct_answer': '4', 'explanation': 'Add.'},
+        {'question': 'What is 1/2?', 'options': ['0.5', '0.2', '2', '1'], 'correct_answer': '0.5'},
+        {'question': 'Capital of France?', 'options': ['Lyon', 'Paris', 'Nice', 'Lille'], 'correct_answer': 'Paris'},
+        {'question': 'What is 3 * 3?', 'options': ['6', '9', '12', '33'], 'correct_answer': '9'},
+    ]
+    quiz = SearchHistory(user_id=test_user.id, topic='Mixed', difficulty='beginner', content_type='quiz',
+                         content=json.dumps({'questions': questions}))
+    session.add(quiz)
+    session.commit()
+    token = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'}).json['token']
+    headers = {'Authorization': f"Bearer {token}"}
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = json.dumps(
+        {'feedback': [{'index': 2, 'feedback': 'Lyon is not the capital.'}, {'index': 3, 'feedback': 'Multiply.'}]})
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+        response = test_client.post(f'/api/ai/quiz/{quiz.id}/submit', headers=headers, json={
+            'answers': ['b', '1/2', 'Lyon'], 'time_spent': 3, 'feedback': True})
+
+    assert response.status_code == 200
+    assert (response.json['correct'], response.json['total'], response.json['score']) == (2, 4, 50.0)
+    assert [r['correct'] for r in response.json['results']] == [True, True, False, False]
+    assert response.json['results'][0]['explanation'] == 'Add.'
+    assert response.json['results'][2]['feedback'] == 'Lyon is not the capital.'
+    assert client.chat.completions.create.call_count == 1
+    progress = Progress.query.filter_by(user_id=test_user.id).one()
+    assert (progress.topic, progress.score, progress.time_spent) == ('Mixed', 50.0, 3)
+
+    missing = test_client.post('/api/ai/quiz/9999/submit', headers=headers, json={'answers': []})
+    assert missing.status_code == 404
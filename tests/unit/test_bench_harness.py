@@ -0,0 +1,18 @@
+"""Test the microbenchmark harness."""
+from benchmarks.harness import compare, measure
+
+def test_measure_reports_per_call_time():
+    """Test that calibration and rounds produce sane statistics."""
+    result = measure(lambda: sum(range(100)), rounds=3, min_round_seconds=0.001)
+    assert result['rounds'] == 3
+    assert result['iterations'] >= 1
+    assert 0 < result['min_ns'] <= result['median_ns']
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test that only slowdowns past the threshold are regressions."""
+    baseline = {'results': {'a': {'median_ns': 100.0}, 'b': {'median_ns': 100.0}, 'gone': {'median_ns': 1.0}}}
+    current = {'results': {'a': {'median_ns': 105.0}, 'b': {'median_ns': 130.0}, 'new': {'median_ns': 1.0}}}
+    rows = {row['name']: row for row in compare(baseline, current, threshold=0.10)}
+    assert set(rows) == {'a', 'b'}
+    assert not rows['a']['regression']
+    assert rows['b']['regression'] and round(rows['b']['change'], 2) == 0.30
@@ -0,0 +1,111 @@
+"""Test background generation jobs."""
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from src.config.settings import JOBS_CONFIG
+from src.core.models.search_history import SearchHistory
+from src.core.models.user import User
+from src.core.services.ai.generation_jobs import JobWorker, run_job, set_job_queue
+from src.core.services.job_queue import FAILED, LEASE_LOST, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+@pytest.fixture
+def job_queue(tmp_path):
+    """Enable async generation on a temporary queue."""
+    queue = JobQueue(str(tmp_path / 'jobs.db'), visibility_timeout=60, max_attempts=2, retry_delay=0)
+    set_job_queue(queue)
+    with patch.dict(JOBS_CONFIG, {'ENABLED': True, 'POLL_INTERVAL': 0.01, 'SSE_TIMEOUT': 1}):
+        yield queue
+    set_job_queue(None)
+
+@pytest.fixture
+def mock_lesson_client():
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = "# Tides\n\nThe moon pulls the oceans."
+    return client
+
+def login(test_client, username, password):
+    """Log in and return auth headers."""
+    response = test_client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def test_identical_requests_share_one_job(test_client, test_user, session, job_queue, mock_lesson_client):
+    """Test that two users asking for the same lesson get one LLM call and their own history rows."""
+    other = User(username='otheruser')
+    other.set_password('otherpass123')
+    session.add(other)
+    session.commit()
+    user_ids = sorted([test_user.id, other.id])
+    first_headers = login(test_client, 'testuser', 'testpass123')
+    second_headers = login(test_client, 'otheruser', 'otherpass123')
+    lesson_request = {'topic': 'Ocean tides', 'difficulty': 'beginner', 'async': True}
+
+    first = test_client.post('/api/ai/generate-lesson', json=lesson_request, headers=first_headers)
+    second = test_client.post('/api/ai/generate-lesson', json=lesson_request, headers=second_headers)
+    assert first.status_code == second.status_code == 202
+    assert first.json['job_id'] == second.json['job_id']
+    assert not first.json['deduplicated'] and second.json['deduplicated']
+
+    job_id = first.json['job_id']
+    assert test_client.get(f'/api/ai/jobs/{job_id}', headers=first_headers).json['status'] == QUEUED
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_lesson_client):
+        assert JobWorker(job_queue).run_once()
+    assert mock_lesson_client.chat.completions.create.call_count == 1
+
+    results = [test_client.get(f'/api/ai/jobs/{job_id}', headers=h).json for h in (first_headers, second_headers)]
+    assert [r['status'] for r in results] == [SUCCEEDED, SUCCEEDED]
+    assert results[0]['result']['lesson'] == results[1]['result']['lesson']
+    rows = SearchHistory.query.filter_by(topic='Ocean tides').all()
+    assert sorted(row.user_id for row in rows) == user_ids
+    assert {r['result']['history_id'] for r in results} == {row.id for row in rows}
+
+    events = test_client.get(f'/api/ai/jobs/{job_id}/events', headers=first_headers)
+    assert events.mimetype == 'text/event-stream'
+    assert b'"status":"succeeded"' in events.data
+
+    assert test_client.get('/api/ai/jobs/unknown', headers=first_headers).status_code == 404
+
+def test_sync_generation_when_not_async(test_client, test_user, session, job_queue, mock_lesson_client):
+    """Test that requests without the async flag still return the lesson directly."""
+    headers = login(test_client, 'testuser', 'testpass123')
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_lesson_client):
+        response = test_client.post('/api/ai/generate-lesson', json={'topic': 'Tides', 'difficulty': 'beginner'},
+                                    headers=headers)
+    assert response.status_code == 200
+    assert 'moon' in response.json['lesson']
+    assert job_queue.counts() == {}
+
+def test_expired_lease_is_retried_then_failed(tmp_path):
+    """Test that a job whose worker vanished is reclaimed, and fails after max attempts."""
+    queue = JobQueue(str(tmp_path / 'jobs.db'), visibility_timeout=0.01, max_attempts=2, retry_delay=0)
+    job_id, _ = queue.enqueue('lesson', {'topic': 't', 'difficulty': 'beginner'}, user_id=1, dedupe_key='k')
+    assert queue.claim('dead-worker')['attempts'] == 1
+    assert queue.claim('other') is None
+    time.sleep(0.02)
+    retried = queue.claim('other')
+    assert retried['id'] == job_id and retried['attempts'] == 2
+    assert queue.get(job_id, 1)['status'] == RUNNING
+
+    queue.fail(job_id, 'other', 'upstream error')
+    assert queue.get(job_id, 1) == {**queue.get(job_id, 1), 'status': FAILED, 'error': 'upstream error'}
+    # A failed job no longer blocks a new one with the same key
+    assert queue.enqueue('lesson', {}, user_id=1, dedupe_key='k')[0] != job_id
+
+def test_worker_that_lost_its_lease_saves_nothing(test_user, session, tmp_path, mock_lesson_client):
+    """Test that only the worker holding the lease records results, so waiters get one history row."""
+    queue = JobQueue(str(tmp_path / 'jobs.db'), visibility_timeout=0.01, max_attempts=3, retry_delay=0)
+    job_id, _ = queue.enqueue('lesson', {'topic': 'Tides', 'difficulty': 'beginner'}, user_id=test_user.id)
+    stale = queue.claim('slow-worker')
+    time.sleep(0.02)
+    current = queue.claim('new-worker')
+    assert queue.record_result(job_id, 'slow-worker', test_user.id, {'x': 1}) is False
+    assert queue.complete(job_id, 'slow-worker') == LEASE_LOST
+
+    queue.visibility_timeout = 60
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_lesson_client):
+        run_job(queue, stale, 'slow-worker')
+        assert SearchHistory.query.filter_by(topic='Tides').count() == 0
+        run_job(queue, current, 'new-worker')
+    assert SearchHistory.query.filter_by(topic='Tides').count() == 1
+    assert queue.get(job_id, test_user.id)['status'] == SUCCEEDED
@@ -0,0 +1,67 @@
+"""Test hedged LLM requests."""
+import threading
+import time
+from src.config.settings import HEDGING_CONFIG
+from src.core.services.ai.hedging import Hedger
+
+def make_hedger(**overrides):
+    config = {**HEDGING_CONFIG, 'MIN_SAMPLES': 5, 'MIN_DELAY_MS': 10, 'BUDGET_RATIO': 1.0, 'MAX_BURST': 5,
+              'MAX_THREADS': 4, **overrides}
+    hedger = Hedger(config)
+    for _ in range(10):
+        hedger.tracker.record('lesson', 0.01)
+    return hedger
+
+def attempts(*delays):
+    """Attempt factory whose n-th request takes delays[n] seconds unless cancelled."""
+    started, cancelled = [], []
+
+    def start_attempt():
+        index = len(started)
+        stop = threading.Event()
+        started.append(index)
+
+        def call():
+            if stop.wait(delays[index]):
+                raise ConnectionError('client closed')
+            return f"response {index}"
+
+        def cancel():
+            cancelled.append(index)
+            stop.set()
+        return call, cancel
+    return start_attempt, started, cancelled
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    """Test that a slow primary is raced by a hedge, which wins and cancels it."""
+    hedger = make_hedger()
+    start_attempt, started, cancelled = attempts(2.0, 0.0)
+    begin = time.perf_counter()
+    assert hedger.call('lesson', start_attempt) == 'response 1'
+    assert time.perf_counter() - begin < 1.0
+    assert started == [0, 1] and cancelled == [0]
+    stats = hedger.snapshot()
+    assert (stats['hedged'], stats['hedge_wins'], stats['hedge_win_rate']) == (1, 1, 1.0)
+
+def test_losing_primary_latency_is_recorded():
+    """Test that a primary abandoned for a hedge still adds its elapsed time to the window."""
+    hedger = make_hedger(MIN_DELAY_MS=100)
+    start_attempt, _, _ = attempts(2.0, 0.0)
+    assert hedger.call('lesson', start_attempt) == 'response 1'
+    # Seeded samples are 10 ms and the hedge returns at once; the primary had run past the 100 ms delay
+    assert hedger.tracker.percentile('lesson', 1.0) >= 0.1
+    assert len(hedger.tracker._samples['lesson']) == 12
+
+def test_fast_calls_and_empty_budget_are_not_hedged():
+    """Test that hedges need a slow call, latency history and budget."""
+    hedger = make_hedger(BUDGET_RATIO=0.0)
+    start_attempt, started, _ = attempts(0.0)
+    assert hedger.call('lesson', start_attempt) == 'response 0'
+    start_attempt, started, _ = attempts(0.1)
+    assert hedger.call('lesson', start_attempt) == 'response 0'
+    assert started == [0]
+    assert hedger.snapshot()['skipped_budget'] == 1
+
+    start_attempt, started, _ = attempts(0.1)
+    assert make_hedger().call('quiz', start_attempt) == 'response 0'  # no latency history yet
+    assert started == [0]
@@ -0,0 +1,79 @@
+"""Test conditional history requests and response compression."""
+import gzip
+from src.core.models.database import db
+from src.core.models.search_history import SearchHistory
+from src.core.services.history_version import get_history_version
+
+def login(test_client):
+    """Log in the test user and return auth headers."""
+    response = test_client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpass123'
+    })
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def add_history(user, topic, content='Lesson body'):
+    """Save a history row through the ORM."""
+    history = SearchHistory(user_id=user.id, topic=topic, difficulty='beginner',
+                            content_type='lesson', content=content)
+    db.session.add(history)
+    db.session.commit()
+    return history
+
+def test_history_version_bumps_on_changes(test_client, test_user):
+    """Test that inserts, deletes and clears all change the validator."""
+    headers = login(test_client)
+    assert get_history_version(test_user.id)[0] == 0
+
+    first = add_history(test_user, 'Fractions')
+    add_history(test_user, 'Decimals')
+    assert get_history_version(test_user.id)[0] == 2
+
+    test_client.delete(f'/api/ai/search-history/{first.id}', headers=headers)
+    assert get_history_version(test_user.id)[0] == 3
+
+    test_client.delete('/api/ai/search-history/clear-all', headers=headers)
+    assert get_history_version(test_user.id)[0] == 4
+
+def test_history_endpoints_answer_conditional_requests(test_client, test_user):
+    """Test ETag and Last-Modified revalidation across the history endpoints."""
+    headers = login(test_client)
+    item = add_history(test_user, 'Fractions')
+
+    for url in ['/api/ai/search-history', f'/api/ai/search-history/{item.id}', '/api/learning/history']:
+        first = test_client.get(url, headers=headers)
+        assert first.status_code == 200
+        assert first.headers['Last-Modified']
+
+        repeat = test_client.get(url, headers={**headers, 'If-None-Match': first.headers['ETag']})
+        assert repeat.status_code == 304
+        assert repeat.data == b''
+
+        since = test_client.get(url, headers={**headers, 'If-Modified-Since': first.headers['Last-Modified']})
+        assert since.status_code == 304
+
+    etag = test_client.get('/api/ai/search-history', headers=headers).headers['ETag']
+    add_history(test_user, 'Decimals')
+    changed = test_client.get('/api/ai/search-history', headers={**headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert len(changed.json) == 2
+
+def test_large_responses_are_gzipped(test_client, test_user):
+    """Test that large bodies are compressed and keep a distinct ETag."""
+    headers = login(test_client)
+    item = add_history(test_user, 'Fractions', content='A long lesson paragraph. ' * 400)
+    url = f'/api/ai/search-history/{item.id}'
+
+    plain = test_client.get(url, headers=headers)
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = test_client.get(url, headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert len(compressed.data) < len(plain.data) / 10
+    assert gzip.decompress(compressed.data) == plain.data
+
+    repeat = test_client.get(url, headers={
+        **headers, 'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']
+    })
+    assert repeat.status_code == 304
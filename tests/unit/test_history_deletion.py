@@ -0,0 +1,112 @@
+"""Test batched history deletion, multi-id deletes and the retention purge."""
+import io
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+from src.config.settings import HISTORY_DELETION_CONFIG
+from src.core.models.database import db
+from src.core.models.lesson_section import LessonSection, SectionBlob
+from src.core.models.rendered_lesson import RenderedLesson
+from src.core.models.search_history import SearchHistory
+from src.core.services.history_deletion import purge_expired_history
+from src.core.services.history_export import iter_import_lines
+from src.core.services.history_version import get_history_version
+
+def login(test_client):
+    response = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def generate_lesson(test_client, headers, topic):
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = f"# {topic}\n\n## Intro\n\nHi\n\n## End\n\nBye"
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+        return test_client.post('/api/ai/generate-lesson', json={'topic': topic, 'difficulty': 'beginner'},
+                                headers=headers).json['history_id']
+
+def test_multi_id_delete_removes_dependents(test_client, test_user, session):
+    """Test that one request deletes only the caller's listed rows, with their renders and sections."""
+    headers = login(test_client)
+    ids = [generate_lesson(test_client, headers, topic) for topic in ('Tides', 'Waves', 'Currents')]
+    other = SearchHistory(user_id=test_user.id + 1, topic='Not mine', content_type='quiz')
+    session.add(other)
+    session.commit()
+    version = get_history_version(test_user.id)[0]
+
+    with patch.dict(HISTORY_DELETION_CONFIG, {'BATCH_SIZE': 1, 'BATCH_PAUSE': 0}):
+        response = test_client.delete('/api/ai/search-history', headers=headers,
+                                      json={'ids': [ids[0], ids[1], other.id, 9999]})
+    assert response.json == {'deleted': 2, 'not_found': sorted([other.id, 9999])}
+    assert [row.id for row in SearchHistory.query.order_by(SearchHistory.id)] == [ids[2], other.id]
+    assert {row.history_id for row in RenderedLesson.query} == {ids[2]}
+    assert {row.history_id for row in LessonSection.query} == {ids[2]}
+    # The "## End" section is shared with the remaining lesson
+    assert SectionBlob.query.count() == 3
+    assert get_history_version(test_user.id)[0] > version
+    assert test_client.delete('/api/ai/search-history', headers=headers, json={'ids': []}).status_code == 400
+
+def test_retention_purge_archives_expired_rows(test_user, session, tmp_path):
+    """Test that only rows past the retention age are archived and deleted."""
+    now = datetime.utcnow()
+    session.add_all([
+        SearchHistory(user_id=test_user.id, topic=f"Topic {age}", content_type='lesson', content='Body',
+                      created_at=now - timedelta(days=age))
+        for age in (1, 40, 400)
+    ])
+    session.commit()
+
+    with patch.dict(HISTORY_DELETION_CONFIG, {'ARCHIVE_DIR': str(tmp_path)}):
+        assert purge_expired_history(days=0)['deleted'] == 0
+        result = purge_expired_history(days=30, archive=True, now=now)
+    assert result['deleted'] == 2
+    assert [row.topic for row in SearchHistory.query] == ['Topic 1']
+    with open(result['archive'], 'rb') as archive:
+        lines = [line for _, line in iter_import_lines(io.BytesIO(archive.read()), gzipped=True)]
+    assert len(lines) == 2 and b'"topic":"Topic 40"' in lines[0]
+
+def test_batched_purge_does_not_block_writers(tmp_path):
+    """Test that a concurrent writer keeps committing between purge batches."""
+    path = tmp_path / 'history.db'
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    old = datetime.utcnow() - timedelta(days=100)
+    with engine.begin() as conn:
+        conn.execute(insert(SearchHistory.__table__), [
+            {'user_id': 1, 'topic': f"Old {i}", 'content_type': 'lesson', 'content': 'x' * 200, 'created_at': old}
+            for i in range(10_000)
+        ])
+
+    waits, stop = [], threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(str(path), timeout=5)
+        while not stop.is_set():
+            start = time.perf_counter()
+            conn.execute("INSERT INTO search_history (user_id, topic, content_type, created_at) "
+                         "VALUES (2, 'New', 'quiz', ?)", (datetime.utcnow().isoformat(' '),))
+            conn.commit()
+            waits.append(time.perf_counter() - start)
+            time.sleep(0.002)
+        conn.close()
+
+    original_session = db.session
+    db.session = scoped_session(sessionmaker(bind=engine))
+    thread = threading.Thread(target=writer)
+    try:
+        thread.start()
+        with patch.dict(HISTORY_DELETION_CONFIG, {'BATCH_SIZE': 250, 'BATCH_PAUSE': 0.01}):
+            result = purge_expired_history(days=30, archive=False)
+    finally:
+        stop.set()
+        thread.join()
+        db.session.remove()
+        db.session = original_session
+
+    assert result['deleted'] == 10_000
+    # 40 batches: the writer gets in between them rather than waiting for the whole purge
+    assert len(waits) >= 20
+    assert max(waits) < 0.25
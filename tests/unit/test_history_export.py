@@ -0,0 +1,62 @@
+"""Test streaming history export and batched import."""
+import gzip
+import io
+import json
+import pytest
+from unittest.mock import patch
+from src.config.settings import HISTORY_EXPORT_CONFIG
+from src.core.models.database import db
+from src.core.models.search_history import SearchHistory
+from src.core.services.history_export import HistoryImportError, iter_import_lines
+from src.core.services.history_version import get_history_version
+
+def login(test_client):
+    response = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def add_history(user, count):
+    db.session.add_all([
+        SearchHistory(user_id=user.id, topic=f"Topic {i}", difficulty='beginner',
+                      content_type='lesson' if i % 2 else 'quiz', content=f"Body {i} " * 50)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def test_import_lines_split_across_reads():
+    """Test that lines spanning read blocks are rejoined and over-long lines are refused."""
+    body = b'{"a": 1}\n\n' + b'{"b": "' + b'x' * 100 + b'"}\n{"c": 3}'
+    with patch.dict(HISTORY_EXPORT_CONFIG, {'BUFFER_BYTES': 16}):
+        assert [number for number, _ in iter_import_lines(io.BytesIO(body))] == [1, 3, 4]
+        assert [line for _, line in iter_import_lines(io.BytesIO(gzip.compress(body)), gzipped=True)][1] \
+            == body.split(b'\n')[2]
+        with pytest.raises(HistoryImportError) as error:
+            list(iter_import_lines(io.BytesIO(body), max_line_bytes=64))
+        assert error.value.status == 413
+
+def test_export_import_round_trip(test_client, test_user, session):
+    """Test that a gzip export streams every row and imports back in batches."""
+    headers = login(test_client)
+    add_history(test_user, 7)
+
+    with patch.dict(HISTORY_EXPORT_CONFIG, {'CHUNK_SIZE': 2, 'BUFFER_BYTES': 512}):
+        plain = test_client.get('/api/learning/history/export', headers=headers)
+        compressed = test_client.get('/api/learning/history/export',
+                                     headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert plain.is_streamed and plain.mimetype == 'application/x-ndjson'
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    rows = [json.loads(line) for line in plain.data.splitlines()]
+    assert [row['topic'] for row in rows] == [f"Topic {i}" for i in range(7)]
+
+    version = get_history_version(test_user.id)[0]
+    body = compressed.data + gzip.compress(b'{"topic": ""}\nnot json\n')
+    with patch.dict(HISTORY_EXPORT_CONFIG, {'IMPORT_BATCH_SIZE': 3}):
+        response = test_client.post('/api/learning/history/import', data=body,
+                                    headers={**headers, 'Content-Encoding': 'gzip'})
+    assert response.json['imported'] == 7 and response.json['invalid'] == 2
+    assert [error['line'] for error in response.json['errors']] == [8, 9]
+    assert SearchHistory.query.filter_by(user_id=test_user.id).count() == 14
+    assert get_history_version(test_user.id)[0] == version + 3
+
+    imported = SearchHistory.query.filter_by(user_id=test_user.id).order_by(SearchHistory.id.desc()).first()
+    assert imported.content == rows[-1]['content'] and imported.created_at.isoformat() == rows[-1]['created_at']
@@ -0,0 +1,31 @@
+"""Test the fast JSON provider."""
+import json
+from datetime import datetime
+from unittest.mock import patch
+from src.core.utils import json_provider
+from src.core.utils.json_provider import RawJSON, dumps_bytes, loads
+
+def test_raw_values_are_spliced_verbatim():
+    """Test that pre-serialized values are embedded without re-encoding."""
+    questions = dumps_bytes([{'question': 'What is $\\frac{1}{2}$?', 'options': ['a', 'ü']}])
+    payload = dumps_bytes({'questions': RawJSON(questions), 'history_id': 7})
+    assert payload == b'{"questions":' + questions + b',"history_id":7}'
+    assert loads(payload)['questions'][0]['options'] == ['a', 'ü']
+    # Nested raw values still encode correctly, just without the splice
+    assert loads(dumps_bytes({'outer': {'inner': RawJSON(b'[1,2]')}})) == {'outer': {'inner': [1, 2]}}
+
+def test_stdlib_fallback_matches(app):
+    """Test that both backends produce equivalent output, including Flask's date format."""
+    payload = {'b': 1, 'a': [datetime(2024, 1, 2, 3, 4, 5), None, 1.5, 'x' * 3], 'big': 2 ** 70}
+    fast = dumps_bytes(payload)
+    with patch.object(json_provider, 'USE_ORJSON', False):
+        slow = dumps_bytes(payload)
+    assert loads(fast) == loads(slow) == json.loads(app.json.dumps(payload))
+    assert loads(fast)['a'][0] == 'Tue, 02 Jan 2024 03:04:05 GMT'
+
+def test_jsonify_uses_fast_provider(app):
+    """Test that responses are produced by the configured provider."""
+    with app.test_request_context():
+        response = app.json.response({'questions': RawJSON(b'[{"q":1}]'), 'difficulty': 'beginner'})
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"questions":[{"q":1}],"difficulty":"beginner"}\n'
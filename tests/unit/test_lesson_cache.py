@@ -0,0 +1,69 @@
+"""Test topic canonicalization and the near-duplicate lesson cache."""
+import pytest
+from unittest.mock import patch, MagicMock
+from src.core.services.ai.lesson_cache import reset_lesson_cache
+from src.core.services.ai.topic_index import TopicIndex, canonical_key, normalize_topic
+
+@pytest.fixture(autouse=True)
+def clean_lesson_cache():
+    """Start every test with an empty lesson index."""
+    reset_lesson_cache()
+    yield
+    reset_lesson_cache()
+
+@pytest.fixture
+def mock_openai_client():
+    """Mock OpenAI client."""
+    client = MagicMock()
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = "Test lesson content"
+    client.chat.completions.create.return_value = response
+    return client
+
+def test_normalize_topic_drops_filler_and_stems():
+    """Test topic normalization."""
+    assert normalize_topic('Intro to Python') == ('python',)
+    assert normalize_topic('python intro') == ('python',)
+    assert normalize_topic('Introduction to Python Programming') == ('program', 'python')
+    assert canonical_key('Studies of Fractions') == canonical_key('fraction study')
+    assert normalize_topic('Coding') == normalize_topic('code') == ('code',)
+
+def test_topic_index_matches_near_duplicates():
+    """Test similarity lookup across phrasing variants."""
+    index = TopicIndex()
+    index.add(1, 'Intro to Python', 'beginner')
+    index.add(2, 'Linear algebra', 'beginner')
+    index.add(3, 'Cell biology', 'beginner')
+
+    assert index.lookup('python intro', 'beginner') == (1, 1.0)
+    doc_id, score = index.lookup('introduction to python programming', 'beginner')
+    assert doc_id == 1 and score >= 0.85
+    assert index.lookup('python intro', 'advanced') is None
+    assert index.lookup('organic chemistry', 'beginner') is None
+
+    index.remove(1)
+    assert index.lookup('python intro', 'beginner') is None
+
+def test_generate_lesson_serves_cached_near_duplicate(test_client, test_user, mock_openai_client):
+    """Test that a near-duplicate lesson request skips the LLM call."""
+    response = test_client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpass123'
+    })
+    headers = {'Authorization': f"Bearer {response.json['token']}"}
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_openai_client):
+        first = test_client.post('/api/ai/generate-lesson', json={
+            'topic': 'Intro to Python', 'difficulty': 'beginner'
+        }, headers=headers)
+        second = test_client.post('/api/ai/generate-lesson', json={
+            'topic': 'introduction to python programming', 'difficulty': 'beginner'
+        }, headers=headers)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json['cached'] is False
+    assert second.json['cached'] is True
+    assert second.json['lesson'] == first.json['lesson']
+    assert second.json['history_id'] != first.json['history_id']
+    assert mock_openai_client.chat.completions.create.call_count == 1
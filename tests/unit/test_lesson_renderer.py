@@ -0,0 +1,68 @@
+"""Test lesson rendering and conditional retrieval."""
+import pytest
+from unittest.mock import patch, MagicMock
+from src.core.services.ai.lesson_cache import reset_lesson_cache
+from src.core.services.lesson_renderer import parse_markdown, render_html, render_lesson
+
+LESSON = "# Fractions\n\nA fraction $\\frac{a}{b}$ has a **numerator**.\n\n- One <b>\n- Two\n\n$$x^2 + y^2$$"
+
+@pytest.fixture(autouse=True)
+def clean_lesson_cache():
+    """Start every test with an empty lesson index."""
+    reset_lesson_cache()
+    yield
+    reset_lesson_cache()
+
+@pytest.fixture
+def mock_openai_client():
+    """Mock OpenAI client."""
+    client = MagicMock()
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = LESSON
+    client.chat.completions.create.return_value = response
+    return client
+
+def test_render_escapes_html_and_keeps_math():
+    """Test that markup is escaped and math is emitted as KaTeX-ready spans."""
+    blocks = parse_markdown(LESSON)
+    assert [block['type'] for block in blocks] == ['heading', 'paragraph', 'list', 'math']
+    assert len(blocks[2]['items']) == 2
+
+    html = render_html(blocks)
+    assert '<h1>Fractions</h1>' in html
+    assert '<span class="math math-inline">\\frac{a}{b}</span>' in html
+    assert '<strong>numerator</strong>' in html
+    assert '<li>One &lt;b&gt;</li>' in html
+    assert '<div class="math math-display">x^2 + y^2</div>' in html
+    assert 'javascript' not in render_html(parse_markdown('[click](javascript:alert(1))'))
+    assert render_lesson(LESSON)['etag'] == render_lesson(LESSON)['etag']
+
+def test_rendered_lesson_is_served_with_etag(test_client, test_user, mock_openai_client):
+    """Test that a repeat view with a matching ETag gets a 304."""
+    response = test_client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpass123'
+    })
+    headers = {'Authorization': f"Bearer {response.json['token']}"}
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_openai_client):
+        lesson = test_client.post('/api/ai/generate-lesson', json={
+            'topic': 'Fractions', 'difficulty': 'beginner'
+        }, headers=headers)
+    history_id = lesson.json['history_id']
+    url = f'/api/ai/search-history/{history_id}/rendered'
+
+    first = test_client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.json['content'].startswith('<h1>Fractions</h1>')
+    assert first.headers['ETag']
+
+    repeat = test_client.get(url, headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304
+    assert repeat.headers['ETag'] == first.headers['ETag']
+
+    ast = test_client.get(f'{url}?format=ast', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert ast.status_code == 200
+    assert ast.json['content'][0]['type'] == 'heading'
+    assert test_client.get(f'{url}?format=pdf', headers=headers).status_code == 400
@@ -0,0 +1,75 @@
+"""Test section-addressable lesson storage and the section endpoints."""
+from unittest.mock import patch, MagicMock
+from sqlalchemy.exc import IntegrityError
+from src.core.models.lesson_section import LessonSection, SectionBlob
+from src.core.services.lesson_sections import parse_section_range, save_lesson_sections, split_sections
+
+LESSON = "# Tides\n\nWhy the sea moves.\n\n## Causes\n\nThe moon.\n\n### Detail\n\nGravity.\n\n## Summary\n\nTwice a day.\n"
+
+def login(test_client):
+    response = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def generate_lesson(test_client, headers, topic):
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = LESSON
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+        return test_client.post('/api/ai/generate-lesson', json={'topic': topic, 'difficulty': 'beginner'},
+                                headers=headers).json
+
+def test_split_sections_and_ranges():
+    """Test that sections split at the repeated heading level and tile the lesson."""
+    sections = split_sections(LESSON)
+    assert [section['heading'] for section in sections] == ['Tides', 'Causes', 'Summary']
+    assert ''.join(section['text'] for section in sections) == LESSON
+    assert sections[1]['offset'] == LESSON.index('## Causes') and '### Detail' in sections[1]['text']
+    assert [section['heading'] for section in split_sections('\n## A\n\nx\n## B\n')] == ['A', 'B']
+
+    assert parse_section_range('1', 3) == (1, 1)
+    assert parse_section_range('1-', 3) == (1, 2)
+    assert parse_section_range('0-9', 3) == (0, 2)
+    assert parse_section_range('3', 3) is None and parse_section_range('2-1', 3) is None
+
+def test_section_endpoints_share_blobs(test_client, test_user, session):
+    """Test section index, range and single-section fetches, blob dedupe and cleanup."""
+    headers = login(test_client)
+    first = generate_lesson(test_client, headers, 'Ocean tides')
+    second = generate_lesson(test_client, headers, 'Tides again')
+    assert SectionBlob.query.count() == 3 and LessonSection.query.count() == 6
+
+    index = test_client.get(f"/api/ai/search-history/{first['history_id']}/sections", headers=headers)
+    assert index.json['count'] == 3 and 'content' not in index.json['sections'][0]
+
+    ranged = test_client.get(f"/api/ai/search-history/{first['history_id']}/sections?range=1-2", headers=headers)
+    assert ''.join(section['content'] for section in ranged.json['sections']) == LESSON[LESSON.index('## Causes'):]
+    assert test_client.get(f"/api/ai/search-history/{first['history_id']}/sections?range=5",
+                           headers=headers).status_code == 416
+    assert test_client.get(f"/api/ai/search-history/{first['history_id']}/sections?range=a",
+                           headers=headers).status_code == 400
+
+    section = test_client.get(f"/api/ai/search-history/{first['history_id']}/sections/2", headers=headers)
+    assert section.json['content'] == '## Summary\n\nTwice a day.\n'
+    etag = section.headers['ETag']
+    revalidated = test_client.get(f"/api/ai/search-history/{second['history_id']}/sections/2",
+                                  headers={**headers, 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+    test_client.delete(f"/api/ai/search-history/{first['history_id']}", headers=headers)
+    assert SectionBlob.query.count() == 3 and LessonSection.query.count() == 3
+    test_client.delete('/api/ai/search-history/clear-all', headers=headers)
+    assert SectionBlob.query.count() == 0 and LessonSection.query.count() == 0
+
+def test_failed_section_index_keeps_the_lesson(test_client, test_user, session):
+    """Test that a section index error is rolled back alone and the index is rebuilt on first request."""
+    headers = login(test_client)
+    def fail_midway(history_id, content):
+        save_lesson_sections(history_id, content)
+        raise IntegrityError('INSERT', {}, Exception('collision'))
+
+    with patch('src.core.services.ai.generation.save_lesson_sections', side_effect=fail_midway):
+        lesson = generate_lesson(test_client, headers, 'Ocean tides')
+    assert lesson['history_id'] is not None and LessonSection.query.count() == 0
+
+    index = test_client.get(f"/api/ai/search-history/{lesson['history_id']}/sections", headers=headers)
+    assert index.json['count'] == 3 and LessonSection.query.count() == 3
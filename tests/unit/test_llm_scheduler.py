@@ -0,0 +1,62 @@
+"""Test priority scheduling and fair queuing of LLM calls."""
+import threading
+import time
+import pytest
+from src.core.services.llm_scheduler import FairQueue, LLMQueueTimeout, LLMScheduler, Priority, _Waiter
+
+def test_fair_queue_interleaves_users():
+    """Test that a user's batch does not delay another user's single request by more than one turn."""
+    queue = FairQueue(quantum=1)
+    for i in range(4):
+        queue.push(_Waiter('teacher', 1, Priority.INTERACTIVE))
+    student = _Waiter('student', 1, Priority.INTERACTIVE)
+    queue.push(student)
+    order = [queue.pop().flow for _ in range(5)]
+    assert order == ['teacher', 'student', 'teacher', 'teacher', 'teacher']
+    assert queue.pop() is None and queue.size == 0
+
+def test_fair_queue_charges_by_cost():
+    """Test that expensive calls use up a user's credit faster."""
+    queue = FairQueue(quantum=100)
+    for _ in range(2):
+        queue.push(_Waiter('big', 200, Priority.INTERACTIVE))
+    for _ in range(4):
+        queue.push(_Waiter('small', 50, Priority.INTERACTIVE))
+    order = [queue.pop().flow for _ in range(6)]
+    assert order[:4].count('small') >= 2
+    assert order.index('small') < 2
+
+def test_scheduler_serves_priority_then_times_out():
+    """Test that queued interactive calls go before background ones and that waits are bounded."""
+    scheduler = LLMScheduler(max_concurrency=1, quantum=1, queue_timeout=5)
+    scheduler.acquire('holder')
+    served = []
+
+    def call(user, priority):
+        with scheduler.slot(user, priority):
+            served.append(priority)
+
+    threads = [threading.Thread(target=call, args=('batch', Priority.BACKGROUND))]
+    threads[0].start()
+    while scheduler.snapshot()['queued'] < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=call, args=('student', Priority.INTERACTIVE)))
+    threads[1].start()
+    while scheduler.snapshot()['queued'] < 2:
+        time.sleep(0.001)
+
+    snapshot = scheduler.snapshot()
+    assert snapshot['in_flight'] == 1 and snapshot['queued_users'] == 2
+    assert snapshot['queued_by_priority'] == {'interactive': 1, 'feedback': 0, 'background': 1}
+
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert served == [Priority.INTERACTIVE, Priority.BACKGROUND]
+    assert scheduler.snapshot()['wait']['background']['queued'] == 1
+
+    scheduler.acquire('holder')
+    with pytest.raises(LLMQueueTimeout):
+        scheduler.acquire('late', Priority.FEEDBACK, timeout=0.01)
+    snapshot = scheduler.snapshot()
+    assert snapshot['queued'] == 0 and snapshot['wait']['feedback']['timeouts'] == 1
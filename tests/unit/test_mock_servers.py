@@ -0,0 +1,38 @@
+"""Test the offline mock OpenAI and YouTube servers used by the load test."""
+import pytest
+from googleapiclient.discovery import build
+from openai import OpenAI, RateLimitError
+from benchmarks.mock_servers import FakeOpenAIServer, FakeYouTubeServer
+from src.core.services.ai.generation import get_quiz_prompt
+
+def test_fake_openai_completions_streaming_and_errors():
+    """Test that the OpenAI SDK works unchanged against the fake server."""
+    with FakeOpenAIServer(seed=1) as server:
+        client = OpenAI(api_key='sk-test', base_url=f"{server.url}/v1", max_retries=0)
+
+        quiz = client.chat.completions.create(
+            model='gpt-3.5-turbo',
+            messages=get_quiz_prompt('Fractions', 'beginner', 'math', question_count=3),
+            response_format={'type': 'json_object'}
+        )
+        assert quiz.choices[0].message.content.count('"question"') == 3
+        assert quiz.usage.total_tokens == quiz.usage.prompt_tokens + quiz.usage.completion_tokens
+
+        stream = client.chat.completions.create(
+            model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'Teach me'}], stream=True
+        )
+        streamed = ''.join(chunk.choices[0].delta.content or '' for chunk in stream)
+        assert streamed == server.lesson
+
+        server.error_rate, server.rate_limit_share = 1.0, 1.0
+        with pytest.raises(RateLimitError):
+            client.chat.completions.create(model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'Hi'}])
+        assert server.requests == 3 and server.errors == 1
+
+def test_fake_youtube_search():
+    """Test that the YouTube client can be pointed at the fake server."""
+    with FakeYouTubeServer() as server:
+        youtube = build('youtube', 'v3', developerKey='test', client_options={'api_endpoint': f"{server.url}/"})
+        response = youtube.search().list(q='fractions', part='id,snippet', maxResults=1).execute()
+        assert response['items'][0]['id']['videoId']
+        assert server.requests == 1
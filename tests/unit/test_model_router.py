@@ -0,0 +1,58 @@
+"""Test config-driven model routing."""
+import json
+import os
+from unittest.mock import patch, MagicMock
+from src.config.settings import MODEL_ROUTING_CONFIG, OPENAI_CONFIG
+from src.core.services.ai.model_router import FEEDBACK, LESSON, ModelRouter, set_router
+from src.core.utils.openai_client import get_openai_response
+
+def make_config(**overrides):
+    return {**MODEL_ROUTING_CONFIG, 'ROUTES': {
+        'lesson': {'model': 'big-model', 'max_tokens': 3000},
+        'feedback': {'model': 'small-model', 'max_tokens': 300, 'timeout': 5},
+    }, 'DIFFICULTY_OVERRIDES': {'lesson': {'advanced': {'max_tokens': 4000}}},
+        'ROUTES_FILE': None, 'RELOAD_INTERVAL': 0, **overrides}
+
+def test_routes_layer_over_defaults():
+    """Test that route and difficulty settings override the OpenAI defaults."""
+    router = ModelRouter(make_config())
+    assert router.resolve('unknown') == router.resolve()
+    assert router.resolve()['model'] == OPENAI_CONFIG['MODEL']
+    lesson = router.resolve(LESSON)
+    assert (lesson['model'], lesson['max_tokens'], lesson['temperature']) == ('big-model', 3000, OPENAI_CONFIG['TEMPERATURE'])
+    assert router.resolve(LESSON, 'advanced')['max_tokens'] == 4000
+    assert router.resolve(LESSON, 'beginner')['max_tokens'] == 3000
+    assert 'lesson:advanced' in router.table()
+
+def test_routes_file_reloads_on_change(tmp_path):
+    """Test that edits to the routes file apply without a restart and bad files are ignored."""
+    path = tmp_path / 'routes.json'
+    path.write_text(json.dumps({'routes': {'feedback': {'model': 'tiny-model'}}}))
+    router = ModelRouter(make_config(ROUTES_FILE=str(path)))
+    assert router.resolve(FEEDBACK)['model'] == 'tiny-model'
+    assert router.resolve(FEEDBACK)['max_tokens'] == 300
+
+    path.write_text(json.dumps({'difficulty_overrides': {'feedback': {'advanced': {'max_tokens': 900}}}}))
+    os.utime(path, (1, 1))
+    assert router.resolve(FEEDBACK)['model'] == 'small-model'
+    assert router.resolve(FEEDBACK, 'advanced')['max_tokens'] == 900
+
+    path.write_text('{not json')
+    os.utime(path, (2, 2))
+    assert router.resolve(FEEDBACK, 'advanced')['max_tokens'] == 900
+
+def test_openai_call_uses_route_parameters(app):
+    """Test that get_openai_response sends the routed model, limits and timeout."""
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = 'ok'
+    set_router(ModelRouter(make_config()))
+    try:
+        with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+            get_openai_response([{'role': 'user', 'content': 'hi'}], route=FEEDBACK)
+            get_openai_response([{'role': 'user', 'content': 'hi'}], model='pinned', route=LESSON, difficulty='advanced')
+    finally:
+        set_router(None)
+    feedback, lesson = (call.kwargs for call in client.chat.completions.create.call_args_list)
+    assert (feedback['model'], feedback['max_tokens'], feedback['timeout']) == ('small-model', 300, 5)
+    assert (lesson['model'], lesson['max_tokens']) == ('pinned', 4000)
@@ -0,0 +1,73 @@
+"""Test per-request profiling."""
+import time
+from unittest.mock import patch
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from src.api.routes.admin_routes import bp as admin_bp
+from src.config.settings import PROFILING_CONFIG
+from src.core.utils.profiling import ProfileStore, init_profiling, span
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    """Minimal app with profiling on, a SQL-issuing route and the admin blueprint."""
+    config = {**PROFILING_CONFIG, 'ENABLED': True, 'SAMPLE_RATE': 0.0, 'DEBUG_TOKEN': 'letmein',
+              'SAMPLE_INTERVAL_MS': 1, 'STORE_DIR': str(tmp_path), 'MAX_PROFILES': 3}
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    init_profiling(app, config, engine=engine)
+    app.register_blueprint(admin_bp)
+
+    @app.route('/work')
+    def work():
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 2'))
+        with span('upstream.call', model='test'):
+            time.sleep(0.02)
+        return jsonify({'ok': True})
+
+    with patch.dict(PROFILING_CONFIG, {'DEBUG_TOKEN': 'letmein'}):
+        yield app, config
+
+def test_debug_header_profiles_request(profiled_app):
+    """Test that only the authorized header triggers a profile, and it captures SQL and spans."""
+    app, _ = profiled_app
+    client = app.test_client()
+
+    assert 'X-Profile-Id' not in client.get('/work').headers
+    assert 'X-Profile-Id' not in client.get('/work', headers={'X-Debug-Profile': 'wrong'}).headers
+    response = client.get('/work', headers={'X-Debug-Profile': 'letmein'})
+    profile_id = response.headers['X-Profile-Id']
+
+    admin = {'X-Debug-Token': 'letmein'}
+    assert client.get('/api/admin/profiles').status_code == 401
+    listing = client.get('/api/admin/profiles', headers=admin).json
+    assert [p['id'] for p in listing] == [profile_id]
+
+    profile = client.get(f'/api/admin/profiles/{profile_id}', headers=admin).json
+    assert profile['reason'] == 'header' and profile['status'] == 200
+    assert profile['sql']['count'] == 2
+    assert profile['spans'][0]['name'] == 'upstream.call' and profile['spans'][0]['duration_ms'] >= 20
+    assert profile['wall_ms'] >= profile['spans'][0]['duration_ms']
+    assert profile['samples']['count'] > 0
+
+def test_sampling_and_rotation(profiled_app, tmp_path):
+    """Test that sampled requests are stored and only the newest profiles are kept."""
+    app, config = profiled_app
+    sampled = Flask('sampled')
+    init_profiling(sampled, {**config, 'SAMPLE_RATE': 1.0}, engine=create_engine('sqlite://'))
+    sampled.add_url_rule('/ping', 'ping', lambda: 'pong')
+    client = sampled.test_client()
+    ids = [client.get('/ping').headers['X-Profile-Id'] for _ in range(5)]
+
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    assert [p['id'] for p in store.list()] == ids[:-4:-1]
+    assert store.get(ids[0]) is None
+    assert store.list()[0]['reason'] == 'sampled'
+
+def test_profiling_disabled_installs_nothing():
+    """Test that a disabled profiler registers no hooks."""
+    app = Flask('plain')
+    assert init_profiling(app, {**PROFILING_CONFIG, 'ENABLED': False}) is None
+    assert not app.before_request_funcs and not app.after_request_funcs
@@ -0,0 +1,109 @@
+"""Test progress aggregates."""
+from datetime import datetime
+from sqlalchemy import insert
+from src.core.models.progress_summary import ProgressSummary, ProgressWeekly
+from src.core.models.user import Progress
+from src.core.services.progress_service import backfill_summaries, check_consistency, week_start
+
+def login(test_client):
+    """Log in as the test user and return auth headers."""
+    response = test_client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpass123'
+    })
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def test_progress_summary_is_updated_incrementally(test_client, test_user):
+    """Test per-topic and weekly aggregates after posting progress."""
+    headers = login(test_client)
+    for topic, score, minutes in [('Algebra', 80, 10), ('Algebra', 90, 5), ('Algebra', 40, 5), ('Physics', 75, 20)]:
+        response = test_client.post('/api/learning/progress', json={
+            'topic': topic, 'score': score, 'time_spent': minutes
+        }, headers=headers)
+        assert response.status_code == 201
+
+    response = test_client.get('/api/learning/progress/summary', headers=headers)
+    assert response.status_code == 200
+    topics = {t['topic']: t for t in response.json['topics']}
+    algebra = topics['Algebra']
+    assert algebra['attempts'] == 3
+    assert algebra['average_score'] == 70
+    assert algebra['best_score'] == 90
+    assert algebra['last_score'] == 40
+    assert algebra['current_streak'] == 0
+    assert algebra['best_streak'] == 2
+    assert algebra['time_spent'] == 20
+    assert response.json['totals'] == {'topics': 2, 'attempts': 4, 'average_score': 71.25, 'time_spent': 40}
+
+    response = test_client.get('/api/learning/progress/weekly', headers=headers)
+    assert response.status_code == 200
+    assert response.json[0]['attempts'] == 4
+    assert response.json[0]['time_spent'] == 40
+
+    assert check_consistency(test_user.id) == []
+
+def test_backfill_repairs_missing_summaries(session, test_user):
+    """Test consistency check and backfill for rows written without aggregates."""
+    session.add(Progress(user_id=test_user.id, topic='History', score=85, completed_at=datetime(2024, 1, 3)))
+    session.add(Progress(user_id=test_user.id, topic='History', score=95, completed_at=datetime(2024, 1, 10)))
+    session.commit()
+
+    assert any('missing summary row' in problem for problem in check_consistency(test_user.id))
+
+    backfill_summaries(test_user.id)
+    assert check_consistency(test_user.id) == []
+    summary = ProgressSummary.query.filter_by(user_id=test_user.id, topic='History').one()
+    assert summary.attempts == 2
+    assert summary.current_streak == 2
+
+def test_bulk_progress_is_idempotent(test_client, test_user):
+    """Test bulk ingestion with retries, in-batch duplicates and invalid records."""
+    headers = login(test_client)
+    records = [
+        {'topic': 'Algebra', 'score': 80, 'idempotency_key': 'a1', 'completed_at': '2024-03-04T10:00:00Z'},
+        {'topic': 'Algebra', 'score': 90, 'idempotency_key': 'a2', 'time_spent': 7},
+        {'topic': 'Algebra', 'score': 95, 'idempotency_key': 'a2'},
+        {'topic': '', 'score': 'high'},
+    ]
+    response = test_client.post('/api/learning/progress/bulk', json={'records': records}, headers=headers)
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [r['status'] for r in results] == ['created', 'created', 'duplicate', 'invalid']
+    assert results[2]['id'] == results[1]['id']
+    assert len(results[3]['errors']) == 2
+
+    retry = test_client.post('/api/learning/progress/bulk', json={'records': records[:2]}, headers=headers)
+    assert [r['status'] for r in retry.json['results']] == ['duplicate', 'duplicate']
+    assert [r['id'] for r in retry.json['results']] == [results[0]['id'], results[1]['id']]
+
+    assert Progress.query.filter_by(user_id=test_user.id).count() == 2
+    summary = ProgressSummary.query.filter_by(user_id=test_user.id, topic='Algebra').one()
+    assert summary.attempts == 2 and summary.best_score == 90
+    assert check_consistency(test_user.id) == []
+
+def test_summary_upserts_match_recomputation(test_client, test_user, session):
+    """Test that SQL-side upserts agree with a full recomputation and tolerate a row created concurrently."""
+    headers = login(test_client)
+    # Another request created the summary row after this one started
+    now = datetime.utcnow()
+    session.execute(insert(ProgressSummary).values(user_id=test_user.id, topic='Chemistry', attempts=1,
+                                                   total_score=90, best_score=90, last_score=90, time_spent=0,
+                                                   current_streak=1, best_streak=1,
+                                                   first_completed_at=now, last_completed_at=now))
+    session.execute(insert(ProgressWeekly).values(user_id=test_user.id, week_start=week_start(now), attempts=1,
+                                                  total_score=90, time_spent=0))
+    session.add(Progress(user_id=test_user.id, topic='Chemistry', score=90, completed_at=now))
+    session.commit()
+
+    for scores in ([95, 40, 85, 90], [70], [80, 85], [30, 60, 99]):
+        records = [{'topic': 'Chemistry', 'score': score, 'time_spent': 3} for score in scores]
+        if len(records) == 1:
+            response = test_client.post('/api/learning/progress', json=records[0], headers=headers)
+            assert response.status_code == 201
+        else:
+            test_client.post('/api/learning/progress/bulk', json={'records': records}, headers=headers)
+    assert check_consistency(test_user.id) == []
+
+    response = test_client.post('/api/learning/progress', json={'topic': 'Chemistry', 'score': 'high'},
+                                headers=headers)
+    assert response.status_code == 400
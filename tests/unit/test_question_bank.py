@@ -0,0 +1,86 @@
+"""Test quiz assembly from the question bank."""
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.core.models.question_bank import QuizQuestion
+from src.core.models.user import User
+
+def make_questions(prefix, count):
+    """Build `count` distinct quiz questions."""
+    return [{
+        'question': f"{prefix} question {i}?",
+        'options': ['A', 'B', 'C', 'D'],
+        'correct_answer': 'A',
+        'explanation': f"Because {i}."
+    } for i in range(count)]
+
+@pytest.fixture
+def mock_quiz_client():
+    """Mock OpenAI client that returns as many questions as the prompt asks for."""
+    client = MagicMock()
+    calls = []
+
+    def create(**kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        count = int(prompt.split('Include ')[1].split()[0])
+        calls.append(count)
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps({'questions': make_questions(f"call{len(calls)}", count)})
+        return response
+
+    client.chat.completions.create.side_effect = create
+    client.requested_counts = calls
+    return client
+
+def login(test_client, username, password):
+    """Log in and return auth headers."""
+    response = test_client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def test_quiz_assembly_reuses_unseen_bank_questions(test_client, test_user, session, mock_quiz_client):
+    """Test that a second learner is served from the bank and the first only gets new questions."""
+    other = User(username='otheruser')
+    other.set_password('otherpass123')
+    session.add(other)
+    session.commit()
+    first_headers = login(test_client, 'testuser', 'testpass123')
+    second_headers = login(test_client, 'otheruser', 'otherpass123')
+    quiz_request = {'topic': 'Cell biology', 'difficulty': 'beginner'}
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_quiz_client):
+        first = test_client.post('/api/ai/generate-quiz', json=quiz_request, headers=first_headers)
+        second = test_client.post('/api/ai/generate-quiz', json=quiz_request, headers=second_headers)
+        again = test_client.post('/api/ai/generate-quiz', json=quiz_request, headers=first_headers)
+
+    assert first.json['from_bank'] == 0
+    assert second.json['from_bank'] == 5
+    assert second.json['questions'] == first.json['questions']
+    assert again.json['from_bank'] == 0
+    assert not {q['question'] for q in again.json['questions']} & {q['question'] for q in first.json['questions']}
+    assert mock_quiz_client.requested_counts == [5, 5]
+    assert QuizQuestion.query.count() == 10
+
+def test_bank_fills_partial_gap(test_client, test_user, session, mock_quiz_client):
+    """Test that only the questions the bank cannot cover are generated."""
+    other = User(username='otheruser')
+    other.set_password('otherpass123')
+    session.add(other)
+    session.commit()
+    quiz_request = {'topic': 'Optics', 'difficulty': 'beginner'}
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_quiz_client):
+        # Another learner's smaller quiz leaves 2 questions testuser has not seen
+        with patch.dict('src.config.settings.QUESTION_BANK_CONFIG', {'QUIZ_SIZE': 2}):
+            seeded = test_client.post('/api/ai/generate-quiz', json=quiz_request,
+                                      headers=login(test_client, 'otheruser', 'otherpass123'))
+        quiz = test_client.post('/api/ai/generate-quiz', json=quiz_request,
+                                headers=login(test_client, 'testuser', 'testpass123'))
+
+    unseen = len(seeded.json['questions'])
+    assert unseen == 2
+    assert quiz.json['from_bank'] == unseen
+    assert mock_quiz_client.requested_counts == [2, 5 - unseen]
+    assert quiz.json['questions'][:unseen] == seeded.json['questions']
+    assert len(quiz.json['questions']) == 5
+    assert QuizQuestion.query.count() == 5
@@ -0,0 +1,94 @@
+"""Test speculative quiz prefetch after lesson generation."""
+import json
+from datetime import datetime, timedelta
+import pytest
+from unittest.mock import patch, MagicMock
+from src.config.settings import JOBS_CONFIG, QUIZ_PREFETCH_CONFIG
+from src.core.models.prefetched_quiz import READY, USED, WASTED, PrefetchedQuiz
+from src.core.services.ai.generation_jobs import JobWorker, set_job_queue
+from src.core.services.ai import quiz_prefetch
+from src.core.services.ai.quiz_prefetch import prefetch_stats, should_prefetch
+from src.core.services.job_queue import JobQueue
+
+QUIZ = {'questions': [{
+    'question': f"Tide question {i}?", 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a',
+} for i in range(5)]}
+
+@pytest.fixture
+def prefetch_queue(tmp_path):
+    """Enable quiz prefetch on a temporary job queue."""
+    queue = JobQueue(str(tmp_path / 'jobs.db'), visibility_timeout=60, max_attempts=2, retry_delay=0)
+    set_job_queue(queue)
+    with patch.dict(JOBS_CONFIG, {'ENABLED': True}), \
+            patch.dict(QUIZ_PREFETCH_CONFIG, {'ENABLED': True, 'MIN_SAMPLES': 1, 'MIN_HIT_RATE': 0.5, 'PROBE_RATE': 0}):
+        yield queue
+    set_job_queue(None)
+
+def mock_client(content):
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = content
+    return client
+
+def login(test_client):
+    response = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def generate_lesson(test_client, headers, topic):
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=mock_client("# Tides\n\nThe moon.")):
+        return test_client.post('/api/ai/generate-lesson', json={'topic': topic, 'difficulty': 'beginner'},
+                                headers=headers).json
+
+def test_prefetched_quiz_is_served_without_llm_call(test_client, test_user, session, prefetch_queue):
+    """Test that a quiz requested for a prefetched lesson comes from the stored questions."""
+    headers = login(test_client)
+    lesson = generate_lesson(test_client, headers, 'Ocean tides')
+    assert lesson['quiz_prefetch'] is True
+
+    quiz_client = mock_client(json.dumps(QUIZ))
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=quiz_client):
+        assert JobWorker(prefetch_queue).run_once()
+        response = test_client.post('/api/ai/generate-quiz', headers=headers, json={
+            'topic': 'ocean tides', 'difficulty': 'beginner', 'history_id': lesson['history_id']})
+    assert response.status_code == 200 and response.json['prefetched'] is True
+    assert [q['question'] for q in response.json['questions']] == [q['question'] for q in QUIZ['questions']]
+    assert quiz_client.chat.completions.create.call_count == 1
+    assert PrefetchedQuiz.query.get(lesson['history_id']).status == USED
+    assert prefetch_stats()['hit_rate'] == 1.0
+
+def test_early_request_is_wasted_and_throttles(test_client, test_user, session, prefetch_queue):
+    """Test that a quiz requested before the prefetch finishes counts as waste and low hit rates stop prefetching."""
+    headers = login(test_client)
+    lesson = generate_lesson(test_client, headers, 'Ocean tides')
+    quiz_client = mock_client(json.dumps(QUIZ))
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=quiz_client):
+        response = test_client.post('/api/ai/generate-quiz', headers=headers, json={
+            'topic': 'Ocean tides', 'difficulty': 'beginner', 'history_id': lesson['history_id']})
+        assert 'prefetched' not in response.json
+        assert JobWorker(prefetch_queue).run_once()
+    # The written-off prefetch is skipped by the worker instead of generated
+    assert quiz_client.chat.completions.create.call_count == 1
+    assert PrefetchedQuiz.query.get(lesson['history_id']).status == WASTED
+
+    stats = prefetch_stats()
+    assert stats['counts'][WASTED] == 1 and stats['throttled']
+    assert 'quiz_prefetch' not in generate_lesson(test_client, headers, 'Volcanoes')
+
+def test_stale_prefetches_expire_on_the_workers(test_user, session, prefetch_queue):
+    """Test that lesson requests only read prefetch state and workers write off expired rows."""
+    stale = datetime.utcnow() - timedelta(seconds=QUIZ_PREFETCH_CONFIG['TTL'] + 60)
+    session.add_all([PrefetchedQuiz(lesson_history_id=history_id, user_id=test_user.id, topic='Tides',
+                                    difficulty='beginner', status=READY, created_at=stale)
+                     for history_id in (1, 2)])
+    session.commit()
+
+    with patch.dict(QUIZ_PREFETCH_CONFIG, {'MAX_PER_USER': 2}), patch.object(quiz_prefetch, '_last_expiry', None):
+        # Expired rows no longer count against the per-user cap, but stay READY until a worker runs
+        assert should_prefetch(test_user.id)
+        assert {row.status for row in PrefetchedQuiz.query} == {READY}
+
+        worker = JobWorker(prefetch_queue)
+        assert not worker.run_once()
+        assert {row.status for row in PrefetchedQuiz.query} == {WASTED}
+        # Rate limited: the next idle poll does not write again
+        assert not quiz_prefetch.maybe_expire_stale()
@@ -0,0 +1,60 @@
+"""Test sectioned lesson generation and NDJSON lesson streaming."""
+import json
+import time
+from unittest.mock import patch, MagicMock
+from src.config.settings import SECTIONED_LESSON_CONFIG
+from src.core.models.search_history import SearchHistory
+from src.core.services.ai.sectioned_lessons import assemble_sections, parse_outline
+
+SECTIONS = SECTIONED_LESSON_CONFIG['SECTIONS']
+
+def fake_completion(**request):
+    """Outline or section text depending on the prompt; the first section is the slowest."""
+    prompt = request['messages'][-1]['content']
+    if prompt.startswith('Write a short outline'):
+        content = '\n'.join(f"{i + 1}. **{title}**: point {i}; detail {i}" for i, title in enumerate(SECTIONS))
+    else:
+        title = prompt.split("Write only the '")[1].split("'")[0]
+        if title == SECTIONS[0]:
+            time.sleep(0.05)
+        content = f"## {title}\n\nText about {title.lower()}."
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+def test_outline_parsing_and_assembly():
+    """Test that outline lines map to sections and sections assemble in outline order."""
+    outline = parse_outline("Outline:\n1. **Introduction**: why; what\n- key concepts: roots\nnoise", SECTIONS)
+    assert outline['Introduction'] == ['why', 'what']
+    assert outline['Key Concepts'] == ['roots']
+    assert outline['Summary'] == []
+    lesson = assemble_sections('Tides', ['Introduction', 'Summary'], {1: 'Wrap up.', 0: '## Introduction\n\nHi'})
+    assert lesson == '# Tides\n\n## Introduction\n\nHi\n\n## Summary\n\nWrap up.'
+
+def test_stream_lesson_sections(test_client, test_user, session):
+    """Test that sections stream as they finish and the saved lesson keeps outline order."""
+    token = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'}).json['token']
+    headers = {'Authorization': f"Bearer {token}"}
+    client = MagicMock()
+    client.chat.completions.create.side_effect = fake_completion
+
+    with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+        response = test_client.post('/api/ai/generate-lesson', headers=headers,
+                                    json={'topic': 'Ocean tides', 'difficulty': 'beginner', 'stream': True})
+        assert response.mimetype == 'application/x-ndjson'
+        events = [json.loads(line) for line in response.data.splitlines()]
+        with patch.dict(SECTIONED_LESSON_CONFIG, {'ENABLED': True}):
+            plain = test_client.post('/api/ai/generate-lesson', headers=headers,
+                                     json={'topic': 'Volcanoes', 'difficulty': 'beginner'})
+
+    assert events[0] == {'type': 'outline', 'sections': SECTIONS}
+    streamed = [event['title'] for event in events[1:-1]]
+    assert sorted(streamed) == sorted(SECTIONS) and streamed[-1] == SECTIONS[0]
+    assert events[-1]['type'] == 'lesson' and events[-1]['history_id']
+    assert client.chat.completions.create.call_count == 12
+
+    for history_id in (events[-1]['history_id'], plain.json['history_id']):
+        content = session.get(SearchHistory, history_id).content
+        assert [content.index(f"## {title}") for title in SECTIONS] == sorted(
+            content.index(f"## {title}") for title in SECTIONS)
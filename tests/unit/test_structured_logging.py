@@ -0,0 +1,69 @@
+"""Test structured logging helpers."""
+import json
+import logging
+import queue
+from unittest.mock import patch
+from src.core.utils import structured_logging
+from src.core.utils.structured_logging import (
+    NonBlockingQueueHandler,
+    StructuredFormatter,
+    log_payload,
+    truncate,
+)
+
+def test_truncate_marks_dropped_characters():
+    """Test payload truncation."""
+    assert truncate('short', max_chars=10) == 'short'
+    assert truncate('x' * 25, max_chars=10) == 'x' * 10 + '... [15 more chars]'
+
+def test_log_payload_skips_unsampled_payloads():
+    """Test that unsampled payloads are never formatted."""
+    logger = logging.getLogger('test.payload')
+    logger.setLevel(logging.INFO)
+    payload = {'messages': ['hello']}
+
+    with patch.dict(structured_logging._payload_settings, {'sample_rate': 0.0}), \
+            patch.object(logger, 'log') as mock_log:
+        assert log_payload(logger, 'Prompt', payload) is False
+        mock_log.assert_not_called()
+
+    with patch.dict(structured_logging._payload_settings, {'sample_rate': 1.0, 'max_chars': 5}), \
+            patch.object(logger, 'log') as mock_log:
+        assert log_payload(logger, 'Prompt', payload) is True
+        args, kwargs = mock_log.call_args
+        assert args[3].endswith('more chars]')
+        assert kwargs['extra']['payload_chars'] == len(repr(payload))
+
+def test_unsampled_errors_are_always_logged():
+    """Test that sampled=False bypasses the sample rate."""
+    logger = logging.getLogger('test.payload.errors')
+    with patch.dict(structured_logging._payload_settings, {'sample_rate': 0.0}), \
+            patch.object(logger, 'log') as mock_log:
+        assert log_payload(logger, 'Bad JSON', '{', level=logging.ERROR, sampled=False) is True
+        mock_log.assert_called_once()
+
+def test_queue_handler_drops_instead_of_blocking():
+    """Test that a full log queue drops records rather than blocking the caller."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger('test.queue')
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning('first %s', 1)
+        logger.warning('second %s', 2)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 1
+    record = handler.queue.get_nowait()
+    assert record.msg == 'first 1'
+    assert record.args is None
+
+def test_structured_formatter_includes_extra_fields():
+    """Test JSON rendering of log records."""
+    record = logging.makeLogRecord({
+        'name': 'test', 'levelname': 'INFO', 'msg': 'hello %s', 'args': ('world',), 'model': 'gpt'
+    })
+    entry = json.loads(StructuredFormatter().format(record))
+    assert entry['message'] == 'hello world'
+    assert entry['model'] == 'gpt'
@@ -0,0 +1,41 @@
+"""Test subject classification."""
+from scripts.train_subject_model import train
+from src.core.services.ai.subject_classifier import (
+    CompositeClassifier,
+    KeywordClassifier,
+    LinearClassifier,
+    build_classifier,
+)
+
+def test_keyword_classifier_matches_whole_words():
+    """Test that terms only match on word boundaries."""
+    classifier = build_classifier({'MODEL_PATH': None})
+    assert classifier.classify('Codependency in relationships') == 'general'
+    assert classifier.classify('Writing clean code') == 'programming'
+    # "coding" stems to "code", not to the fish
+    assert classifier.classify('Coding interviews') == 'programming'
+    assert classifier.classify('Cod fishing') == 'general'
+    assert classifier.classify('Solving quadratic equations') == 'math'
+    assert classifier.classify('The French Revolution') == 'social_studies'
+    assert classifier.classify_many(['Cell biology', 'Rust ownership']) == ['science', 'programming']
+
+def test_longer_phrases_win():
+    """Test that multi-word terms outweigh single words."""
+    classifier = KeywordClassifier({'subjects': [
+        {'name': 'science', 'terms': ['science']},
+        {'name': 'programming', 'terms': ['computer science']},
+    ]})
+    assert classifier.classify('Computer science basics') == 'programming'
+    assert classifier.classify('Science fair') == 'science'
+
+def test_linear_model_fallback():
+    """Test that the trained model only answers when the taxonomy has no match."""
+    model = LinearClassifier(train([
+        ('guitar chords', 'music'), ('piano scales', 'music'), ('guitar solos', 'music'),
+        ('bread baking', 'cooking'), ('pasta sauce', 'cooking'), ('baking cakes', 'cooking'),
+    ]))
+    keywords = KeywordClassifier({'subjects': [{'name': 'math', 'terms': ['algebra']}]})
+    classifier = CompositeClassifier(keywords, model, min_confidence=0.5)
+
+    assert classifier.classify('Algebra for guitarists') == 'math'
+    assert classifier.classify('Jazz guitar') == 'music'
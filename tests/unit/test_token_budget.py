@@ -0,0 +1,90 @@
+"""Test local token counting, context-window fitting and the per-user token limit."""
+import pytest
+from unittest.mock import patch, MagicMock
+from src.config.settings import TOKEN_BUDGET_CONFIG
+from src.core.services.ai import token_budget
+from src.core.services.ai.token_budget import (
+    PromptTooLarge, TokenLimiter, TokenRateLimited, count_message_tokens, count_tokens,
+    fit_max_tokens, set_token_limiter, truncate_to_tokens,
+)
+from src.core.utils.openai_client import get_openai_response
+
+def test_counting_and_truncation():
+    """Test that counts grow with the text and truncation respects the limit."""
+    assert count_tokens('') == 0
+    assert 1 <= count_tokens('Hello world') <= 4
+    assert count_tokens('光合作用是植物的过程') >= 8
+    sentence = 'Photosynthesis converts light energy into chemical energy stored in glucose. '
+    assert count_tokens(sentence * 10) >= 10 * count_tokens(sentence) - 10
+    messages = [{'role': 'user', 'content': sentence}]
+    assert count_message_tokens(messages) > count_tokens(sentence)
+
+    cut = truncate_to_tokens(sentence * 50, 40)
+    assert sentence.startswith(cut[:len(sentence)]) and count_tokens(cut) <= 40
+    assert truncate_to_tokens('short', 40) == 'short'
+
+def test_unknown_model_falls_back_to_approximation_offline():
+    """Test that an unknown model whose fallback encoding cannot be fetched still gets a count."""
+    offline = MagicMock()
+    offline.encoding_for_model.side_effect = KeyError('unknown-model')
+    offline.get_encoding.side_effect = OSError('no network')
+    with patch.object(token_budget, 'tiktoken', offline):
+        token_budget._encoding.cache_clear()
+        try:
+            assert token_budget._encoding('unknown-model') is None
+            assert count_tokens('Hello world', model='unknown-model') >= 1
+        finally:
+            token_budget._encoding.cache_clear()
+
+def test_max_tokens_fits_context_window(app):
+    """Test that max_tokens shrinks to the window and oversized prompts are rejected."""
+    windows = {'small-model': 1000}
+    with patch.dict(TOKEN_BUDGET_CONFIG, {'CONTEXT_WINDOWS': windows, 'SAFETY_MARGIN': 0, 'MIN_COMPLETION_TOKENS': 100}):
+        assert fit_max_tokens(200, 'small-model', 500) == 500
+        assert fit_max_tokens(700, 'small-model', 500) == 300
+        assert fit_max_tokens(950, 'small-model', 30) == 30
+        with pytest.raises(PromptTooLarge):
+            fit_max_tokens(950, 'small-model', 500)
+
+        client = MagicMock()
+        client.chat.completions.create.return_value.choices = [MagicMock()]
+        client.chat.completions.create.return_value.choices[0].message.content = 'ok'
+        prompt = [{'role': 'user', 'content': 'word ' * 600}]
+        with patch('src.core.utils.openai_client.get_openai_client', return_value=client):
+            get_openai_response(prompt, model='small-model')
+            with pytest.raises(PromptTooLarge):
+                get_openai_response([{'role': 'user', 'content': 'word ' * 2000}], model='small-model')
+    sent = client.chat.completions.create.call_args.kwargs['max_tokens']
+    assert 100 <= sent <= 1000 - count_message_tokens(prompt)
+    assert client.chat.completions.create.call_count == 1
+
+def test_feedback_is_bounded_and_rate_limited(test_client, test_user):
+    """Test that reference text is truncated and users over their token limit get 429."""
+    token = test_client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass123'}).json['token']
+    headers = {'Authorization': f"Bearer {token}"}
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [MagicMock()]
+    client.chat.completions.create.return_value.choices[0].message.content = 'Think about energy.'
+
+    limiter = TokenLimiter('1000 per hour')
+    set_token_limiter(limiter)
+    try:
+        with patch('src.core.utils.openai_client.get_openai_client', return_value=client), \
+                patch.dict(TOKEN_BUDGET_CONFIG, {'MAX_REFERENCE_TOKENS': 50}):
+            first = test_client.post('/api/ai/get-feedback', headers=headers, json={
+                'answer': 'It makes food', 'correct_answer': 'It produces ATP in the mitochondria. ' * 500})
+            limited = test_client.post('/api/ai/get-feedback', headers=headers, json={
+                'answer': 'It makes food', 'correct_answer': 'It produces ATP'})
+            oversized = test_client.post('/api/ai/get-feedback', headers=headers, json={
+                'answer': '能量' * 450, 'correct_answer': 'It produces ATP'})
+    finally:
+        set_token_limiter(None)
+
+    assert first.status_code == 200
+    prompt = client.chat.completions.create.call_args.kwargs['messages'][-1]['content']
+    assert count_tokens(prompt) < 120
+    assert limited.status_code == 429 and 'retry' in limited.json['error']
+    assert oversized.status_code == 400
+    assert client.chat.completions.create.call_count == 1
+    with pytest.raises(TokenRateLimited):
+        limiter.charge(test_user.id, 500)